@@ -0,0 +1,86 @@
+"""
+End-to-end time on compressed input.
+
+For gzip, bz2 and xz, compares running the pipeline straight on the
+compressed file (decompression in a read-ahead thread) against
+decompressing to a temporary file first and running on that, and against
+decompressing inline without the read-ahead thread.
+
+Usage: python -m benchmarks.bench_compressed [ROWS]
+"""
+import bz2
+import gzip
+import io
+import lzma
+import os
+import shutil
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+from benchmarks.workload import write_workload
+from vinted_shipping.services import compression_service
+from vinted_shipping.services.discount_service import iter_discounts
+from vinted_shipping.services.output_service import write_transactions
+from vinted_shipping.services.parser_service import iter_input_file
+
+FORMATS = (('gzip', '.gz', gzip), ('bz2', '.bz2', bz2), ('xz', '.xz', lzma))
+
+
+def run_pipeline(path):
+    with open(os.devnull, 'w') as sink:
+        write_transactions(iter_discounts(iter_input_file(path)), sink)
+
+
+def decompress_then_run(path, module, directory):
+    start = time.perf_counter()
+    plain = os.path.join(directory, 'decompressed.txt')
+    with module.open(path, 'rb') as source, open(plain, 'wb') as target:
+        shutil.copyfileobj(source, target, 1 << 20)
+    run_pipeline(plain)
+    os.remove(plain)
+    return time.perf_counter() - start
+
+
+def streamed(path):
+    start = time.perf_counter()
+    run_pipeline(path)
+    return time.perf_counter() - start
+
+
+def streamed_inline(path):
+    def open_inline(file_path, compression):
+        module = next(module for name, _, module in compression_service.COMPRESSION_FORMATS
+                      if name == compression)
+        return io.TextIOWrapper(module.open(file_path, 'rb'))
+
+    with patch.object(compression_service, 'open_compressed', open_inline):
+        return streamed(path)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, 'input.txt')
+        write_workload(source, rows)
+        plain_seconds = streamed(source)
+        print(f"{rows} rows, uncompressed run {plain_seconds:.2f}s")
+        print(f"{'format':<6} {'decompress+run':>15} {'inline':>9} {'read-ahead':>11}")
+
+        for name, suffix, module in FORMATS:
+            path = source + suffix
+            with open(source, 'rb') as plain, module.open(path, 'wb') as compressed:
+                shutil.copyfileobj(plain, compressed, 1 << 20)
+
+            baseline = decompress_then_run(path, module, directory)
+            inline = streamed_inline(path)
+            read_ahead = streamed(path)
+            print(f"{name:<6} {baseline:14.2f}s {inline:8.2f}s {read_ahead:10.2f}s"
+                  f"  ({baseline / read_ahead:.2f}x)")
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
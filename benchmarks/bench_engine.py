@@ -0,0 +1,69 @@
+"""
+Contention benchmark for PricingEngine.
+
+THREADS consumer threads submit batches to one engine, either each owning
+its own months (like one thread per upstream partition) or all sharing
+the same months. Striped per-month locks are compared with a single
+global lock (stripes=1). Threads only run in parallel on free-threaded
+CPython builds; with the GIL, this shows the locking overhead.
+
+Usage: python -m benchmarks.bench_engine [ROWS] [THREADS] [BATCH]
+"""
+import sys
+import threading
+import time
+
+from benchmarks.workload import generate_lines
+from vinted_shipping.services.engine_service import DEFAULT_STRIPES, PricingEngine
+from vinted_shipping.services.parser_service import parse_line
+
+
+def partition(lines, threads, by_month):
+    parts = [[] for _ in range(threads)]
+    for number, line in enumerate(lines):
+        owner = hash(line[:7]) % threads if by_month else number % threads
+        parts[owner].append(line)
+    return parts
+
+
+def run(parts, stripes, batch_size):
+    engine = PricingEngine(stripes=stripes)
+    batches = [[[parse_line(line) for line in part[start:start + batch_size]]
+                for start in range(0, len(part), batch_size)] for part in parts]
+    barrier = threading.Barrier(len(parts) + 1)
+
+    def consume(part_batches):
+        barrier.wait()
+        for batch in part_batches:
+            engine.submit_many(batch)
+
+    threads = [threading.Thread(target=consume, args=(part_batches,)) for part_batches in batches]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    batch_size = int(sys.argv[3]) if len(sys.argv) > 3 else 256
+
+    lines = list(generate_lines(rows, months=48))
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print(f"{rows} rows, {threads} threads, batches of {batch_size}, GIL {'on' if gil else 'off'}")
+    print(f"{'months':<8} {'locks':<8} {'seconds':>8} {'rows/s':>12}")
+
+    for by_month in (True, False):
+        parts = partition(lines, threads, by_month)
+        for stripes in (DEFAULT_STRIPES, 1):
+            seconds = run(parts, stripes, batch_size)
+            print(f"{'owned' if by_month else 'shared':<8} {'striped' if stripes > 1 else 'global':<8} "
+                  f"{seconds:8.2f} {rows / seconds:12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Compare the memory footprint of the transaction representations.
+
+Usage: python -m benchmarks.bench_memory [ROWS]
+"""
+import sys
+import tracemalloc
+
+from benchmarks.legacy import LegacyTransaction
+from vinted_shipping.models.transaction import Transaction
+from vinted_shipping.models.transaction_batch import TransactionBatch
+
+
+def generate_lines(rows):
+    sizes = ('S', 'M', 'L')
+    carriers = ('LP', 'MR')
+    for i in range(rows):
+        date = f"2015-{i % 12 + 1:02d}-{i % 28 + 1:02d}"
+        yield date, sizes[i % 3], carriers[i % 2]
+
+
+def measure(build, rows):
+    tracemalloc.start()
+    result = build(rows)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def build_legacy(rows):
+    return [LegacyTransaction(d, s, c, f"{d} {s} {c}") for d, s, c in generate_lines(rows)]
+
+
+def build_slots(rows):
+    return [Transaction(d, s, c, f"{d} {s} {c}") for d, s, c in generate_lines(rows)]
+
+
+def build_batch(rows):
+    return TransactionBatch.from_transactions(
+        Transaction(d, s, c, f"{d} {s} {c}") for d, s, c in generate_lines(rows))
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+
+    results = [
+        ('legacy __dict__ Transaction', measure(build_legacy, rows)),
+        ('__slots__ Transaction', measure(build_slots, rows)),
+        ('TransactionBatch', measure(build_batch, rows)),
+    ]
+
+    baseline = results[0][1]
+    print(f"{rows} rows")
+    for name, size in results:
+        print(f"{name:<30} {size / rows:8.1f} bytes/row  {baseline / size:5.1f}x smaller")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Compare print_transactions with the buffered output writer.
+
+Usage: python -m benchmarks.bench_output [ROWS]
+"""
+import contextlib
+import os
+import sys
+import time
+
+from vinted_shipping.models.transaction import Transaction
+from vinted_shipping.services.discount_service import calculate_discounts
+from vinted_shipping.services.output_service import FORMATS, write_transactions
+from vinted_shipping.services.print_service import print_transactions
+
+
+def make_transactions(rows):
+    sizes = ('S', 'M', 'L')
+    carriers = ('LP', 'MR')
+    transactions = []
+    for i in range(rows):
+        date = f"2015-{i // 10000 % 12 + 1:02d}-{i // 400 % 28 + 1:02d}"
+        line = f"{date} {sizes[i % 3]} {carriers[i % 2]}"
+        transactions.append(Transaction(date, sizes[i % 3], carriers[i % 2], line))
+    return calculate_discounts(transactions)
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    transactions = make_transactions(rows)
+
+    with open(os.devnull, 'w') as devnull:
+        with contextlib.redirect_stdout(devnull):
+            baseline = timed(lambda: print_transactions(transactions))
+        results = [('print_transactions', baseline),
+                   ('writer text (text sink)', timed(lambda: write_transactions(transactions, devnull)))]
+
+    with open(os.devnull, 'wb') as devnull:
+        for output_format in FORMATS:
+            results.append((f"writer {output_format} (binary sink)",
+                            timed(lambda: write_transactions(transactions, devnull, output_format))))
+
+    print(f"{rows} rows")
+    for name, seconds in results:
+        print(f"{name:<30} {rows / seconds:12,.0f} rows/s  ({baseline / seconds:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
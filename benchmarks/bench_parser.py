@@ -0,0 +1,54 @@
+"""
+Microbenchmark of the line parser against the original double-strptime path.
+
+Usage: python -m benchmarks.bench_parser [ROWS]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.legacy import legacy_parse_input_file
+from vinted_shipping.services.parser_service import parse_input_file
+
+
+def write_sample(path, rows):
+    sizes = ('S', 'M', 'L')
+    carriers = ('LP', 'MR')
+    with open(path, 'w') as file:
+        for i in range(rows):
+            if i % 50 == 49:
+                file.write("2015-02-29 CUSPS\n")
+                continue
+            date = f"{2015 + i // 200000}-{i // 16000 % 12 + 1:02d}-{i // 600 % 28 + 1:02d}"
+            file.write(f"{date} {sizes[i % 3]} {carriers[i % 2]}\n")
+
+
+def lines_per_second(parse, path, rows, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(path)
+        best = min(best, time.perf_counter() - start)
+    return rows / best
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+
+    fd, path = tempfile.mkstemp(suffix='.txt')
+    os.close(fd)
+    try:
+        write_sample(path, rows)
+        legacy = lines_per_second(legacy_parse_input_file, path, rows)
+        current = lines_per_second(parse_input_file, path, rows)
+    finally:
+        os.remove(path)
+
+    print(f"{rows} lines")
+    print(f"legacy parser  {legacy:12,.0f} lines/s")
+    print(f"current parser {current:12,.0f} lines/s  ({current / legacy:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Per-row cost of the interpreted rules versus the compiled rule plan.
+
+Each engine discounts freshly parsed transactions; parsing is not timed.
+
+Usage: python -m benchmarks.bench_rule_plan [ROWS] [REPEATS]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.workload import write_workload
+from vinted_shipping.rules import compile_rules
+from vinted_shipping.services.discount_service import iter_discounts
+from vinted_shipping.services.parser_service import parse_input_file
+
+
+def time_engine(path, dispatcher, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        transactions = parse_input_file(path)
+        start = time.perf_counter()
+        for _ in iter_discounts(transactions, dispatcher):
+            pass
+        best = min(best, time.perf_counter() - start)
+    return best, len(transactions)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    fd, path = tempfile.mkstemp(suffix='.txt')
+    os.close(fd)
+    try:
+        write_workload(path, rows, l_lp_share=0.2)
+        interpreted, count = time_engine(path, None, repeats)
+        compiled, _ = time_engine(path, compile_rules(), repeats)
+    finally:
+        os.remove(path)
+
+    print(f"{count} rows, best of {repeats}")
+    print(f"interpreted  {interpreted * 1e9 / count:8.1f} ns/row")
+    print(f"compiled     {compiled * 1e9 / count:8.1f} ns/row  ({interpreted / compiled:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Evaluate many what-if scenarios over one dataset.
+
+Compares evaluate_scenarios against rerunning the rule pipeline per
+scenario (measured on a few scenarios and extrapolated).
+
+Usage: python -m benchmarks.bench_scenarios [ROWS] [SCENARIOS]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.workload import write_workload
+from vinted_shipping.models.price_table import PriceTable
+from vinted_shipping.services.discount_service import calculate_discounts
+from vinted_shipping.services.parser_service import parse_input_batch, parse_input_file
+from vinted_shipping.services.price_service import get_price_table, set_price_table
+from vinted_shipping.services.scenario_service import Scenario, evaluate_scenarios
+
+RERUN_SAMPLE = 3
+
+
+def random_scenarios(count, seed=0):
+    rng = random.Random(seed)
+    return [Scenario(f"scenario-{i}",
+                     {carrier: {size: round(rng.uniform(1.0, 8.0), 2) for size in ('S', 'M', 'L')}
+                      for carrier in ('LP', 'MR')},
+                     cap=rng.choice((5.0, 10.0, 15.0, 20.0)))
+            for i in range(count)]
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    fd, path = tempfile.mkstemp(suffix='.txt')
+    os.close(fd)
+    try:
+        write_workload(path, rows, months=24, l_lp_share=0.1)
+        batch = parse_input_batch(path)
+        scenarios = random_scenarios(count)
+
+        start = time.perf_counter()
+        evaluate_scenarios(batch, scenarios)
+        batched = time.perf_counter() - start
+
+        current = get_price_table()
+        start = time.perf_counter()
+        for scenario in scenarios[:RERUN_SAMPLE]:
+            set_price_table(PriceTable(scenario.price_table.as_dict()))
+            calculate_discounts(parse_input_file(path))
+        set_price_table(current)
+        rerun = (time.perf_counter() - start) / RERUN_SAMPLE * count
+    finally:
+        os.remove(path)
+
+    print(f"{rows} rows, {count} scenarios")
+    print(f"evaluate_scenarios  {batched:8.2f}s")
+    print(f"full reruns         {rerun:8.2f}s (extrapolated from {RERUN_SAMPLE})  ({rerun / batched:,.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Measure the cost of the instrumentation layer.
+
+Runs the streaming parse and discount pipeline without hooks, with no-op
+PipelineHooks and with PipelineStats, next to the loop as it was before the
+hooks existed.
+
+Usage: python -m benchmarks.bench_stats [ROWS]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.legacy import legacy_iter_discounts
+from benchmarks.workload import write_workload
+from vinted_shipping import rules
+from vinted_shipping.rules.dispatch import RuleDispatcher
+from vinted_shipping.services.discount_service import iter_discounts
+from vinted_shipping.services.parser_service import parse_input_file
+from vinted_shipping.services.price_service import get_price_table
+from vinted_shipping.services.stats_service import PipelineHooks, PipelineStats
+
+
+def best_time(function, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def drain(iterable):
+    for _ in iterable:
+        pass
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+
+    fd, path = tempfile.mkstemp(suffix='.txt')
+    os.close(fd)
+    try:
+        write_workload(path, rows, l_lp_share=0.2)
+        transactions = parse_input_file(path)
+    finally:
+        os.remove(path)
+
+    dispatcher = RuleDispatcher(rules.RULES)
+    variants = {
+        'reference loop': lambda: drain(legacy_iter_discounts(transactions, dispatcher, get_price_table())),
+        'hooks disabled': lambda: drain(iter_discounts(transactions, dispatcher)),
+        'no-op hooks': lambda: drain(iter_discounts(transactions, dispatcher, hooks=PipelineHooks())),
+        'PipelineStats': lambda: drain(PipelineStats().iter_stage(
+            'discount', iter_discounts(transactions, dispatcher, hooks=PipelineStats()))),
+    }
+
+    reference = None
+    print(f"{rows} lines")
+    for name, function in variants.items():
+        elapsed = best_time(function)
+        reference = reference or elapsed
+        print(f"{name:<16} {elapsed:8.4f}s  {elapsed / reference - 1:+7.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Reference implementations of the original code paths, used as baselines.
+"""
+from collections import defaultdict
+from datetime import datetime
+
+
+class LegacyTransaction:
+    """The original dict-based Transaction that parsed its date with strptime."""
+
+    def __init__(self, date, package_size, carrier, raw_line):
+        self.date = date
+        self.package_size = package_size
+        self.carrier = carrier
+        self.raw_line = raw_line
+        self.is_valid = self._validate()
+
+        self.base_price = 0.0
+        self.discount = 0.0
+        self.final_price = 0.0
+
+        if self.is_valid:
+            self.date_obj = datetime.strptime(date, "%Y-%m-%d")
+            self.year_month = f"{self.date_obj.year}-{self.date_obj.month:02d}"
+
+    def _validate(self):
+        valid_sizes = ['S', 'M', 'L']
+        valid_carriers = ['LP', 'MR']
+
+        return (self.package_size in valid_sizes and
+                self.carrier in valid_carriers)
+
+
+def legacy_parse_input_file(file_path):
+    transactions = []
+
+    with open(file_path, 'r') as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+
+            parts = line.split()
+            transaction = LegacyTransaction('', '', '', line)
+
+            if len(parts) == 3:
+                try:
+                    datetime.strptime(parts[0], '%Y-%m-%d')
+                    transaction = LegacyTransaction(parts[0], parts[1], parts[2], line)
+                except ValueError:
+                    transaction.is_valid = False
+            else:
+                transaction.is_valid = False
+
+            transactions.append(transaction)
+
+    return transactions
+
+
+def legacy_iter_discounts(transactions, dispatcher, price_table):
+    """The discount loop as it was before the instrumentation hooks."""
+    monthly_discount_tracker = defaultdict(float)
+    l_lp_counter = defaultdict(int)
+
+    for transaction in transactions:
+        if transaction.is_valid:
+
+            transaction.base_price = price_table.price(transaction.carrier, transaction.package_size)
+            transaction.final_price = transaction.base_price
+
+            year_month = transaction.year_month
+            if monthly_discount_tracker[year_month] < 10.0:
+                for rule in dispatcher.rules_for(transaction):
+                    rule.apply_rule(transaction, monthly_discount_tracker, l_lp_counter)
+
+        yield transaction
@@ -0,0 +1,83 @@
+"""
+Load generator for the pricing server.
+
+Opens several connections, pipelines up to WINDOW unanswered lines on each
+and reports latency percentiles and throughput.
+
+Usage: python -m benchmarks.loadgen [--host HOST] [--port PORT | --unix PATH]
+                                    [--connections N] [--requests N] [--window N]
+"""
+import argparse
+import asyncio
+import time
+from collections import deque
+
+
+def make_line(i):
+    sizes = ('S', 'M', 'L')
+    carriers = ('LP', 'MR')
+    return f"2015-{i // 10000 % 12 + 1:02d}-{i // 400 % 28 + 1:02d} {sizes[i % 3]} {carriers[i % 2]}\n"
+
+
+async def open_connection(args):
+    if args.unix:
+        return await asyncio.open_unix_connection(args.unix)
+    return await asyncio.open_connection(args.host, args.port)
+
+
+async def run_client(args, offset, latencies):
+    reader, writer = await open_connection(args)
+    sent_at = deque()
+    window = asyncio.Semaphore(args.window)
+
+    async def send():
+        for i in range(offset, offset + args.requests):
+            await window.acquire()
+            sent_at.append(time.perf_counter())
+            writer.write(make_line(i).encode())
+            await writer.drain()
+        writer.write_eof()
+
+    sender = asyncio.create_task(send())
+    for _ in range(args.requests):
+        if not await reader.readline():
+            break
+        latencies.append(time.perf_counter() - sent_at.popleft())
+        window.release()
+
+    await sender
+    writer.close()
+    await writer.wait_closed()
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+async def run(args):
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(run_client(args, n * args.requests, latencies)
+                           for n in range(args.connections)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"{len(latencies)} responses over {args.connections} connections in {elapsed:.2f}s")
+    print(f"throughput: {len(latencies) / elapsed:,.0f} lines/s")
+    print(f"latency p50: {percentile(latencies, 0.50) * 1000:.3f} ms")
+    print(f"latency p99: {percentile(latencies, 0.99) * 1000:.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive the pricing server with pipelined requests.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', metavar='PATH')
+    parser.add_argument('--connections', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=20_000, help="lines per connection")
+    parser.add_argument('--window', type=int, default=256, help="unanswered lines per connection")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Benchmark suite for the whole pipeline.
+
+Times parse_input_file, calculate_discounts, print_transactions and the
+end-to-end CLI on generated workloads, recording time per row and peak RSS.
+Each measurement runs in a fresh interpreter so peak RSS belongs to one stage
+(plus the setup it needs: the discount and print stages parse the file first).
+
+Usage:
+    python -m benchmarks.suite run [--rows 10000 100000 1000000] [--repeat 3]
+                                   [--output results.json] [workload options]
+    python -m benchmarks.suite compare BASELINE CURRENT [--threshold 0.10]
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.workload import add_workload_arguments, workload_options, write_workload
+
+STAGES = ('parse', 'discount', 'print', 'end_to_end')
+
+DEFAULT_ROWS = (10_000, 100_000, 1_000_000)
+
+
+def peak_rss_kb():
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def time_stage(stage, path):
+    from vinted_shipping import main as cli
+    from vinted_shipping.services.discount_service import calculate_discounts
+    from vinted_shipping.services.parser_service import parse_input_file
+    from vinted_shipping.services.print_service import print_transactions
+
+    if stage == 'end_to_end':
+        start = time.perf_counter()
+        cli.main([path, '--output', os.devnull])
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    transactions = parse_input_file(path)
+    if stage == 'parse':
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    calculate_discounts(transactions)
+    if stage == 'discount':
+        return time.perf_counter() - start
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        print_transactions(transactions)
+        return time.perf_counter() - start
+
+
+def measure(stage, path, repeat):
+    """Run a stage repeat times in child processes; keep the best time and the highest RSS."""
+    best, rss = float('inf'), 0
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.suite', 'stage', stage, path],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        sample = json.loads(output)
+        best = min(best, sample['seconds'])
+        rss = max(rss, sample['peak_rss_kb'])
+    return best, rss
+
+
+def run(args):
+    options = workload_options(args)
+    report = {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'workload': {key: list(value) if isinstance(value, tuple) else value
+                     for key, value in options.items()},
+        'results': [],
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.rows:
+            path = os.path.join(directory, f"{rows}.txt")
+            write_workload(path, rows, **options)
+
+            for stage in STAGES:
+                seconds, rss = measure(stage, path, args.repeat)
+                report['results'].append({
+                    'stage': stage,
+                    'rows': rows,
+                    'seconds': seconds,
+                    'seconds_per_row': seconds / rows,
+                    'peak_rss_kb': rss,
+                })
+                print(f"{stage:<10} {rows:>10} rows {seconds:9.3f}s "
+                      f"{seconds / rows * 1e6:8.3f} us/row {rss / 1024:8.1f} MiB")
+
+            os.remove(path)
+
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f"results written to {args.output}")
+
+
+def compare(args):
+    """Exit with status 1 when a stage is slower per row than the baseline by more than threshold."""
+    with open(args.baseline) as file:
+        baseline = {(entry['stage'], entry['rows']): entry for entry in json.load(file)['results']}
+    with open(args.current) as file:
+        current = json.load(file)['results']
+
+    regressions = 0
+    for entry in current:
+        reference = baseline.get((entry['stage'], entry['rows']))
+        if reference is None:
+            continue
+
+        change = entry['seconds_per_row'] / reference['seconds_per_row'] - 1
+        regressed = change > args.threshold
+        regressions += regressed
+        print(f"{entry['stage']:<10} {entry['rows']:>10} rows "
+              f"{reference['seconds_per_row'] * 1e6:8.3f} -> {entry['seconds_per_row'] * 1e6:8.3f} us/row "
+              f"{change:+7.1%}{'  REGRESSION' if regressed else ''}")
+
+    if regressions:
+        print(f"{regressions} stage(s) slower than the baseline by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the shipping discount pipeline.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="run the suite and store the results as JSON")
+    run_parser.add_argument('--rows', type=int, nargs='+', default=list(DEFAULT_ROWS))
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('--output', default='benchmark_results.json')
+    add_workload_arguments(run_parser)
+
+    compare_parser = commands.add_parser('compare', help="compare results against a baseline")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help="allowed slowdown per row (default: 0.10)")
+
+    stage_parser = commands.add_parser('stage', help="time a single stage (used by run)")
+    stage_parser.add_argument('stage', choices=STAGES)
+    stage_parser.add_argument('path')
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args)
+    elif args.command == 'compare':
+        compare(args)
+    else:
+        seconds = time_stage(args.stage, args.path)
+        print(json.dumps({'seconds': seconds, 'peak_rss_kb': peak_rss_kb()}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Deterministic generator of synthetic transaction files.
+
+The same options and seed always produce the same file. Lines are in date
+order, spread evenly over the requested months.
+
+Usage: python -m benchmarks.workload OUTPUT ROWS [--seed N] [--sizes S=1,M=1,L=1]
+                                     [--carriers LP=1,MR=1] [--invalid 0.02]
+                                     [--months 12] [--start 2015-01] [--l-lp 0.0]
+"""
+import argparse
+import calendar
+import random
+
+from vinted_shipping.utils.constants import PACKAGE_SIZES, CARRIERS
+
+INVALID_LINES = (
+    "2015-02-29 CUSPS",
+    "2015-13-01 S MR",
+    "2015-02-01 XL LP",
+    "2015-02-01 S DHL",
+    "not a transaction",
+)
+
+
+def parse_mix(text, allowed):
+    """Parse 'S=2,M=1' into weights ordered like allowed; missing keys weigh 0."""
+    weights = dict.fromkeys(allowed, 0.0)
+    for item in text.split(','):
+        key, _, weight = item.partition('=')
+        if key not in weights:
+            raise ValueError(f"unknown key {key!r}, expected one of {', '.join(allowed)}")
+        weights[key] = float(weight or 1)
+    return tuple(weights[key] for key in allowed)
+
+
+def generate_lines(rows, seed=0, size_mix=(1, 1, 1), carrier_mix=(1, 1),
+                   invalid_share=0.02, months=12, start=(2015, 1), l_lp_share=0.0):
+    """
+    Yield rows transaction lines.
+
+    invalid_share is the fraction of ignored lines and l_lp_share the
+    fraction of lines forced to 'L LP'; the other lines draw their size and
+    carrier from the given weights.
+    """
+    rng = random.Random(seed)
+    random_value = rng.random
+    choose = rng.choices
+
+    month_days = []
+    year, month = start
+    for _ in range(months):
+        month_days.append((f"{year}-{month:02d}", calendar.monthrange(year, month)[1]))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+    for i in range(rows):
+        if random_value() < invalid_share:
+            yield INVALID_LINES[rng.randrange(len(INVALID_LINES))]
+            continue
+
+        month_index, position = divmod(i * months, rows)
+        year_month, days = month_days[month_index]
+        day = position * days // rows + 1
+
+        if random_value() < l_lp_share:
+            size, carrier = 'L', 'LP'
+        else:
+            size = choose(PACKAGE_SIZES, size_mix)[0]
+            carrier = choose(CARRIERS, carrier_mix)[0]
+
+        yield f"{year_month}-{day:02d} {size} {carrier}"
+
+
+def write_workload(path, rows, **options):
+    with open(path, 'w') as file:
+        file.writelines(f"{line}\n" for line in generate_lines(rows, **options))
+
+
+def add_workload_arguments(parser):
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--sizes', default='S=1,M=1,L=1', help="size weights (default: S=1,M=1,L=1)")
+    parser.add_argument('--carriers', default='LP=1,MR=1', help="carrier weights (default: LP=1,MR=1)")
+    parser.add_argument('--invalid', type=float, default=0.02, help="share of ignored lines")
+    parser.add_argument('--months', type=int, default=12, help="number of months to spread over")
+    parser.add_argument('--start', default='2015-01', help="first month, YYYY-MM")
+    parser.add_argument('--l-lp', type=float, default=0.0, help="share of lines forced to L LP")
+
+
+def workload_options(args):
+    year, month = args.start.split('-')
+    return {
+        'seed': args.seed,
+        'size_mix': parse_mix(args.sizes, PACKAGE_SIZES),
+        'carrier_mix': parse_mix(args.carriers, CARRIERS),
+        'invalid_share': args.invalid,
+        'months': args.months,
+        'start': (int(year), int(month)),
+        'l_lp_share': args.l_lp,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic transaction file.")
+    parser.add_argument('output')
+    parser.add_argument('rows', type=int)
+    add_workload_arguments(parser)
+    args = parser.parse_args()
+
+    write_workload(args.output, args.rows, **workload_options(args))
+
+
+if __name__ == "__main__":
+    main()
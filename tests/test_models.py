@@ -1,6 +1,13 @@
+import json
+import os
+import pickle
+import tempfile
 import unittest
 from datetime import datetime
+from vinted_shipping.models.price_table import PriceTable
 from vinted_shipping.models.transaction import Transaction
+from vinted_shipping.models.transaction_batch import TransactionBatch
+from vinted_shipping.utils.constants import SHIPPING_PRICES
 
 
 class TestTransaction(unittest.TestCase):
@@ -27,6 +34,10 @@ class TestTransaction(unittest.TestCase):
 
         self.assertFalse(transaction.is_valid)
 
+    def test_invalid_date_raises(self):
+        with self.assertRaises(ValueError):
+            Transaction("2015-02-29", "S", "MR", "2015-02-29 S MR")
+
     def test_date_object_creation(self):
         transaction = Transaction("2015-02-01", "S", "MR", "2015-02-01 S MR")
 
@@ -52,6 +63,89 @@ class TestTransaction(unittest.TestCase):
         expected_repr = "Transaction(2015-02-01, S, MR, base_price=2.00, discount=0.5)"
         self.assertEqual(repr(transaction), expected_repr)
 
+    def test_uses_slots(self):
+        transaction = Transaction("2015-02-01", "S", "MR", "2015-02-01 S MR")
+
+        self.assertFalse(hasattr(transaction, '__dict__'))
+
+
+class TestTransactionBatch(unittest.TestCase):
+    def setUp(self):
+        self.transactions = [
+            Transaction("2015-02-01", "S", "MR", "2015-02-01 S MR"),
+            Transaction("2015-03-31", "L", "LP", "2015-03-31   L LP"),
+            Transaction("2015-02-08", "XL", "DHL", "2015-02-08 XL DHL"),
+        ]
+        self.batch = TransactionBatch.from_transactions(self.transactions)
+
+    def test_rows_behave_like_transactions(self):
+        self.assertEqual(len(self.batch), 3)
+
+        for view, transaction in zip(self.batch, self.transactions):
+            self.assertEqual(view.is_valid, transaction.is_valid)
+            self.assertEqual(view.raw_line, transaction.raw_line)
+
+            if transaction.is_valid:
+                self.assertEqual(view.date, transaction.date)
+                self.assertEqual(view.package_size, transaction.package_size)
+                self.assertEqual(view.carrier, transaction.carrier)
+                self.assertEqual(view.year_month, transaction.year_month)
+                self.assertEqual(view.date_obj, transaction.date_obj)
+
+    def test_only_irregular_raw_lines_are_kept(self):
+        self.assertEqual(self.batch.raw_lines, {1: "2015-03-31   L LP", 2: "2015-02-08 XL DHL"})
+
+    def test_view_writes_through_to_columns(self):
+        view = self.batch[0]
+        view.base_price = 2.0
+
+        view.apply_discount(0.5)
+
+        self.assertEqual(self.batch.discounts[0], 0.5)
+        self.assertEqual(self.batch[0].final_price, 1.5)
+        self.assertEqual(repr(self.batch[0]), "Transaction(2015-02-01, S, MR, base_price=2.00, discount=0.5)")
+
+    def test_index_out_of_range(self):
+        with self.assertRaises(IndexError):
+            self.batch[3]
+
+
+class TestPriceTable(unittest.TestCase):
+    def setUp(self):
+        self.table = PriceTable(SHIPPING_PRICES)
+
+    def test_precomputed_prices(self):
+        self.assertEqual(self.table.price('MR', 'S'), 2.0)
+        self.assertEqual(self.table.flat_prices, (1.5, 4.9, 6.9, 2.0, 3.0, 4.0))
+        self.assertEqual(self.table.lowest_price('S'), 1.5)
+        self.assertEqual(self.table.lowest_price('L'), 4.0)
+
+    def test_immutable(self):
+        with self.assertRaises(AttributeError):
+            self.table.prices = {}
+        with self.assertRaises(TypeError):
+            self.table.prices[('MR', 'S')] = 0.0
+
+    def test_hashable_and_comparable(self):
+        same = PriceTable(SHIPPING_PRICES)
+        cheaper = PriceTable({'LP': {'S': 1.0, 'M': 4.9, 'L': 6.9}, 'MR': {'S': 2.0, 'M': 3.0, 'L': 4.0}})
+
+        self.assertEqual(self.table, same)
+        self.assertEqual(len({self.table, same, cheaper}), 2)
+        self.assertEqual(pickle.loads(pickle.dumps(self.table)), self.table)
+
+    def test_missing_price(self):
+        with self.assertRaises(ValueError):
+            PriceTable({'LP': {'S': 1.5}})
+
+    def test_from_file(self):
+        fd, path = tempfile.mkstemp(suffix='.json')
+        with os.fdopen(fd, 'w') as file:
+            json.dump(SHIPPING_PRICES, file)
+        self.addCleanup(os.remove, path)
+
+        self.assertEqual(PriceTable.from_file(path), self.table)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -1,8 +1,17 @@
+import random
 import unittest
+from collections import defaultdict
 from datetime import datetime
 from unittest.mock import patch, MagicMock
 
+from vinted_shipping.models.price_table import PriceTable
 from vinted_shipping.models.transaction import Transaction
+from vinted_shipping.rules import RULES, LowestSRule, ThirdLFreeRule, compile_rules
+from vinted_shipping.rules.base_rule import BaseRule
+from vinted_shipping.rules.dispatch import RuleDispatcher, InstrumentedRuleDispatcher
+from vinted_shipping.services.discount_service import calculate_discounts, iter_discounts
+from vinted_shipping.services.parser_service import parse_line
+from vinted_shipping.services.price_service import get_price_table, set_price_table
 from vinted_shipping.utils.constants import SHIPPING_PRICES
 
 
@@ -211,5 +220,118 @@ class TestRules(unittest.TestCase):
         self.assertEqual(self.monthly_discount_tracker["2015-02"], 0.50)
 
 
+class FlatBonusRule(BaseRule):
+    """Test rule without a compiler template: 0.30 off every M shipment while budget lasts."""
+
+    applies_to = None
+
+    def apply_rule(self, transaction, monthly_discount_tracker, l_lp_counter):
+        if transaction.package_size == 'M' and monthly_discount_tracker[transaction.year_month] < 10.0:
+            granted = min(0.3, 10.0 - monthly_discount_tracker[transaction.year_month])
+            transaction.apply_discount(granted)
+            monthly_discount_tracker[transaction.year_month] += granted
+
+
+class TestRuleCompiler(unittest.TestCase):
+
+    def random_lines(self, rng, count):
+        lines = []
+        for day in sorted(rng.randrange(90) for _ in range(count)):
+            date = datetime.fromordinal(datetime(2015, 1, 1).toordinal() + day).strftime('%Y-%m-%d')
+            size = rng.choice(('S', 'S', 'M', 'L', 'L', 'XL'))
+            lines.append(f"{date} {size} {rng.choice(('LP', 'MR', 'LP'))}")
+        return lines
+
+    def random_prices(self, rng):
+        prices = {carrier: {size: round(rng.uniform(0.5, 8.0), 2) for size in ('S', 'M', 'L')}
+                  for carrier in ('LP', 'MR')}
+        if rng.random() < 0.3:
+            prices['MR']['S'] = prices['LP']['S']
+        return prices
+
+    def price(self, lines, rules, plan=None):
+        tracker, counter = defaultdict(float), defaultdict(int)
+        dispatcher = plan if plan is not None else RuleDispatcher(rules)
+        transactions = iter_discounts((parse_line(line) for line in lines), dispatcher, tracker, counter)
+        results = [(t.is_valid, t.base_price, t.discount, t.final_price) for t in transactions]
+        return results, dict(tracker), dict(counter)
+
+    def test_compiled_plan_matches_interpreted_rules(self):
+        rng = random.Random(24)
+        rule_lists = [list(RULES), list(reversed(RULES)), [ThirdLFreeRule()],
+                      [LowestSRule(), FlatBonusRule(), ThirdLFreeRule()]]
+        current = get_price_table()
+        try:
+            for case in range(40):
+                price_table = PriceTable(SHIPPING_PRICES if case == 0 else self.random_prices(rng))
+                set_price_table(price_table)
+                rules = rule_lists[case % len(rule_lists)]
+                lines = self.random_lines(rng, rng.randrange(1, 400))
+                with self.subTest(case=case):
+                    plan = compile_rules(rules, price_table)
+                    self.assertEqual(self.price(lines, rules, plan), self.price(lines, rules))
+        finally:
+            set_price_table(current)
+
+    def test_plan_folds_constants_and_dispatch(self):
+        plan = compile_rules(RULES, PriceTable(SHIPPING_PRICES))
+
+        self.assertIn("applicable = min(0.5,", plan.source)
+        self.assertEqual(plan.source.count("# LowestSRule"), 1)
+        self.assertEqual(plan.source.count("# ThirdLFreeRule"), 1)
+        self.assertNotIn("apply_rule(", plan.source)
+        self.assertIs(compile_rules(RULES, PriceTable(SHIPPING_PRICES)), plan)
+
+    def test_plan_follows_price_table_swaps(self):
+        plan = compile_rules(RULES, PriceTable(SHIPPING_PRICES))
+        current = get_price_table()
+        try:
+            set_price_table(PriceTable({'LP': {'S': 1.0, 'M': 2.0, 'L': 3.0},
+                                        'MR': {'S': 1.2, 'M': 2.0, 'L': 3.0}}))
+            transaction, = iter_discounts([parse_line("2015-02-01 S MR")], plan)
+        finally:
+            set_price_table(current)
+
+        self.assertEqual(transaction.base_price, 1.2)
+        self.assertAlmostEqual(transaction.discount, 0.2)
+
+
+class TestRuleDispatcher(unittest.TestCase):
+    class EveryTransactionRule(BaseRule):
+        def apply_rule(self, transaction, monthly_discount_tracker, l_lp_counter):
+            pass
+
+    def test_dispatch_table(self):
+        dispatcher = RuleDispatcher(RULES)
+
+        self.assertEqual([type(r) for r in dispatcher.table[('S', 'MR')]], [LowestSRule])
+        self.assertEqual([type(r) for r in dispatcher.table[('L', 'LP')]], [ThirdLFreeRule])
+        self.assertEqual(dispatcher.table[('M', 'LP')], ())
+
+    def test_rules_without_keys_apply_everywhere_in_registration_order(self):
+        catch_all = self.EveryTransactionRule()
+        dispatcher = RuleDispatcher([catch_all, *RULES])
+
+        transaction = Transaction("2015-02-01", "S", "LP", "2015-02-01 S LP")
+
+        self.assertEqual(dispatcher.rules_for(transaction), (catch_all, RULES[0]))
+        self.assertEqual(dispatcher.table[('M', 'MR')], (catch_all,))
+
+    def test_instrumented_dispatcher_counts_calls_and_skips(self):
+        transactions = [
+            Transaction("2015-02-01", "S", "MR", "2015-02-01 S MR"),
+            Transaction("2015-02-02", "L", "LP", "2015-02-02 L LP"),
+            Transaction("2015-02-03", "M", "MR", "2015-02-03 M MR"),
+        ]
+        dispatcher = InstrumentedRuleDispatcher(RULES)
+
+        calculate_discounts(transactions, dispatcher)
+
+        self.assertEqual(dispatcher.report(), {
+            'LowestSRule': {'calls': 1, 'skipped': 2},
+            'ThirdLFreeRule': {'calls': 1, 'skipped': 2},
+        })
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,97 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+from vinted_shipping import server
+from vinted_shipping.server import PricingServer
+from vinted_shipping.services.price_service import get_price_table, set_price_table
+from vinted_shipping.utils.constants import SHIPPING_PRICES
+
+
+class TestPricingServer(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.pricing_server = PricingServer()
+        self.server = await self.pricing_server.start(port=0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def send(self, payload):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        writer.write(payload if isinstance(payload, bytes) else payload.encode())
+        writer.write_eof()
+        response = await reader.read()
+        writer.close()
+        await writer.wait_closed()
+        return response.decode().splitlines()
+
+    async def test_prices_pipelined_lines(self):
+        response = await self.send("2015-02-01 S MR\n\n2015-02-29 CUSPS\n2015-02-02 L LP")
+
+        self.assertEqual(response, [
+            "2015-02-01 S MR 1.50 0.50",
+            "2015-02-29 CUSPS Ignored",
+            "2015-02-02 L LP 6.90 -",
+        ])
+
+    async def test_lines_are_split_like_the_file_reader(self):
+        response = await self.send(b"2015-02-01 S MR\r\n2015-02-01\x1cS MR\n\xff\xfe S MR\n2015-02-02 S MR")
+
+        self.assertEqual(response, [
+            "2015-02-01 S MR 1.50 0.50",
+            "2015-02-01 S MR 1.50 0.50",
+            "\ufffd\ufffd S MR Ignored",
+            "2015-02-02 S MR 1.50 0.50",
+        ])
+
+    async def test_disconnects_overlong_lines(self):
+        with unittest.mock.patch.object(server, 'MAX_PENDING', 10):
+            response = await self.send("2015-02-01 S MR\n" + "x" * 1000)
+
+        self.assertEqual(response, ["2015-02-01 S MR 1.50 0.50"])
+
+    async def test_reloads_changed_price_file(self):
+        self.addCleanup(set_price_table, get_price_table())
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'prices.json')
+        with open(path, 'w') as file:
+            json.dump(SHIPPING_PRICES, file)
+        self.pricing_server.price_file = path
+
+        before = await self.send("2015-02-01 M MR\n")
+        with open(path, 'w') as file:
+            json.dump({'LP': {'S': 1.5, 'M': 4.9, 'L': 6.9}, 'MR': {'S': 2.0, 'M': 3.5, 'L': 4.0}}, file)
+        os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+        after = await self.send("2015-02-02 M MR\n")
+        with open(path, 'w') as file:
+            file.write("{")
+        kept = await self.send("2015-02-03 M MR\n")
+
+        self.assertEqual(before, ["2015-02-01 M MR 3.00 -"])
+        self.assertEqual(after, ["2015-02-02 M MR 3.50 -"])
+        self.assertEqual(kept, ["2015-02-03 M MR 3.50 -"])
+
+    async def test_state_is_shared_across_connections(self):
+        await self.send("2015-02-01 L LP\n2015-02-02 L LP\n")
+        response = await self.send("2015-02-03 L LP\n2015-03-01 L LP\n")
+
+        self.assertEqual(response, ["2015-02-03 L LP 0.00 6.90", "2015-03-01 L LP 6.90 -"])
+        self.assertAlmostEqual(self.pricing_server.monthly_discount_tracker['2015-02'], 6.9)
+
+    async def test_concurrent_connections(self):
+        responses = await asyncio.gather(*(self.send("2015-04-01 S MR\n" * 5) for _ in range(4)))
+
+        discounted = [line for response in responses for line in response if line.endswith("0.50")]
+        self.assertEqual(len(discounted), 20)
+        self.assertAlmostEqual(self.pricing_server.monthly_discount_tracker['2015-04'], 10.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
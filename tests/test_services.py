@@ -1,13 +1,53 @@
+import bz2
+import gzip
+import io
+import json
+import lzma
+import os
+import random
+import socket
+import tempfile
+import threading
 import unittest
 from unittest.mock import patch, mock_open, MagicMock
 from datetime import datetime
 from collections import defaultdict
 
+from vinted_shipping import rules
 from vinted_shipping.models.transaction import Transaction
-from vinted_shipping.services.parser_service import parse_input_file
-from vinted_shipping.services.discount_service import calculate_discounts
-from vinted_shipping.services.price_service import get_base_price, get_lowest_s_price
-from vinted_shipping.services.print_service import print_transactions
+from vinted_shipping.services.parser_service import (
+    parse_input_file, iter_input_file, parse_input_batch, parse_line
+)
+from vinted_shipping.services.discount_service import calculate_discounts, iter_discounts
+from vinted_shipping.services.parallel_discount_service import calculate_discounts_parallel
+from vinted_shipping.services import vectorized_discount_service
+from vinted_shipping.services.vectorized_discount_service import calculate_discounts_vectorized
+from vinted_shipping.models.transaction_batch import TransactionBatch
+from vinted_shipping.services.price_service import (
+    get_base_price, get_lowest_s_price, get_price_table, set_price_table, load_price_file
+)
+from vinted_shipping.models.price_table import PriceTable
+from vinted_shipping.services.print_service import print_transactions, format_transaction
+from vinted_shipping.services.batch_service import collect_inputs, process_files
+from vinted_shipping.services import compression_service
+from vinted_shipping.services.compression_service import ReadAheadReader, detect_compression
+from vinted_shipping.services.checkpoint_service import iter_incremental, load_checkpoint
+from vinted_shipping.services.engine_service import PricingEngine
+from vinted_shipping.services.index_service import build_index, ensure_index, iter_range, load_index
+from vinted_shipping.services.output_service import write_transactions, BINARY_RECORD
+from vinted_shipping.services import parallel_parser_service, parse_cache_service, sort_service
+from vinted_shipping.services.parallel_parser_service import parse_input_parallel, split_ranges
+from vinted_shipping.services.parse_cache_service import (
+    PARSE_CACHE_SUFFIX, _layout, parse_cached, read_header
+)
+from vinted_shipping.services.result_cache_service import ResultCache, package_fingerprint
+from vinted_shipping.services.scenario_service import Scenario, evaluate_scenarios
+from vinted_shipping.services.sort_service import iter_sorted_transactions
+from vinted_shipping.services.state_service import (
+    ClosedMonthError, DiscountState, InMemoryDiscountState, SqliteDiscountState
+)
+from vinted_shipping.services.summary_service import MonthlySummary
+from vinted_shipping.services.stats_service import PipelineStats
 from vinted_shipping.utils.constants import SHIPPING_PRICES
 
 
@@ -38,6 +78,504 @@ class TestParserService(unittest.TestCase):
         self.assertEqual(len(transactions), 1)
         self.assertFalse(transactions[0].is_valid)
 
+    @patch("builtins.open", new_callable=mock_open,
+           read_data="2015-02-29 S MR\n2015-2-1 S MR\n2015-02-08 XL DHL\n")
+    def test_parse_date_edge_cases(self, mock_file):
+        transactions = parse_input_file("dummy/path")
+
+        self.assertFalse(transactions[0].is_valid)
+        self.assertEqual(transactions[0].raw_line, "2015-02-29 S MR")
+
+        self.assertTrue(transactions[1].is_valid)
+        self.assertEqual(transactions[1].date, "2015-2-1")
+        self.assertEqual(transactions[1].year_month, "2015-02")
+
+        self.assertFalse(transactions[2].is_valid)
+        self.assertEqual(transactions[2].date, "2015-02-08")
+
+    @patch("builtins.open", new_callable=mock_open, read_data="2015-02-01 S MR\n\n2015-02-03 INVALID\n")
+    def test_iter_input_file_is_lazy(self, mock_file):
+        transactions = iter_input_file("dummy/path")
+
+        mock_file.assert_not_called()
+
+        first = next(transactions)
+        self.assertEqual(first.date, "2015-02-01")
+        self.assertTrue(first.is_valid)
+
+        second = next(transactions)
+        self.assertFalse(second.is_valid)
+        self.assertEqual(second.raw_line, "2015-02-03 INVALID")
+
+        with self.assertRaises(StopIteration):
+            next(transactions)
+
+    @patch("builtins.open", new_callable=mock_open, read_data="2015-02-01 S MR\n2015-02-03 INVALID\n")
+    def test_parse_input_batch(self, mock_file):
+        batch = parse_input_batch("dummy/path")
+
+        self.assertEqual(len(batch), 2)
+        self.assertTrue(batch[0].is_valid)
+        self.assertEqual(batch[0].year_month, "2015-02")
+        self.assertFalse(batch[1].is_valid)
+        self.assertEqual(batch[1].raw_line, "2015-02-03 INVALID")
+
+
+def _parse_range_failing_at_end(file_path, start, end):
+    # Module level so the forked workers can unpickle it.
+    if end == os.path.getsize(file_path):
+        raise OSError("worker failed")
+    return _real_parse_range(file_path, start, end)
+
+
+_real_parse_range = parallel_parser_service._parse_range
+
+
+class TestParallelParserService(unittest.TestCase):
+
+    def parse_both(self, content):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'input.txt')
+            with open(path, 'wb') as file:
+                file.write(content)
+
+            with patch.object(parallel_parser_service, 'MIN_CHUNK_SIZE', 64):
+                parallel = parse_input_parallel(path, workers=3)
+            expected = parse_input_batch(path)
+
+        for column in ('ordinals', 'size_codes', 'carrier_codes'):
+            self.assertEqual(list(getattr(parallel, column)), list(getattr(expected, column)))
+        self.assertEqual(parallel.raw_lines, expected.raw_lines)
+        return parallel
+
+    def test_split_ranges_end_after_newlines(self):
+        buffer = b"2015-02-01 S MR\n" * 10 + b"2015-02-02 L LP"
+
+        ranges = split_ranges(buffer, 4)
+
+        self.assertEqual(ranges[0][0], 0)
+        self.assertEqual(ranges[-1][1], len(buffer))
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, start)
+            self.assertEqual(buffer[end - 1:end], b"\n")
+
+    def test_matches_sequential_parser(self):
+        content = (b"2015-02-01 S MR\r\n\r\n2015-02-29 CUSPS\n  \n2015-02-03\tL  LP\n" * 20
+                   + b"2015-02-04 M MR")
+
+        batch = self.parse_both(content)
+
+        self.assertEqual(len(batch), 61)
+        self.assertEqual(batch[-1].raw_line, "2015-02-04 M MR")
+
+    def test_falls_back_to_text_mode(self):
+        content = b"2015-02-01 S MR\n" * 20 + "2015-02-02 Ś MR\n".encode('utf-8') + b"2015-02-03 L\rLP\n" * 5
+
+        batch = self.parse_both(content)
+
+        self.assertEqual(len(batch), 31)
+
+    @unittest.skipUnless(os.path.isdir('/dev/shm'), "needs /dev/shm to observe shared memory")
+    def test_failed_worker_releases_shared_memory(self):
+        before = set(os.listdir('/dev/shm'))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'input.txt')
+            with open(path, 'wb') as file:
+                file.write(b"2015-02-01 S MR\n" * 40)
+
+            with patch.object(parallel_parser_service, 'MIN_CHUNK_SIZE', 64), \
+                    patch.object(parallel_parser_service, '_parse_range', _parse_range_failing_at_end):
+                with self.assertRaisesRegex(OSError, "worker failed"):
+                    parse_input_parallel(path, workers=3)
+
+        self.assertEqual(set(os.listdir('/dev/shm')) - before, set())
+
+
+class TestCompressionService(unittest.TestCase):
+
+    CONTENT = (b"2015-02-01 S MR\r\n2015-02-02 L LP\n\n2015-02-29 CUSPS\n" * 50
+               + b"2015-03-01 L LP")
+
+    def parse_compressed(self, module, suffix):
+        with tempfile.TemporaryDirectory() as directory:
+            plain = os.path.join(directory, 'input.txt')
+            with open(plain, 'wb') as file:
+                file.write(self.CONTENT)
+            path = os.path.join(directory, 'input' + suffix)
+            with module.open(path, 'wb') as file:
+                file.write(self.CONTENT)
+
+            self.assertEqual(detect_compression(path), suffix.lstrip('.'))
+            self.assertIsNone(detect_compression(plain))
+            expected = [t.raw_line for t in parse_input_file(plain)]
+            with patch.object(compression_service, 'READ_AHEAD_CHUNK_SIZE', 16):
+                streamed = [t.raw_line for t in parse_input_file(path)]
+            batch = parse_input_batch(path)
+
+        self.assertEqual(streamed, expected)
+        self.assertEqual([t.raw_line for t in batch], expected)
+
+    def test_gzip(self):
+        self.parse_compressed(gzip, '.gzip')
+
+    def test_bz2(self):
+        self.parse_compressed(bz2, '.bz2')
+
+    def test_xz(self):
+        self.parse_compressed(lzma, '.xz')
+
+    def test_read_ahead_errors_surface_on_read(self):
+        with tempfile.NamedTemporaryFile(suffix='.gz', delete=False) as file:
+            file.write(gzip.compress(self.CONTENT)[:-20])
+        try:
+            with self.assertRaises(EOFError):
+                list(iter_input_file(file.name))
+        finally:
+            os.unlink(file.name)
+
+    def test_text_starting_like_a_header_stays_text(self):
+        for head in (b"BZh", b"BZh9 S MR", b"BZh01AY&SY"):
+            with self.subTest(head=head):
+                with tempfile.NamedTemporaryFile(suffix='.txt', delete=False) as file:
+                    file.write(head + b"\n2015-02-01 S MR\n")
+                try:
+                    self.assertIsNone(detect_compression(file.name))
+                    transactions = parse_input_file(file.name)
+                finally:
+                    os.unlink(file.name)
+
+                self.assertEqual(len(transactions), 2)
+                self.assertFalse(transactions[0].is_valid)
+                self.assertTrue(transactions[1].is_valid)
+
+    def test_empty_bz2_stream(self):
+        with tempfile.NamedTemporaryFile(suffix='.bz2', delete=False) as file:
+            file.write(bz2.compress(b""))
+        try:
+            self.assertEqual(detect_compression(file.name), 'bz2')
+            self.assertEqual(parse_input_file(file.name), [])
+        finally:
+            os.unlink(file.name)
+
+    def test_close_stops_read_ahead(self):
+        stream = io.BytesIO(self.CONTENT * 100)
+        reader = ReadAheadReader(stream, chunk_size=16, depth=2)
+
+        self.assertEqual(reader.read(4), b"2015")
+        reader.close()
+
+        self.assertTrue(stream.closed)
+        self.assertFalse(reader._thread.is_alive())
+
+
+class TestResultCacheService(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(os.path.join(self.directory.name, 'cache'))
+        self.input_path = os.path.join(self.directory.name, 'input.txt')
+        with open(self.input_path, 'w') as file:
+            file.write("2015-02-01 S MR\n2015-02-02 L LP\n2015-02-29 CUSPS\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_replays_stored_output(self):
+        key = self.cache.key(self.input_path)
+        self.assertFalse(self.cache.replay(key, io.StringIO()))
+
+        written = io.StringIO()
+        self.cache.write(key, iter_discounts(iter_input_file(self.input_path)), written)
+        replayed = io.StringIO()
+
+        self.assertTrue(self.cache.replay(key, replayed))
+        self.assertEqual(replayed.getvalue(), written.getvalue())
+        self.assertIn("2015-02-29 CUSPS Ignored", replayed.getvalue())
+
+    def test_replays_binary_output(self):
+        key = self.cache.key(self.input_path, 'binary')
+        written, replayed = io.BytesIO(), io.BytesIO()
+        self.cache.write(key, iter_discounts(iter_input_file(self.input_path)), written, 'binary')
+
+        self.assertTrue(self.cache.replay(key, replayed, 'binary'))
+        self.assertEqual(replayed.getvalue(), written.getvalue())
+        self.assertEqual(len(written.getvalue()), 3 * BINARY_RECORD.size)
+
+    def test_key_covers_input_prices_rules_and_options(self):
+        key = self.cache.key(self.input_path)
+
+        self.assertEqual(self.cache.key(self.input_path), key)
+        self.assertNotEqual(self.cache.key(self.input_path, 'csv'), key)
+        self.assertNotEqual(self.cache.key(self.input_path, sort=True), key)
+
+        current = get_price_table()
+        try:
+            set_price_table(PriceTable({'LP': {'S': 1.5, 'M': 4.9, 'L': 6.9},
+                                        'MR': {'S': 2.0, 'M': 3.0, 'L': 5.0}}))
+            self.assertNotEqual(self.cache.key(self.input_path), key)
+        finally:
+            set_price_table(current)
+
+        with patch('vinted_shipping.rules.RULES', rules.RULES[:1]):
+            self.assertNotEqual(self.cache.key(self.input_path), key)
+
+        with open(self.input_path, 'a') as file:
+            file.write("2015-02-03 S MR\n")
+        self.assertNotEqual(self.cache.key(self.input_path), key)
+
+    def test_does_not_store_outputs_larger_than_the_cache(self):
+        self.cache.max_bytes = 40
+        key = self.cache.key(self.input_path)
+        written = io.StringIO()
+        self.cache.write(key, iter_discounts(iter_input_file(self.input_path)), written)
+
+        self.assertIn("2015-02-29 CUSPS Ignored", written.getvalue())
+        self.assertFalse(self.cache.replay(key, io.StringIO()))
+        self.assertEqual(os.listdir(self.cache.directory), [])
+
+    def test_package_fingerprint_covers_pipeline_modules(self):
+        with patch('builtins.open', mock_open(read_data=b"changed")):
+            package_fingerprint.cache_clear()
+            try:
+                changed = package_fingerprint()
+            finally:
+                package_fingerprint.cache_clear()
+
+        self.assertNotEqual(package_fingerprint(), changed)
+
+    def test_evicts_least_recently_used(self):
+        self.cache.max_bytes = 2 * 1000
+        for number, key in enumerate(('a', 'b', 'c')):
+            with open(self.cache.path_for(key), 'wb') as file:
+                file.write(bytes(1000))
+            os.utime(self.cache.path_for(key), ns=(number * 10**9, number * 10**9))
+        self.cache.replay('a', io.BytesIO(), 'binary')
+
+        self.cache.evict()
+
+        remaining = sorted(name for name in os.listdir(self.cache.directory))
+        self.assertEqual(remaining, ['a.out', 'c.out'])
+
+
+class TestIndexService(unittest.TestCase):
+
+    LINES = ["2015-01-30 L LP", "2015-01-31 L LP", "2015-02-01 L LP", "2015-02-01 S MR", "garbage",
+             "2015-02-10 L LP", "2015-02-11 L LP", "2015-02-12 S MR", "", "2015-03-01 L LP",
+             "2015-03-02 S LP", "2015-03-02 XL LP", "2015-04-05 M MR"]
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'input.txt')
+        with open(self.path, 'w') as file:
+            file.write('\r\n'.join(self.LINES) + '\n')
+        self.full = [format_transaction(t) for t in iter_discounts(iter_input_file(self.path))]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_index_maps_months_and_days(self):
+        index = build_index(self.path)
+
+        self.assertTrue(index['ordered'])
+        self.assertEqual(list(index['months']), ['2015-01', '2015-02', '2015-03', '2015-04'])
+        self.assertEqual(index['months']['2015-02'], [34, 3])
+        self.assertEqual(index['days']['2015-03-01'][1], 10)
+
+    def test_ranges_match_full_run(self):
+        cases = {
+            ('2015-02', '2015-02'): self.full[2:8],
+            ('2015-02-11', '2015-03-01'): self.full[6:9],
+            (None, '2015-01-31'): self.full[:2],
+            ('2015-03-02', None): self.full[9:],
+            ('2015-05', None): [],
+        }
+        for (first, last), expected in cases.items():
+            with self.subTest(first=first, last=last):
+                got = [format_transaction(t) for t in iter_range(self.path, first, last)]
+                self.assertEqual(got, expected)
+
+    def test_index_is_rebuilt_when_the_file_changes(self):
+        ensure_index(self.path)
+        self.assertIsNotNone(load_index(self.path))
+
+        with open(self.path, 'a') as file:
+            file.write("2015-04-06 S MR\n")
+
+        self.assertIsNone(load_index(self.path))
+        self.assertEqual(len(list(iter_range(self.path, '2015-04'))), 2)
+
+    def test_unordered_input_is_rejected(self):
+        with open(self.path, 'a') as file:
+            file.write("2015-01-01 S MR\n")
+
+        with self.assertRaises(ValueError):
+            list(iter_range(self.path, '2015-02'))
+
+
+class TestSummaryService(unittest.TestCase):
+
+    LINES = ["2015-02-01 S MR", "2015-02-02 L LP", "2015-02-03 L LP", "2015-02-04 L LP", "bad line",
+             "2015-02-05 S MR", "2015-03-01 L LP", "2015-03-02 M MR", "2015-03-03 S LP"]
+
+    def summarize(self, lines):
+        summary = MonthlySummary()
+        for _ in summary.iter_record(iter_discounts(parse_line(line) for line in lines)):
+            pass
+        return summary
+
+    def test_aggregates_per_month(self):
+        report = self.summarize(self.LINES).report()
+
+        self.assertEqual(list(report), ['2015-02', '2015-03'])
+        february = report['2015-02']
+        self.assertEqual(february['shipments'], 5)
+        self.assertEqual(february['by_carrier_size']['LP L'], 3)
+        self.assertEqual(february['third_l_free'], 1)
+        self.assertAlmostEqual(february['discount'], 7.9)
+        self.assertAlmostEqual(february['cap_remaining'], 2.1)
+        self.assertEqual(report['2015-03']['shipments'], 3)
+        self.assertEqual(list(self.summarize(self.LINES).report('2015-03')), ['2015-03'])
+
+    def test_month_partitions_merge_into_the_full_summary(self):
+        february = self.summarize(self.LINES[:6])
+        march = self.summarize(self.LINES[6:])
+
+        merged = MonthlySummary().merge(february).merge(march)
+
+        self.assertEqual(merged.to_dict(), self.summarize(self.LINES).to_dict())
+        self.assertEqual(merged.ignored, 1)
+
+    def test_round_trip_through_file(self):
+        summary = self.summarize(self.LINES)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'input.summary')
+            summary.save(path)
+            loaded = MonthlySummary.load(path)
+
+        self.assertEqual(loaded.to_dict(), summary.to_dict())
+
+    def test_incremental_runs_cover_the_whole_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'input.txt')
+            checkpoint_path = path + '.checkpoint'
+            with open(path, 'w') as file:
+                file.write('\n'.join(self.LINES[:4]) + '\n')
+            list(iter_incremental(path, checkpoint_path, summary=MonthlySummary()))
+
+            with open(path, 'a') as file:
+                file.write('\n'.join(self.LINES[4:]) + '\n')
+            summary = MonthlySummary()
+            list(iter_incremental(path, checkpoint_path, summary=summary))
+
+        self.assertEqual(summary.to_dict(), self.summarize(self.LINES).to_dict())
+
+
+class TestEngineService(unittest.TestCase):
+
+    def lines(self, months, per_month):
+        sizes = ('S', 'M', 'L')
+        carriers = ('MR', 'LP')
+        return [f"2015-{month:02d}-{1 + i % 28:02d} {sizes[i % 3]} {carriers[i // 3 % 2]}"
+                for month in months for i in range(per_month)]
+
+    def test_concurrent_partitions_match_sequential_run(self):
+        partitions = [self.lines(range(start, 13, 4), 60) + ["garbage"] for start in range(1, 5)]
+        expected = {line: format_transaction(t) for line, t in
+                    zip(sum(partitions, []), calculate_discounts([parse_line(line) for part in partitions
+                                                                  for line in part]))}
+
+        for dispatcher in (None, rules.compile_rules()):
+            with self.subTest(compiled=dispatcher is not None):
+                engine = PricingEngine(dispatcher, stripes=2)
+                results = {}
+
+                def consume(part):
+                    for start in range(0, len(part), 7):
+                        batch = [parse_line(line) for line in part[start:start + 7]]
+                        for line, transaction in zip(part[start:], engine.submit_many(batch)):
+                            results[line] = format_transaction(transaction)
+
+                threads = [threading.Thread(target=consume, args=(part,)) for part in partitions]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+
+                self.assertEqual(results, expected)
+
+    def test_one_month_from_many_threads_keeps_the_cap(self):
+        engine = PricingEngine()
+        transactions = [[parse_line("2015-02-01 S MR") for _ in range(200)] for _ in range(8)]
+
+        threads = [threading.Thread(target=lambda part: [engine.submit(t) for t in part], args=(part,))
+                   for part in transactions]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        discounted = [t for part in transactions for t in part if t.discount > 0]
+        self.assertEqual(len(discounted), 20)
+        self.assertEqual(engine.monthly_discount_tracker['2015-02'], 10.0)
+
+    def test_invalid_transactions_pass_through(self):
+        engine = PricingEngine()
+
+        transaction = engine.submit(parse_line("2015-02-29 CUSPS"))
+
+        self.assertFalse(transaction.is_valid)
+        self.assertEqual(dict(engine.monthly_discount_tracker), {})
+
+
+class TestMappedParser(unittest.TestCase):
+
+    SAMPLES = {
+        'plain': b"2015-02-01 S MR\n2015-02-02 M LP\n2015-02-29 CUSPS\n",
+        'crlf_no_trailing_newline': b"2015-02-01 S MR\r\n\r\n2015-02-02 L LP\r\n2015-02-03 L LP",
+        'irregular_spacing': b"  2015-02-01\tS  MR \n2015-2-3 S MR\n2015-02-04 XL MR\n\n",
+        'non_ascii': "2015-02-01 S MR\n2015-02-02 S MR \nÜ 2015\n".encode('utf-8'),
+        'lone_carriage_return': b"2015-02-01 S MR\r2015-02-02 S MR\n",
+        'separator_whitespace': b"2015-02-01\x1cS MR\n",
+    }
+
+    def write(self, data):
+        fd, path = tempfile.mkstemp(suffix='.txt')
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_batch_matches_text_reader(self):
+        for name, data in self.SAMPLES.items():
+            with self.subTest(sample=name):
+                path = self.write(data)
+
+                expected = parse_input_file(path)
+                batch = parse_input_batch(path)
+
+                self.assertEqual(len(batch), len(expected))
+                for view, transaction in zip(batch, expected):
+                    self.assertEqual(view.is_valid, transaction.is_valid)
+                    self.assertEqual(view.raw_line, transaction.raw_line)
+                    if transaction.is_valid:
+                        self.assertEqual((view.date, view.package_size, view.carrier, view.year_month),
+                                         (transaction.date, transaction.package_size,
+                                          transaction.carrier, transaction.year_month))
+
+    def test_regular_lines_are_not_materialized(self):
+        batch = parse_input_batch(self.write(self.SAMPLES['crlf_no_trailing_newline']))
+
+        self.assertEqual(batch.raw_lines, {})
+
+    def test_empty_file(self):
+        self.assertEqual(len(parse_input_batch(self.write(b""))), 0)
+
+    def test_reads_stdin(self):
+        with patch("sys.stdin", io.StringIO("2015-02-01 S MR\nbad\n")):
+            transactions = parse_input_file("-")
+
+        self.assertEqual([t.is_valid for t in transactions], [True, False])
+
 
 class TestPriceService(unittest.TestCase):
 
@@ -61,6 +599,37 @@ class TestPriceService(unittest.TestCase):
         self.assertEqual(get_lowest_s_price(), lowest_s)
         self.assertEqual(get_lowest_s_price(), 1.50)
 
+    def test_swap_price_table(self):
+        original = get_price_table()
+        self.addCleanup(set_price_table, original)
+
+        set_price_table(PriceTable({'LP': {'S': 1.0, 'M': 4.9, 'L': 6.9},
+                                    'MR': {'S': 2.0, 'M': 3.0, 'L': 4.0}}))
+        transaction = Transaction("2015-02-01", "S", "LP", "2015-02-01 S LP")
+
+        self.assertEqual(get_base_price(transaction), 1.0)
+        self.assertEqual(get_lowest_s_price(), 1.0)
+
+    def test_load_price_file_reloads_on_change(self):
+        original = get_price_table()
+        self.addCleanup(set_price_table, original)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'prices.json')
+            with open(path, 'w') as file:
+                json.dump(SHIPPING_PRICES, file)
+
+            table = load_price_file(path)
+            self.assertIs(load_price_file(path), table)
+
+            with open(path, 'w') as file:
+                json.dump({'LP': {'S': 1.25, 'M': 4.9, 'L': 6.9},
+                           'MR': {'S': 2.0, 'M': 3.0, 'L': 4.0}}, file)
+            os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+
+            self.assertEqual(load_price_file(path).lowest_price('S'), 1.25)
+            self.assertEqual(get_lowest_s_price(), 1.25)
+
 
 class TestDiscountService(unittest.TestCase):
 
@@ -128,6 +697,413 @@ class TestDiscountService(unittest.TestCase):
             self.assertEqual(processed[i].discount, 0.0)
             self.assertEqual(processed[i].final_price, 2.0)
 
+    def test_iter_discounts_yields_in_input_order(self):
+        processed = iter_discounts(iter(self.transactions))
+
+        first = next(processed)
+        self.assertIs(first, self.transactions[0])
+        self.assertEqual(first.discount, 0.5)
+        self.assertEqual(self.transactions[1].final_price, 0.0)
+
+        rest = list(processed)
+        self.assertEqual(rest, self.transactions[1:])
+        self.assertEqual(rest[3].discount, 6.9)
+
+
+class TestStatsService(unittest.TestCase):
+
+    def make_transactions(self):
+        lines = ["2015-02-01 S MR"] * 21 + ["2015-03-01 L LP"] * 3 + ["2015-03-02 M MR", "bad line"]
+        return [parse_line(line) for line in lines]
+
+    def test_hooks_do_not_change_results(self):
+        expected = calculate_discounts(self.make_transactions())
+        instrumented = calculate_discounts(self.make_transactions(), hooks=PipelineStats())
+
+        self.assertEqual([format_transaction(t) for t in instrumented],
+                         [format_transaction(t) for t in expected])
+
+    def test_counts_rule_calls_discounts_and_cap(self):
+        stats = PipelineStats()
+        calculate_discounts(self.make_transactions(), hooks=stats)
+
+        report = stats.report()
+        self.assertEqual(report['rules']['LowestSRule'], {'calls': 20, 'discounts': 20, 'amount': 10.0})
+        self.assertEqual(report['rules']['ThirdLFreeRule'], {'calls': 3, 'discounts': 1, 'amount': 6.9})
+        self.assertEqual(report['cap_short_circuits'], 1)
+
+    def test_stage_times_are_exclusive(self):
+        stats = PipelineStats()
+        parsed = stats.iter_stage('parse', self.make_transactions())
+        processed = stats.iter_stage('discount', iter_discounts(parsed, hooks=stats))
+
+        with stats.stage('output'):
+            output = [format_transaction(t) for t in processed]
+
+        report = stats.report()
+        self.assertEqual(len(output), 26)
+        self.assertEqual(report['lines'], 26)
+        self.assertEqual(list(report['stages']), ['parse', 'discount', 'output'])
+        self.assertAlmostEqual(report['wall_time'],
+                               sum(stage['wall_time'] for stage in report['stages'].values()))
+        self.assertTrue(all(stage['wall_time'] >= 0 for stage in report['stages'].values()))
+        self.assertIn('monthly cap short-circuits: 1', stats.format_report())
+        self.assertEqual(json.loads(stats.format_report('json'))['lines'], 26)
+
+
+class TestParallelDiscountService(unittest.TestCase):
+
+    def make_transactions(self):
+        transactions = []
+        for month in (1, 2, 3):
+            for day in range(1, 29):
+                for size, carrier in (("S", "MR"), ("L", "LP"), ("M", "LP")):
+                    date = f"2015-{month:02d}-{day:02d}"
+                    transactions.append(Transaction(date, size, carrier, f"{date} {size} {carrier}"))
+        transactions.insert(5, Transaction("2015-02-08", "XL", "DHL", "2015-02-08 XL DHL"))
+        return transactions
+
+    def test_matches_sequential_engine(self):
+        expected = calculate_discounts(self.make_transactions())
+
+        processed = calculate_discounts_parallel(self.make_transactions(), workers=2)
+
+        self.assertEqual(
+            [(t.is_valid, t.base_price, t.discount, t.final_price) for t in processed],
+            [(t.is_valid, t.base_price, t.discount, t.final_price) for t in expected])
+
+    def test_single_worker_runs_sequentially(self):
+        transactions = self.make_transactions()
+
+        with patch("vinted_shipping.services.parallel_discount_service.pricing_pool") as pool:
+            processed = calculate_discounts_parallel(transactions, workers=1)
+
+        pool.assert_not_called()
+        self.assertIs(processed, transactions)
+
+
+@unittest.skipIf(vectorized_discount_service.np is None, "numpy is not installed")
+class TestVectorizedDiscountService(unittest.TestCase):
+
+    def random_transactions(self, rng, count):
+        transactions = []
+        for _ in range(count):
+            if rng.random() < 0.05:
+                transactions.append(Transaction("", "", "", "junk line"))
+                transactions[-1].is_valid = False
+                continue
+            date = f"2015-{rng.randint(1, 3):02d}-{rng.randint(1, 28):02d}"
+            size = rng.choice("SSSML")
+            carrier = rng.choice(("LP", "MR"))
+            transactions.append(Transaction(date, size, carrier, f"{date} {size} {carrier}"))
+        return transactions
+
+    def test_matches_reference_engine_on_random_inputs(self):
+        rng = random.Random(42)
+
+        for trial in range(200):
+            transactions = self.random_transactions(rng, rng.randint(0, 150))
+            batch = TransactionBatch.from_transactions(transactions)
+
+            expected = calculate_discounts(transactions)
+            processed = calculate_discounts_vectorized(batch)
+
+            with self.subTest(trial=trial):
+                self.assertEqual(
+                    [(t.base_price, t.discount, t.final_price) for t in processed],
+                    [(t.base_price, t.discount, t.final_price) for t in expected])
+
+    def test_monthly_cap(self):
+        transactions = [Transaction("2015-02-01", "S", "MR", "2015-02-01 S MR") for _ in range(30)]
+
+        processed = calculate_discounts_vectorized(TransactionBatch.from_transactions(transactions))
+
+        self.assertEqual(sum(processed.discounts), 10.0)
+        self.assertEqual(processed[19].discount, 0.5)
+        self.assertEqual(processed[20].discount, 0.0)
+        self.assertEqual(processed[20].final_price, 2.0)
+
+
+class TestBatchService(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.root = self.directory.name
+
+        self.contents = {
+            'large.txt': "2015-02-01 S MR\n" * 30 + "2015-02-02 L LP\n",
+            'small.txt': "2015-03-01 L LP\nbad line\n",
+        }
+        for name, content in self.contents.items():
+            with open(os.path.join(self.root, name), 'w') as file:
+                file.write(content)
+
+    def expected_output(self, name):
+        transactions = calculate_discounts(parse_input_file(os.path.join(self.root, name)))
+        return ''.join(f"{format_transaction(t)}\n" for t in transactions)
+
+    def test_collect_inputs(self):
+        large, small = (os.path.join(self.root, name) for name in ('large.txt', 'small.txt'))
+        for suffix in ('.out', '.parsed', '.index', '.checkpoint', '.summary'):
+            open(os.path.join(self.root, 'small.txt' + suffix), 'w').close()
+        with open(os.path.join(self.root, 'manifest'), 'w') as file:
+            file.write("# regions\nsmall.txt\n\nlarge.txt\n")
+
+        self.assertEqual(collect_inputs(self.root), [large, os.path.join(self.root, 'manifest'), small])
+        self.assertEqual(collect_inputs(os.path.join(self.root, '*.txt')), [large, small])
+        self.assertEqual(collect_inputs(os.path.join(self.root, 'manifest')), [small, large])
+
+    def test_process_files_isolates_failures(self):
+        paths = [os.path.join(self.root, name) for name in ('small.txt', 'missing.txt', 'large.txt')]
+        output_dir = os.path.join(self.root, 'out')
+
+        results = {os.path.basename(r.input_path): r for r in process_files(paths, output_dir, workers=2)}
+
+        self.assertIsInstance(results['missing.txt'].error, FileNotFoundError)
+        self.assertFalse(os.path.exists(os.path.join(output_dir, 'missing.txt.out')))
+        self.assertEqual(sorted(os.listdir(output_dir)), ['large.txt.out', 'small.txt.out'])
+
+        for name in self.contents:
+            self.assertIsNone(results[name].error)
+            self.assertEqual(results[name].lines, len(self.contents[name].splitlines()))
+            with open(results[name].output_path) as file:
+                self.assertEqual(file.read(), self.expected_output(name))
+
+    def test_rejects_colliding_outputs(self):
+        paths = [os.path.join(self.root, 'small.txt'), os.path.join(self.root, 'sub', 'small.txt')]
+
+        with self.assertRaises(ValueError):
+            list(process_files(paths, os.path.join(self.root, 'out')))
+
+
+class TestSortService(unittest.TestCase):
+
+    def setUp(self):
+        lines = [
+            "garbage before any date",
+            "2015-03-01 S MR",
+            "2015-02-01 L LP",
+            "2015-02-29 CUSPS",
+            "2015-03-01 M LP",
+            "2015-01-15 S LP",
+            "2015-02-01 M MR",
+            "2015-02-01\tL  LP",
+        ]
+        self.transactions = [parse_line(line) for line in lines]
+        self.expected = [
+            "garbage before any date",
+            "2015-01-15 S LP",
+            "2015-02-01 L LP",
+            "2015-02-29 CUSPS",
+            "2015-02-01 M MR",
+            "2015-02-01\tL  LP",
+            "2015-03-01 S MR",
+            "2015-03-01 M LP",
+        ]
+
+    def test_sorts_by_date_keeping_input_order(self):
+        sorted_lines = [t.raw_line for t in iter_sorted_transactions(self.transactions)]
+
+        self.assertEqual(sorted_lines, self.expected)
+
+    def test_spilled_runs_match_in_memory_sort(self):
+        with patch.object(sort_service, 'MAX_FAN_IN', 2):
+            sorted_transactions = list(iter_sorted_transactions(self.transactions, run_size=2))
+
+        self.assertEqual([t.raw_line for t in sorted_transactions], self.expected)
+        self.assertEqual([t.is_valid for t in sorted_transactions],
+                         [False, True, True, False, True, True, True, True])
+
+    def test_sorted_input_prices_like_ordered_input(self):
+        shuffled = [parse_line(f"2015-02-0{day} L LP") for day in (5, 1, 3, 2)]
+        processed = calculate_discounts(list(iter_sorted_transactions(shuffled, run_size=3)))
+
+        self.assertEqual([t.date for t in processed], ["2015-02-01", "2015-02-02", "2015-02-03", "2015-02-05"])
+        self.assertEqual([t.discount for t in processed], [0.0, 0.0, 6.9, 0.0])
+
+
+class TestParseCacheService(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.source = os.path.join(self.directory.name, 'input.txt')
+        self.write_source("2015-02-01 S MR\n2015-02-29 CUSPS\n2015-02-03\tL  LP\n"
+                          "2015-02-04 L LP\n2015-02-05 L LP\nnaïve line\n")
+
+    def write_source(self, content):
+        with open(self.source, 'w', encoding='utf-8') as file:
+            file.write(content)
+
+    def formatted(self, batch):
+        return [format_transaction(t) for t in iter_discounts(batch)]
+
+    def test_round_trip_matches_parser(self):
+        batch = parse_cached(self.source)
+
+        self.assertEqual(self.formatted(batch), self.formatted(parse_input_batch(self.source)))
+        self.assertEqual(list(batch.size_codes), [0, -1, 2, 2, 2, -1])
+        self.assertEqual(batch.raw_lines, {1: "2015-02-29 CUSPS", 2: "2015-02-03\tL  LP", 5: "naïve line"})
+
+        header = read_header(self.source + PARSE_CACHE_SUFFIX)
+        with open(self.source + PARSE_CACHE_SUFFIX, 'rb') as file:
+            file.seek(_layout(6, 3)['carrier_codes'])
+            self.assertEqual(file.read(6), bytes([1, 255, 0, 0, 0, 255]))
+        self.assertEqual(header[3], 6)
+
+    def test_loaded_batch_is_read_only(self):
+        batch = parse_cached(self.source)
+
+        with self.assertRaises(TypeError):
+            batch.size_codes[0] = 1
+        batch.discounts[0] = 0.5
+
+    def test_reuses_cache_while_source_is_unchanged(self):
+        parse_cached(self.source)
+
+        with patch.object(parse_cache_service, 'parse_input_batch') as parse:
+            batch = parse_cached(self.source)
+
+        parse.assert_not_called()
+        self.assertEqual(len(batch), 6)
+
+    def test_rebuilds_when_content_changes_with_same_size_and_mtime(self):
+        parse_cached(self.source)
+        source_stat = os.stat(self.source)
+        self.write_source("2015-03-01 S MR\n2015-02-29 CUSPS\n2015-02-03\tL  LP\n"
+                          "2015-02-04 L LP\n2015-02-05 L LP\nnaïve line\n")
+        os.utime(self.source, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+
+        batch = parse_cached(self.source)
+
+        self.assertEqual(batch[0].date, "2015-03-01")
+
+    def test_empty_source(self):
+        self.write_source("")
+
+        self.assertEqual(len(parse_cached(self.source)), 0)
+
+
+class TestScenarioService(unittest.TestCase):
+
+    def setUp(self):
+        lines = ["2015-02-01 S MR", "2015-02-02 S LP", "2015-02-03 L LP", "2015-02-04 L LP",
+                 "2015-02-05 L LP", "2015-02-06 L MR", "2015-02-07 M MR", "2015-02-29 CUSPS",
+                 "2015-03-01 S MR", "2015-03-02 L LP"]
+        self.lines = lines
+
+    def transactions(self):
+        return [parse_line(line) for line in self.lines]
+
+    def pipeline_totals(self):
+        totals = defaultdict(lambda: [0.0, 0.0, 0.0])
+        for transaction in calculate_discounts(self.transactions()):
+            if transaction.is_valid:
+                month = totals[transaction.year_month]
+                month[0] += transaction.base_price
+                month[1] += transaction.discount
+                month[2] += transaction.final_price
+        return totals
+
+    def test_default_scenario_matches_pipeline(self):
+        result = evaluate_scenarios(self.transactions(), [Scenario('current')])['current']
+
+        for year_month, (base_price, discount, final_price) in self.pipeline_totals().items():
+            self.assertAlmostEqual(result[year_month]['base_price'], base_price)
+            self.assertAlmostEqual(result[year_month]['discount'], discount)
+            self.assertAlmostEqual(result[year_month]['final_price'], final_price)
+        self.assertEqual(result['2015-02']['transactions'], 7)
+
+    def test_scenarios_vary_prices_caps_and_rules(self):
+        prices = {'LP': {'S': 1.0, 'M': 4.0, 'L': 8.0}, 'MR': {'S': 3.0, 'M': 3.0, 'L': 4.0}}
+        scenarios = [
+            Scenario('cheap S', prices),
+            Scenario('low cap', cap=2.0),
+            Scenario('no free L', rules=['LowestSRule']),
+        ]
+
+        batch = TransactionBatch.from_transactions(self.transactions())
+        results = evaluate_scenarios(batch, scenarios)
+
+        self.assertAlmostEqual(results['cheap S']['2015-02']['base_price'], 1 + 3 + 8 * 3 + 4 + 3)
+        self.assertAlmostEqual(results['cheap S']['2015-02']['discount'], 2.0 + 8.0)
+        self.assertAlmostEqual(results['low cap']['2015-02']['discount'], 2.0)
+        self.assertAlmostEqual(results['no free L']['2015-02']['discount'], 0.5)
+        self.assertAlmostEqual(results['no free L']['2015-03']['final_price'], 1.5 + 6.9)
+        self.assertEqual(results['cheap S'], evaluate_scenarios(self.transactions(), scenarios)['cheap S'])
+
+    def test_rejects_unknown_rules(self):
+        with self.assertRaises(ValueError):
+            Scenario('custom', rules=['LowestSRule', 'FreeMondayRule'])
+
+
+class TestStateService(unittest.TestCase):
+
+    def setUp(self):
+        self.lines = ["2015-01-05 S MR", "2015-01-06 L LP", "2015-02-01 S MR", "2015-02-02 L LP",
+                      "2015-02-03 L LP", "2015-02-04 L LP", "bad line", "2015-03-01 M MR"]
+        self.expected = [format_transaction(t)
+                         for t in calculate_discounts([parse_line(line) for line in self.lines])]
+
+    def run_pipeline(self, state, lines=None):
+        transactions = [parse_line(line) for line in lines or self.lines]
+        return [format_transaction(t) for t in iter_discounts(transactions, state=state)]
+
+    def test_stores_must_implement_the_storage(self):
+        class Incomplete(DiscountState):
+            def open_months(self):
+                return []
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+    def test_in_memory_state_evicts_closed_months(self):
+        closed = []
+        state = InMemoryDiscountState(on_month_closed=lambda month, summary: closed.append((month, summary)))
+
+        self.assertEqual(self.run_pipeline(state), self.expected)
+        self.assertEqual([month for month, _ in closed], ['2015-01', '2015-02'])
+        self.assertEqual(state.open_months(), {'2015-03'})
+
+        february = closed[1][1]
+        self.assertEqual(february['transactions'], 4)
+        self.assertEqual(february['l_lp_count'], 3)
+        self.assertAlmostEqual(february['base_price'], 2.0 + 6.9 * 3)
+        self.assertAlmostEqual(february['discount'], 0.5 + 6.9)
+        self.assertAlmostEqual(february['final_price'], 1.5 + 6.9 * 2)
+
+        state.close_all()
+        self.assertEqual(closed[-1][0], '2015-03')
+        self.assertEqual(state.open_months(), set())
+
+    def test_late_transaction_for_closed_month(self):
+        lagging = InMemoryDiscountState(keep_months=2)
+        self.run_pipeline(lagging, ["2015-01-05 S MR", "2015-02-01 S MR", "2015-01-31 S MR"])
+        self.assertEqual(lagging.open_months(), {'2015-01', '2015-02'})
+
+        state = InMemoryDiscountState()
+        with self.assertRaises(ClosedMonthError):
+            self.run_pipeline(state, ["2015-01-05 S MR", "2015-02-01 S MR", "2015-01-31 S MR"])
+
+    def test_sqlite_state_keeps_open_months_on_disk(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'state.db')
+            state = SqliteDiscountState(path)
+            self.assertEqual(self.run_pipeline(state, self.lines[:6]), self.expected[:6])
+            state.close()
+
+            closed = []
+            state = SqliteDiscountState(path, on_month_closed=lambda month, summary: closed.append(month))
+            self.assertEqual(state.open_months(), {'2015-02'})
+            self.assertAlmostEqual(state.monthly_discount_tracker['2015-02'], 0.5 + 6.9)
+
+            self.assertEqual(self.run_pipeline(state, self.lines[6:]), self.expected[6:])
+            state.close_all()
+            state.close()
+
+        self.assertEqual(closed, ['2015-02', '2015-03'])
+
 
 class TestPrintService(unittest.TestCase):
 
@@ -158,5 +1134,159 @@ class TestPrintService(unittest.TestCase):
         mock_print.assert_called_once_with("2015-02-29 CUSPS Ignored")
 
 
+class TestOutputService(unittest.TestCase):
+
+    def setUp(self):
+        self.transactions = calculate_discounts([
+            Transaction("2015-02-01", "S", "MR", "2015-02-01 S MR"),
+            Transaction("2015-02-02", "M", "LP", "2015-02-02 M LP"),
+            Transaction("", "", "", '2015-02-29 CUSPS, "x"'),
+        ])
+        self.transactions[2].is_valid = False
+
+    def test_text_matches_print_transactions(self):
+        printed = io.StringIO()
+        with patch("sys.stdout", printed):
+            print_transactions(self.transactions)
+
+        text_sink = io.StringIO()
+        write_transactions(self.transactions, text_sink)
+        binary_sink = io.BytesIO()
+        write_transactions(self.transactions, binary_sink, buffer_size=1)
+
+        self.assertEqual(text_sink.getvalue(), printed.getvalue())
+        self.assertEqual(binary_sink.getvalue(), printed.getvalue().encode('utf-8'))
+
+    def test_writes_in_blocks(self):
+        sink = MagicMock(spec=io.BytesIO)
+
+        write_transactions(self.transactions, sink, buffer_size=1 << 16)
+
+        sink.write.assert_called_once()
+
+    def test_csv(self):
+        sink = io.StringIO()
+
+        write_transactions(self.transactions, sink, 'csv')
+
+        self.assertEqual(sink.getvalue().splitlines(), [
+            'date,package_size,carrier,price,discount,ignored_line',
+            '2015-02-01,S,MR,1.50,0.50,',
+            '2015-02-02,M,LP,4.90,0.00,',
+            ',,,,,"2015-02-29 CUSPS, ""x"""',
+        ])
+
+    def test_json_lines(self):
+        sink = io.StringIO()
+
+        write_transactions(self.transactions, sink, 'jsonl')
+
+        records = [json.loads(line) for line in sink.getvalue().splitlines()]
+        self.assertEqual(records[0], {"date": "2015-02-01", "package_size": "S", "carrier": "MR",
+                                      "price": 1.5, "discount": 0.5})
+        self.assertEqual(records[2], {"ignored": '2015-02-29 CUSPS, "x"'})
+
+    def test_binary_records_over_socket(self):
+        reader, writer = socket.socketpair()
+        self.addCleanup(reader.close)
+
+        with writer:
+            write_transactions(self.transactions, writer, 'binary')
+        data = reader.makefile('rb').read()
+
+        records = list(BINARY_RECORD.iter_unpack(data))
+        self.assertEqual(len(records), 3)
+        self.assertEqual(records[0], (datetime(2015, 2, 1).toordinal(), 0, 1, 150, 50))
+        self.assertEqual(records[2], (0, 255, 255, 0, 0))
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            write_transactions(self.transactions, io.StringIO(), 'xml')
+
+
+class TestCheckpointService(unittest.TestCase):
+
+    LINES = [f"2015-0{month}-{day:02d} {size} {carrier}"
+             for month in (1, 2) for day in range(1, 28)
+             for size, carrier in (("S", "MR"), ("L", "LP"))]
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.input_path = os.path.join(directory.name, 'input.txt')
+        self.checkpoint_path = os.path.join(directory.name, 'input.txt.checkpoint')
+
+    def write(self, text, mode='w'):
+        with open(self.input_path, mode, newline='') as file:
+            file.write(text)
+
+    def run_incremental(self, resume=True):
+        return [format_transaction(t) for t in
+                iter_incremental(self.input_path, self.checkpoint_path, resume)]
+
+    def full_run(self):
+        return [format_transaction(t) for t in calculate_discounts(parse_input_file(self.input_path))]
+
+    def test_resume_matches_full_run(self):
+        self.write("\n".join(self.LINES[:40]) + "\n")
+        first = self.run_incremental()
+
+        self.write("\n".join(self.LINES[40:]) + "\n", mode='a')
+        second = self.run_incremental()
+
+        self.assertEqual(len(first), 40)
+        self.assertEqual(first + second, self.full_run())
+        self.assertEqual(self.run_incremental(), [])
+
+    def test_partial_last_line_is_reprocessed(self):
+        self.write("\n".join(self.LINES[:10]) + "\n2015-01-2")
+        first = self.run_incremental()
+
+        self.write("8 S MR\n", mode='a')
+        second = self.run_incremental()
+
+        self.assertEqual(len(first), 10)
+        self.assertEqual(second, ["2015-01-28 S MR 1.50 0.50"])
+        self.assertEqual(first + second, self.full_run())
+
+    def test_rewritten_file_is_processed_from_start(self):
+        self.write("\n".join(self.LINES[:40]) + "\n")
+        self.run_incremental()
+
+        self.write("\n".join(self.LINES[:5]) + "\n")
+        with patch("sys.stderr", io.StringIO()) as stderr:
+            rerun = self.run_incremental()
+
+        self.assertEqual(rerun, self.full_run())
+        self.assertIn("does not match", stderr.getvalue())
+
+    def test_checkpoint_at_start_of_file_is_not_a_mismatch(self):
+        self.write("2015-01-0")
+        self.run_incremental()
+        self.assertEqual(load_checkpoint(self.checkpoint_path)['offset'], 0)
+
+        self.write("1 S MR\n", mode='a')
+        with patch("sys.stderr", io.StringIO()) as stderr:
+            rerun = self.run_incremental()
+
+        self.assertEqual(rerun, self.full_run())
+        self.assertEqual(stderr.getvalue(), "")
+
+    def test_without_resume_processes_everything(self):
+        self.write("\n".join(self.LINES[:10]) + "\n")
+        self.run_incremental()
+
+        self.assertEqual(self.run_incremental(resume=False), self.full_run())
+
+    def test_checkpoint_is_written_atomically(self):
+        self.write("\n".join(self.LINES[:10]) + "\n")
+        self.run_incremental()
+
+        self.assertEqual(sorted(os.listdir(self.directory)), ['input.txt', 'input.txt.checkpoint'])
+        self.assertEqual(load_checkpoint(self.checkpoint_path)['offset'],
+                         os.path.getsize(self.input_path))
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
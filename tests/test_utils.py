@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from vinted_shipping.utils.dates import parse_date
+from vinted_shipping.utils.files import atomic_write
+
+
+class TestParseDate(unittest.TestCase):
+
+    def reference(self, date_string):
+        try:
+            date_obj = datetime.strptime(date_string, '%Y-%m-%d')
+        except ValueError:
+            return None
+        return date_obj.toordinal(), f"{date_obj.year}-{date_obj.month:02d}"
+
+    def test_valid_date(self):
+        self.assertEqual(parse_date("2015-02-01"), (datetime(2015, 2, 1).toordinal(), "2015-02"))
+
+    def test_invalid_calendar_dates(self):
+        self.assertIsNone(parse_date("2015-02-29"))
+        self.assertIsNone(parse_date("2015-13-01"))
+        self.assertIsNone(parse_date("2015-00-10"))
+
+    def test_matches_strptime(self):
+        samples = [
+            "2016-02-29", "2015-2-1", "2015-02-1", "0001-01-01", "2015-+1-01",
+            "2015- 1-01", "2015-01-1_", "invalid_da", "2015/02/01", "20150201",
+            "2015-02-01x", "", "2015-٠٢-01",
+        ]
+
+        for sample in samples:
+            with self.subTest(sample=sample):
+                self.assertEqual(parse_date(sample), self.reference(sample))
+
+
+class TestAtomicWrite(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.path = os.path.join(directory.name, 'result.txt')
+        with open(self.path, 'w') as file:
+            file.write("old")
+
+    def test_replaces_file_when_complete(self):
+        with atomic_write(self.path) as file:
+            file.write("new")
+            with open(self.path) as current:
+                self.assertEqual(current.read(), "old")
+
+        with open(self.path) as file:
+            self.assertEqual(file.read(), "new")
+        self.assertEqual(os.listdir(self.directory), ['result.txt'])
+
+    def test_failure_keeps_previous_file(self):
+        with self.assertRaises(RuntimeError):
+            with atomic_write(self.path, 'wb') as file:
+                file.write(b"partial")
+                raise RuntimeError
+
+        with open(self.path) as file:
+            self.assertEqual(file.read(), "old")
+        self.assertEqual(os.listdir(self.directory), ['result.txt'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+"""
+Build the month and day index of transaction files.
+
+Writes INPUT_FILE.index next to each file, so that `main.py --from/--to`
+can seek straight to a date range. The index is rebuilt automatically
+when its file changes, so this command is only needed to build it ahead
+of time.
+
+Usage: python -m vinted_shipping.index INPUT_FILE [INPUT_FILE ...]
+"""
+import argparse
+import sys
+
+from vinted_shipping.services.index_service import INDEX_SUFFIX, build_index, save_index
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Index transaction files by month and day.")
+    parser.add_argument('input_files', nargs='+', metavar='INPUT_FILE', help="transaction file to index")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    failures = 0
+    for input_file in args.input_files:
+        try:
+            index = build_index(input_file)
+            save_index(input_file + INDEX_SUFFIX, index)
+        except (OSError, ValueError) as e:
+            print(f"Error: {input_file}: {e}", file=sys.stderr)
+            failures += 1
+            continue
+
+        order = '' if index['ordered'] else ' (not in date order, ranges unavailable)'
+        print(f"{input_file}: {len(index['months'])} months, {len(index['days'])} days{order}")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
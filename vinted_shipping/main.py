@@ -1,22 +1,281 @@
+import argparse
 import sys
-from vinted_shipping.services.parser_service import parse_input_file
-from vinted_shipping.services.discount_service import calculate_discounts
-from vinted_shipping.services.print_service import print_transactions
+from contextlib import nullcontext
+import time
+from vinted_shipping.models.transaction_batch import TransactionBatch
+from vinted_shipping.rules import compile_rules
+from vinted_shipping.services.batch_service import collect_inputs, process_files
+from vinted_shipping.services.compression_service import detect_compression
+from vinted_shipping.services.parser_service import (
+    STDIN, iter_input_file, parse_input_file, parse_input_batch
+)
+from vinted_shipping.services.parse_cache_service import parse_cached
+from vinted_shipping.services.parallel_parser_service import parse_input_parallel
+from vinted_shipping.services.checkpoint_service import CHECKPOINT_SUFFIX, iter_incremental
+from vinted_shipping.services.discount_service import iter_discounts
+from vinted_shipping.services.index_service import iter_range
+from vinted_shipping.services.parallel_discount_service import calculate_discounts_parallel
+from vinted_shipping.services.price_service import load_price_file
+from vinted_shipping.services.result_cache_service import ResultCache
+from vinted_shipping.services.output_service import FORMATS, write_transactions
+from vinted_shipping.services.sort_service import iter_sorted_transactions
+from vinted_shipping.services.summary_service import MonthlySummary
+from vinted_shipping.services.stats_service import PipelineHooks, PipelineStats
 
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Calculate Vinted shipping discounts.")
+    parser.add_argument('input_file', nargs='?', default='../input.txt',
+                        help="transaction file (default: ../input.txt)")
+    parser.add_argument('--workers', type=int, metavar='N',
+                        help="process calendar months in N worker processes; with --batch, "
+                             "process N files at a time (default: one per CPU)")
+    parser.add_argument('--batch', action='store_true',
+                        help="treat INPUT_FILE as a directory, a glob pattern or a manifest "
+                             "listing one file per line, and process each file separately")
+    parser.add_argument('--sort', action='store_true',
+                        help="sort lines by date before pricing, for inputs that are not in "
+                             "chronological order (stable, spills to temporary files)")
+    parser.add_argument('--parse-workers', type=int, default=1, metavar='N',
+                        help="parse the input in N processes, one byte range each")
+    parser.add_argument('--parse-cache', action='store_true',
+                        help="keep a binary columnar copy of the parsed input in INPUT_FILE.parsed "
+                             "and reuse it while the input is unchanged")
+    parser.add_argument('--checkpoint', metavar='FILE',
+                        help="record progress and discount state in FILE "
+                             "(default with --resume: INPUT_FILE.checkpoint)")
+    parser.add_argument('--resume', action='store_true',
+                        help="only process lines appended since the last checkpoint")
+    parser.add_argument('--from', dest='date_from', metavar='DATE',
+                        help="only output transactions from this month (YYYY-MM) or day (YYYY-MM-DD) "
+                             "on, seeking with the INPUT_FILE.index sidecar of a date-ordered input")
+    parser.add_argument('--to', dest='date_to', metavar='DATE',
+                        help="only output transactions up to this month or day, inclusive")
+    parser.add_argument('--prices', metavar='FILE',
+                        help="JSON price table to use instead of the built-in prices")
+    parser.add_argument('--output', metavar='FILE',
+                        help="write results to FILE instead of standard output; with --batch, "
+                             "the directory for the INPUT.out result files (default: next to each input)")
+    parser.add_argument('--format', choices=FORMATS, default='text',
+                        help="output format (default: text)")
+    parser.add_argument('--engine', choices=('streaming', 'compiled', 'vectorized'), default='streaming',
+                        help="discount engine; 'compiled' runs the rules as one generated function, "
+                             "'vectorized' requires numpy")
+    parser.add_argument('--dump-plan', action='store_true',
+                        help="print the generated source of the compiled rule plan to stderr")
+    parser.add_argument('--summary', metavar='FILE',
+                        help="write per-month aggregates (shipments, discounts, cap use) to FILE "
+                             "for `python -m vinted_shipping.summary`")
+    parser.add_argument('--cache', action='store_true', default=None,
+                        help="reuse and store results in the result cache (off by default)")
+    parser.add_argument('--no-cache', dest='cache', action='store_false',
+                        help="do not use the result cache, even with --cache-dir")
+    parser.add_argument('--cache-dir', metavar='DIR',
+                        help="result cache directory, implies --cache "
+                             "(default: $XDG_CACHE_HOME/vinted_shipping)")
+    parser.add_argument('--stats', action='store_true',
+                        help="print per-stage timings and rule counters to stderr")
+    parser.add_argument('--stats-format', choices=('table', 'json'), default='table',
+                        help="format of the --stats report (default: table)")
+    args = parser.parse_args(argv)
 
-    input_file = sys.argv[1] if len(sys.argv) > 1 else '../input.txt'
+    if args.batch:
+        if args.checkpoint or args.resume or args.stats or args.summary:
+            parser.error("--batch cannot be combined with checkpoints, --stats or --summary")
+        return args
 
+    if args.workers is None:
+        args.workers = 1
+
+    if args.engine != 'streaming' and args.workers > 1:
+        parser.error(f"--workers cannot be combined with --engine {args.engine}")
+
+    if args.resume and not args.checkpoint:
+        args.checkpoint = args.input_file + CHECKPOINT_SUFFIX
+
+    if args.checkpoint and (args.engine != 'streaming' or args.workers > 1):
+        parser.error("checkpoints are only supported by the default streaming engine")
+
+    if args.checkpoint and args.sort:
+        parser.error("--sort cannot be combined with checkpoints")
+
+    if args.checkpoint and detect_compression(args.input_file):
+        parser.error("checkpoints need an uncompressed input file")
+
+    if args.parse_cache and (args.checkpoint or args.sort or args.input_file == STDIN):
+        parser.error("--parse-cache needs a regular input file and cannot be combined "
+                     "with --sort or checkpoints")
+
+    if args.parse_workers > 1 and (args.checkpoint or args.sort or args.parse_cache):
+        parser.error("--parse-workers cannot be combined with --sort, --parse-cache or checkpoints")
+
+    if args.date_from or args.date_to:
+        if args.input_file == STDIN or detect_compression(args.input_file):
+            parser.error("--from/--to need a regular uncompressed input file")
+        if (args.checkpoint or args.sort or args.parse_cache or args.parse_workers > 1
+                or args.engine != 'streaming' or args.workers > 1):
+            parser.error("--from/--to are only supported by the default streaming engine and "
+                         "cannot be combined with --sort, --parse-cache, --parse-workers or checkpoints")
+
+    return args
+
+
+def open_result_cache(args):
+    """Return the ResultCache for this run, or None when it does not apply or is unusable."""
+    enabled = args.cache if args.cache is not None else bool(args.cache_dir)
+    if not enabled or args.checkpoint or args.stats or args.summary or args.input_file == STDIN:
+        return None
     try:
-        transactions = parse_input_file(input_file)
+        return ResultCache(args.cache_dir)
+    except OSError:
+        return None
+
+
+def open_sink(args):
+    return open(args.output, 'wb') if args.output else nullcontext(sys.stdout)
+
+
+def run_batch(args):
+    """Process every file of a batch, report each one and return the number of failures."""
+    input_paths = collect_inputs(args.input_file)
+    if not input_paths:
+        print(f"Error: No input files found for '{args.input_file}'.")
+        return 1
+
+    start = time.perf_counter()
+    total_lines = 0
+    failures = 0
+    for result in process_files(input_paths, args.output, args.format, args.engine,
+                                args.workers, args.sort):
+        if result.error is not None:
+            failures += 1
+            print(f"FAILED {result.input_path}: {result.error}")
+        else:
+            total_lines += result.lines
+            print(f"ok     {result.input_path} -> {result.output_path} "
+                  f"({result.lines} lines, {result.seconds:.2f}s)")
+
+    elapsed = time.perf_counter() - start
+    print(f"{len(input_paths) - failures}/{len(input_paths)} files, {total_lines} lines in "
+          f"{elapsed:.2f}s ({total_lines / elapsed if elapsed else 0:,.0f} lines/s)")
+    return failures
+
+
+def main(argv=None):
+
+    args = parse_args(argv)
+    input_file = args.input_file
+
+    if args.batch:
+        try:
+            if args.prices:
+                load_price_file(args.prices)
+            failures = run_batch(args)
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            sys.exit(1)
+        if failures:
+            sys.exit(1)
+        return
+
+    try:
+        if args.prices:
+            load_price_file(args.prices)
+
+        if args.dump_plan:
+            print(compile_rules().source, file=sys.stderr)
+
+        cache = open_result_cache(args)
+        if cache is not None:
+            cache_key = cache.key(input_file, args.format, args.sort, (args.date_from, args.date_to))
+            with open_sink(args) as sink:
+                if cache.replay(cache_key, sink, args.format):
+                    return
+
+        stats = PipelineStats() if args.stats else None
+        summary = MonthlySummary() if args.summary else None
+        hooks = stats if stats is not None else PipelineHooks()
+
+        if args.checkpoint:
+            processed_transactions = hooks.iter_stage(
+                'discount', iter_incremental(input_file, args.checkpoint, args.resume, stats, summary))
+        elif args.date_from or args.date_to:
+            processed_transactions = hooks.iter_stage(
+                'discount', iter_range(input_file, args.date_from, args.date_to, hooks=stats))
+        elif args.engine == 'vectorized':
+            # Imported here so that other engines never pay for loading numpy
+            from vinted_shipping.services.vectorized_discount_service import calculate_discounts_vectorized
+
+            with hooks.stage('parse'):
+                if args.parse_cache:
+                    transactions = parse_cached(input_file)
+                elif args.sort:
+                    transactions = TransactionBatch.from_transactions(
+                        iter_sorted_transactions(iter_input_file(input_file)))
+                elif args.parse_workers > 1:
+                    transactions = parse_input_parallel(input_file, args.parse_workers)
+                else:
+                    transactions = parse_input_batch(input_file)
+            if stats is not None:
+                stats.lines = len(transactions)
+
+            with hooks.stage('discount'):
+                processed_transactions = calculate_discounts_vectorized(transactions)
+        elif args.workers > 1:
+            with hooks.stage('parse'):
+                if args.parse_cache:
+                    transactions = parse_cached(input_file)
+                elif args.sort:
+                    transactions = list(iter_sorted_transactions(iter_input_file(input_file)))
+                elif args.parse_workers > 1:
+                    transactions = parse_input_parallel(input_file, args.parse_workers)
+                else:
+                    transactions = parse_input_file(input_file)
+            if stats is not None:
+                stats.lines = len(transactions)
+
+            with hooks.stage('discount'):
+                processed_transactions = calculate_discounts_parallel(transactions, args.workers)
+        else:
+            # Each stage is a generator, so lines are parsed, discounted and
+            # printed one at a time instead of loading the whole file first.
+            if args.parse_cache or args.parse_workers > 1:
+                with hooks.stage('parse'):
+                    if args.parse_cache:
+                        transactions = parse_cached(input_file)
+                    else:
+                        transactions = parse_input_parallel(input_file, args.parse_workers)
+                if stats is not None:
+                    stats.lines = len(transactions)
+            else:
+                transactions = hooks.iter_stage('parse', iter_input_file(input_file))
+            if args.sort:
+                transactions = hooks.iter_stage('sort', iter_sorted_transactions(transactions))
+
+            plan = compile_rules() if args.engine == 'compiled' else None
+            processed_transactions = hooks.iter_stage(
+                'discount', iter_discounts(transactions, plan, hooks=stats))
+
+        if summary is not None and not args.checkpoint:
+            processed_transactions = summary.iter_record(processed_transactions)
+
+        with hooks.stage('output'), open_sink(args) as sink:
+            if cache is not None:
+                cache.write(cache_key, processed_transactions, sink, args.format)
+            else:
+                write_transactions(processed_transactions, sink, args.format)
 
-        processed_transactions = calculate_discounts(transactions)
+        if summary is not None:
+            summary.save(args.summary)
 
-        print_transactions(processed_transactions)
+        if stats is not None:
+            print(stats.format_report(args.stats_format), file=sys.stderr)
 
-    except FileNotFoundError:
-        print(f"Error: Input file '{input_file}' not found.")
+    except FileNotFoundError as e:
+        if e.filename in (None, input_file):
+            print(f"Error: Input file '{input_file}' not found.")
+        else:
+            print(f"Error: File '{e.filename}' not found.")
         sys.exit(1)
     except Exception as e:
         print(f"Error: {str(e)}")
@@ -24,4 +283,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
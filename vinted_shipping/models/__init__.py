@@ -1,3 +1,5 @@
+from vinted_shipping.models.price_table import PriceTable
 from vinted_shipping.models.transaction import Transaction
+from vinted_shipping.models.transaction_batch import TransactionBatch, TransactionView
 
-__all__ = ['Transaction']
\ No newline at end of file
+__all__ = ['PriceTable', 'Transaction', 'TransactionBatch', 'TransactionView']
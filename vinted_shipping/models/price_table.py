@@ -0,0 +1,74 @@
+import json
+from types import MappingProxyType
+
+from vinted_shipping.utils.constants import PACKAGE_SIZES, CARRIERS
+
+
+class PriceTable:
+    """
+    Immutable, hashable view of a shipping price table.
+
+    Everything the rules and services need is computed once on construction:
+    the price per (carrier, size), a flat price tuple indexed by
+    carrier_code * len(PACKAGE_SIZES) + size_code (the TransactionBatch
+    codes) and the lowest price per size.
+    """
+
+    __slots__ = ('prices', 'flat_prices', 'lowest_prices', '_items')
+
+    def __init__(self, shipping_prices):
+        prices = {}
+        for carrier in CARRIERS:
+            for size in PACKAGE_SIZES:
+                try:
+                    prices[(carrier, size)] = float(shipping_prices[carrier][size])
+                except KeyError:
+                    raise ValueError(f"price table has no price for {size} via {carrier}")
+
+        lowest_prices = {size: min(prices[(carrier, size)] for carrier in CARRIERS)
+                         for size in PACKAGE_SIZES}
+
+        set_attribute = super().__setattr__
+        set_attribute('prices', MappingProxyType(prices))
+        set_attribute('flat_prices', tuple(prices[(carrier, size)]
+                                           for carrier in CARRIERS for size in PACKAGE_SIZES))
+        set_attribute('lowest_prices', MappingProxyType(lowest_prices))
+        set_attribute('_items', tuple(sorted(prices.items())))
+
+    @classmethod
+    def from_file(cls, file_path):
+        """Load a JSON price file shaped like SHIPPING_PRICES."""
+        with open(file_path, 'r') as file:
+            return cls(json.load(file))
+
+    def price(self, carrier, package_size):
+        return self.prices[(carrier, package_size)]
+
+    def lowest_price(self, package_size):
+        return self.lowest_prices[package_size]
+
+    def as_dict(self):
+        shipping_prices = {}
+        for (carrier, size), price in self._items:
+            shipping_prices.setdefault(carrier, {})[size] = price
+        return shipping_prices
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PriceTable is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("PriceTable is immutable")
+
+    def __reduce__(self):
+        return (PriceTable, (self.as_dict(),))
+
+    def __eq__(self, other):
+        if not isinstance(other, PriceTable):
+            return NotImplemented
+        return self._items == other._items
+
+    def __hash__(self):
+        return hash(self._items)
+
+    def __repr__(self):
+        return f"PriceTable({self.as_dict()})"
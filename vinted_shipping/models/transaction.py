@@ -1,10 +1,20 @@
 
 from datetime import datetime
 
+from vinted_shipping.utils.constants import PACKAGE_SIZES, CARRIERS
+from vinted_shipping.utils.dates import DATE_FORMAT, parse_date
+
+VALID_SIZES = frozenset(PACKAGE_SIZES)
+VALID_CARRIERS = frozenset(CARRIERS)
+
 
 class Transaction:
 
-    def __init__(self, date, package_size, carrier, raw_line):
+    # Slots drop the per-instance __dict__, which dominates memory on large files.
+    __slots__ = ('date', 'package_size', 'carrier', 'raw_line', 'is_valid',
+                 'base_price', 'discount', 'final_price', 'year_month')
+
+    def __init__(self, date, package_size, carrier, raw_line, year_month=None):
 
         self.date = date
         self.package_size = package_size
@@ -17,16 +27,24 @@ class Transaction:
         self.final_price = 0.0
 
         if self.is_valid:
-            self.date_obj = datetime.strptime(date, "%Y-%m-%d")
-            self.year_month = f"{self.date_obj.year}-{self.date_obj.month:02d}"
+            if year_month is None:
+                parsed = parse_date(date)
+                if parsed is None:
+                    raise ValueError(f"time data {date!r} does not match format {DATE_FORMAT!r}")
+                year_month = parsed[1]
+            self.year_month = year_month
 
-    def _validate(self):
+    @property
+    def date_obj(self):
+        if not self.is_valid:
+            raise AttributeError("invalid transaction has no date_obj")
+
+        return datetime.fromordinal(parse_date(self.date)[0])
 
-        valid_sizes = ['S', 'M', 'L']
-        valid_carriers = ['LP', 'MR']
+    def _validate(self):
 
-        return (self.package_size in valid_sizes and
-                self.carrier in valid_carriers)
+        return (self.package_size in VALID_SIZES and
+                self.carrier in VALID_CARRIERS)
 
     def apply_discount(self, discount_amount):
 
@@ -35,4 +53,4 @@ class Transaction:
 
     def __repr__(self):
         return (f"Transaction({self.date}, {self.package_size}, {self.carrier}, "
-                f"base_price={self.base_price:.2f}, discount={self.discount})")
\ No newline at end of file
+                f"base_price={self.base_price:.2f}, discount={self.discount})")
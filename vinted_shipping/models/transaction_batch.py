@@ -0,0 +1,208 @@
+from array import array
+from datetime import date, datetime
+from functools import lru_cache
+
+from vinted_shipping.utils.constants import PACKAGE_SIZES, CARRIERS
+from vinted_shipping.utils.dates import parse_date
+
+INVALID_CODE = -1
+
+SIZE_CODES = {size: code for code, size in enumerate(PACKAGE_SIZES)}
+CARRIER_CODES = {carrier: code for code, carrier in enumerate(CARRIERS)}
+
+
+@lru_cache(maxsize=4096)
+def _date_string(ordinal):
+    return date.fromordinal(ordinal).isoformat()
+
+
+@lru_cache(maxsize=4096)
+def _year_month(ordinal):
+    day = date.fromordinal(ordinal)
+    return f"{day.year}-{day.month:02d}"
+
+
+class TransactionBatch:
+    """
+    Columnar container for transactions.
+
+    Dates are stored as day ordinals, sizes and carriers as small integer
+    codes (INVALID_CODE marks an ignored line) and prices as float arrays.
+    Raw lines are only kept for rows that cannot be rebuilt from the columns,
+    i.e. ignored lines and lines with unusual spacing or date formatting.
+    """
+
+    __slots__ = ('ordinals', 'size_codes', 'carrier_codes',
+                 'base_prices', 'discounts', 'final_prices', 'raw_lines')
+
+    def __init__(self):
+        self.ordinals = array('i')
+        self.size_codes = array('b')
+        self.carrier_codes = array('b')
+        self.base_prices = array('d')
+        self.discounts = array('d')
+        self.final_prices = array('d')
+        self.raw_lines = {}
+
+    @classmethod
+    def from_transactions(cls, transactions):
+        batch = cls()
+        for transaction in transactions:
+            batch.append(transaction)
+        return batch
+
+    def append(self, transaction):
+        index = len(self.ordinals)
+
+        if transaction.is_valid:
+            ordinal = parse_date(transaction.date)[0]
+            self.ordinals.append(ordinal)
+            self.size_codes.append(SIZE_CODES[transaction.package_size])
+            self.carrier_codes.append(CARRIER_CODES[transaction.carrier])
+
+            canonical = (f"{_date_string(ordinal)} {transaction.package_size} "
+                         f"{transaction.carrier}")
+            if transaction.raw_line != canonical:
+                self.raw_lines[index] = transaction.raw_line
+        else:
+            self.ordinals.append(0)
+            self.size_codes.append(INVALID_CODE)
+            self.carrier_codes.append(INVALID_CODE)
+            self.raw_lines[index] = transaction.raw_line
+
+        self.base_prices.append(transaction.base_price)
+        self.discounts.append(transaction.discount)
+        self.final_prices.append(transaction.final_price)
+
+    def append_row(self, ordinal, size_code, carrier_code, raw_line=None):
+        """
+        Append an already parsed row. raw_line is only needed for ignored
+        lines and for lines that cannot be rebuilt from the columns.
+        """
+        if raw_line is not None:
+            self.raw_lines[len(self.ordinals)] = raw_line
+
+        self.ordinals.append(ordinal)
+        self.size_codes.append(size_code)
+        self.carrier_codes.append(carrier_code)
+        self.base_prices.append(0.0)
+        self.discounts.append(0.0)
+        self.final_prices.append(0.0)
+
+    def extend_rows(self, ordinals, size_codes, carrier_codes, raw_lines):
+        """
+        Append parsed columns in bulk. raw_lines maps positions within the
+        given columns to the lines that have to be kept verbatim.
+        """
+        offset = len(self.ordinals)
+        count = len(ordinals)
+
+        self.ordinals.extend(ordinals)
+        self.size_codes.extend(size_codes)
+        self.carrier_codes.extend(carrier_codes)
+        self.raw_lines.update((offset + index, line) for index, line in raw_lines.items())
+
+        zeros = array('d', bytes(8 * count))
+        self.base_prices.extend(zeros)
+        self.discounts.extend(zeros)
+        self.final_prices.extend(zeros)
+
+    def __len__(self):
+        return len(self.ordinals)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("TransactionBatch index out of range")
+        return TransactionView(self, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield TransactionView(self, index)
+
+
+class TransactionView:
+    """
+    Row view over a TransactionBatch that behaves like a Transaction for the
+    rules, the discount service and the printer.
+    """
+
+    __slots__ = ('_batch', '_index')
+
+    def __init__(self, batch, index):
+        self._batch = batch
+        self._index = index
+
+    @property
+    def is_valid(self):
+        return self._batch.size_codes[self._index] != INVALID_CODE
+
+    @property
+    def date(self):
+        raw_line = self._batch.raw_lines.get(self._index)
+        if raw_line is not None:
+            return raw_line.split()[0] if self.is_valid else ''
+        return _date_string(self._batch.ordinals[self._index])
+
+    @property
+    def package_size(self):
+        code = self._batch.size_codes[self._index]
+        return PACKAGE_SIZES[code] if code != INVALID_CODE else ''
+
+    @property
+    def carrier(self):
+        code = self._batch.carrier_codes[self._index]
+        return CARRIERS[code] if code != INVALID_CODE else ''
+
+    @property
+    def year_month(self):
+        if not self.is_valid:
+            raise AttributeError("invalid transaction has no year_month")
+        return _year_month(self._batch.ordinals[self._index])
+
+    @property
+    def date_obj(self):
+        if not self.is_valid:
+            raise AttributeError("invalid transaction has no date_obj")
+        return datetime.fromordinal(self._batch.ordinals[self._index])
+
+    @property
+    def raw_line(self):
+        raw_line = self._batch.raw_lines.get(self._index)
+        if raw_line is not None:
+            return raw_line
+        return f"{self.date} {self.package_size} {self.carrier}"
+
+    @property
+    def base_price(self):
+        return self._batch.base_prices[self._index]
+
+    @base_price.setter
+    def base_price(self, value):
+        self._batch.base_prices[self._index] = value
+
+    @property
+    def discount(self):
+        return self._batch.discounts[self._index]
+
+    @discount.setter
+    def discount(self, value):
+        self._batch.discounts[self._index] = value
+
+    @property
+    def final_price(self):
+        return self._batch.final_prices[self._index]
+
+    @final_price.setter
+    def final_price(self, value):
+        self._batch.final_prices[self._index] = value
+
+    def apply_discount(self, discount_amount):
+
+        self.discount = min(discount_amount, self.base_price)
+        self.final_price = self.base_price - self.discount
+
+    def __repr__(self):
+        return (f"Transaction({self.date}, {self.package_size}, {self.carrier}, "
+                f"base_price={self.base_price:.2f}, discount={self.discount})")
@@ -1,11 +1,13 @@
 """
 Initialize rules module and provide rule registry.
 """
+from vinted_shipping.rules.dispatch import RuleDispatcher, InstrumentedRuleDispatcher
 from vinted_shipping.rules.lowest_s_rule import LowestSRule
 from vinted_shipping.rules.third_l_free_rule import ThirdLFreeRule
+from vinted_shipping.rules.compiler import RulePlan, compile_rules
 
 # Register all rules in the order they should be applied
 RULES = [
     LowestSRule(),
     ThirdLFreeRule()
-]
\ No newline at end of file
+]
@@ -6,8 +6,14 @@ class BaseRule(ABC):
 
     All discount rules should inherit from this class and implement
     the apply_rule method.
+
+    Rules declare the (package_size, carrier) keys they apply to in
+    ``applies_to`` so the dispatcher only calls them for matching
+    transactions. ``None`` means the rule applies to every transaction.
     """
 
+    applies_to = None
+
     @abstractmethod
     def apply_rule(self, transaction, monthly_discount_tracker, l_lp_counter):
         """
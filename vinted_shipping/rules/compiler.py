@@ -0,0 +1,155 @@
+"""
+Compile registered rules and a price table into one specialized function.
+
+The generated function replaces, for one valid transaction, the base price
+lookup, the monthly cap check and the dispatch to each rule's apply_rule.
+Prices, the lowest S price and the cap are folded in as constants, each
+(carrier, size) gets its own branch with only the rules that apply to it,
+and the month's spent budget is read once and kept in a local. Rules the
+compiler has no template for are called through their apply_rule, so any
+rule list can be compiled.
+"""
+import hashlib
+import linecache
+from functools import lru_cache
+
+from vinted_shipping import rules as registry
+from vinted_shipping.rules.dispatch import RuleDispatcher
+from vinted_shipping.rules.lowest_s_rule import LowestSRule
+from vinted_shipping.rules.third_l_free_rule import ThirdLFreeRule
+from vinted_shipping.services.price_service import get_price_table
+from vinted_shipping.utils import constants
+from vinted_shipping.utils.constants import PACKAGE_SIZES, CARRIERS
+
+
+def _grant(lines, indent, amount, base_price, cap):
+    # Mirrors the budget clipping of the rules and Transaction.apply_discount.
+    pad = ' ' * indent
+    lines += [
+        f"{pad}applicable = min({amount}, max(0, {cap} - spent))",
+        f"{pad}discount = min(applicable, {base_price!r})",
+        f"{pad}transaction.discount = discount",
+        f"{pad}transaction.final_price = {base_price!r} - discount",
+        f"{pad}spent = spent + applicable",
+        f"{pad}monthly_discount_tracker[year_month] = spent",
+    ]
+
+
+def _emit_lowest_s(lines, indent, rule_name, carrier, size, price_table, cap, guarded):
+    lowest = price_table.lowest_price('S')
+    base_price = price_table.price(carrier, size)
+    if size != 'S' or not base_price > lowest:
+        return False
+    pad = ' ' * indent
+    if not guarded:
+        lines.append(f"{pad}if spent < {cap}:")
+        indent += 4
+    _grant(lines, indent, repr(base_price - lowest), base_price, cap)
+    return True
+
+
+def _emit_third_l_free(lines, indent, rule_name, carrier, size, price_table, cap, guarded):
+    if (size, carrier) != ('L', 'LP'):
+        return False
+    pad = ' ' * indent
+    base_price = price_table.price(carrier, size)
+    lines += [
+        f"{pad}count = l_lp_counter[year_month] + 1",
+        f"{pad}l_lp_counter[year_month] = count",
+        f"{pad}if count == 3{'' if guarded else f' and spent < {cap}'}:",
+    ]
+    _grant(lines, indent + 4, repr(base_price), base_price, cap)
+    return True
+
+
+def _emit_call(lines, indent, rule_name, carrier, size, price_table, cap, guarded):
+    pad = ' ' * indent
+    lines += [
+        f"{pad}{rule_name}.apply_rule(transaction, monthly_discount_tracker, l_lp_counter)",
+        f"{pad}spent = monthly_discount_tracker[year_month]",
+    ]
+    return True
+
+
+# Rule classes with an inlined template; subclasses may override apply_rule,
+# so only exact types are inlined.
+TEMPLATES = {
+    LowestSRule: _emit_lowest_s,
+    ThirdLFreeRule: _emit_third_l_free,
+}
+
+
+class RulePlan:
+    """
+    A rule list compiled against one price table.
+
+    apply(transaction, monthly_discount_tracker, l_lp_counter) prices and
+    discounts one valid transaction exactly like iter_discounts would with
+    the interpreted rules. source holds the generated code. A plan can be
+    passed as the dispatcher of iter_discounts; rules_for keeps the
+    interpreted dispatch available for instrumented runs.
+    """
+
+    def __init__(self, rules, price_table, source, apply):
+        self.rules = rules
+        self.price_table = price_table
+        self.source = source
+        self.apply = apply
+        self._dispatcher = RuleDispatcher(rules)
+
+    def rules_for(self, transaction):
+        return self._dispatcher.rules_for(transaction)
+
+
+def generate_source(rules, price_table, cap=None):
+    """Return the source of the apply_rules function and the names it expects in its namespace."""
+    cap = repr(float(constants.MONTHLY_DISCOUNT_CAP if cap is None else cap))
+    dispatcher = RuleDispatcher(rules)
+    namespace = {}
+
+    lines = [
+        "def apply_rules(transaction, monthly_discount_tracker, l_lp_counter):",
+        "    carrier = transaction.carrier",
+        "    size = transaction.package_size",
+        "    year_month = transaction.year_month",
+        "    spent = monthly_discount_tracker[year_month]",
+    ]
+    for carrier_number, carrier in enumerate(CARRIERS):
+        lines.append(f"    {'if' if carrier_number == 0 else 'elif'} carrier == {carrier!r}:")
+        for size_number, size in enumerate(PACKAGE_SIZES):
+            base_price = price_table.price(carrier, size)
+            lines += [
+                f"        {'if' if size_number == 0 else 'elif'} size == {size!r}:",
+                f"            transaction.base_price = transaction.final_price = {base_price!r}",
+            ]
+
+            body = []
+            for rule in dispatcher.table[(size, carrier)]:
+                rule_name = f"{type(rule).__name__.lower()}_{rules.index(rule)}"
+                emit = TEMPLATES.get(type(rule), _emit_call)
+                if emit is _emit_call:
+                    namespace[rule_name] = rule
+                body.append(f"                # {type(rule).__name__}")
+                if not emit(body, 16, rule_name, carrier, size, price_table, cap, guarded=not body[:-1]):
+                    body.pop()
+            if body:
+                lines.append(f"            if spent < {cap}:")
+                lines += body
+    return '\n'.join(lines) + '\n', namespace
+
+
+@lru_cache(maxsize=16)
+def _compile(rules, price_table):
+    source, namespace = generate_source(rules, price_table)
+    filename = f"<rule plan {hashlib.sha256(source.encode('utf-8')).hexdigest()[:12]}>"
+    # Registering the source lets tracebacks and pdb show the generated lines.
+    linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+    exec(compile(source, filename, 'exec'), namespace)
+    return RulePlan(rules, price_table, source, namespace['apply_rules'])
+
+
+def compile_rules(rules=None, price_table=None):
+    """Compile rules (default: the registered RULES) against price_table (default: the current one)."""
+    if rules is None:
+        rules = registry.RULES
+    return _compile(tuple(rules), price_table or get_price_table())
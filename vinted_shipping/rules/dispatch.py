@@ -0,0 +1,46 @@
+from collections import Counter
+
+from vinted_shipping.utils.constants import PACKAGE_SIZES, CARRIERS
+
+
+class RuleDispatcher:
+    """
+    Dispatch table from (package_size, carrier) to the rules that apply to it.
+
+    Each key maps to its rules in registration order, so a transaction only
+    touches the rules declared for its size and carrier.
+    """
+
+    def __init__(self, rules):
+        self.rules = tuple(rules)
+        self.table = {
+            key: tuple(rule for rule in self.rules
+                       if rule.applies_to is None or key in rule.applies_to)
+            for key in ((size, carrier) for size in PACKAGE_SIZES for carrier in CARRIERS)
+        }
+
+    def rules_for(self, transaction):
+        return self.table.get((transaction.package_size, transaction.carrier), ())
+
+
+class InstrumentedRuleDispatcher(RuleDispatcher):
+    """RuleDispatcher that counts, per rule, how often it was called or skipped."""
+
+    def __init__(self, rules):
+        super().__init__(rules)
+        self.calls = Counter()
+        self.skipped = Counter()
+
+    def rules_for(self, transaction):
+        rules = super().rules_for(transaction)
+        for rule in self.rules:
+            if rule in rules:
+                self.calls[type(rule).__name__] += 1
+            else:
+                self.skipped[type(rule).__name__] += 1
+        return rules
+
+    def report(self):
+        return {type(rule).__name__: {'calls': self.calls[type(rule).__name__],
+                                      'skipped': self.skipped[type(rule).__name__]}
+                for rule in self.rules}
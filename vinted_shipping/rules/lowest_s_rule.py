@@ -1,9 +1,11 @@
 from vinted_shipping.rules.base_rule import BaseRule
-from vinted_shipping.services.price_service import get_lowest_s_price
-from vinted_shipping.utils.constants import MONTHLY_DISCOUNT_CAP
+from vinted_shipping.services.price_service import get_price_table
+from vinted_shipping.utils.constants import MONTHLY_DISCOUNT_CAP, CARRIERS
 
 class LowestSRule(BaseRule):
 
+    applies_to = frozenset(('S', carrier) for carrier in CARRIERS)
+
     def apply_rule(self, transaction, monthly_discount_tracker, l_lp_counter):
 
         if transaction.package_size == 'S':
@@ -12,7 +14,7 @@ class LowestSRule(BaseRule):
             if monthly_discount_tracker[year_month] >= MONTHLY_DISCOUNT_CAP:
                 return
 
-            lowest_s_price = get_lowest_s_price()
+            lowest_s_price = get_price_table().lowest_price('S')
             if transaction.base_price > lowest_s_price:
                 discount_amount = transaction.base_price - lowest_s_price
 
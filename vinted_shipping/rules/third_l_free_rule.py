@@ -3,6 +3,8 @@ from vinted_shipping.utils.constants import MONTHLY_DISCOUNT_CAP
 
 class ThirdLFreeRule(BaseRule):
 
+    applies_to = frozenset({('L', 'LP')})
+
     def apply_rule(self, transaction, monthly_discount_tracker, l_lp_counter):
 
         if transaction.package_size == 'L' and transaction.carrier == 'LP':
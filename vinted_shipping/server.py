@@ -0,0 +1,134 @@
+"""
+Long-running pricing server.
+
+Accepts newline-delimited transactions over TCP or a Unix socket and streams
+back one priced line per transaction, in the same format as print_service.
+Discount state is kept in memory and shared by all connections.
+
+Usage: python -m vinted_shipping.server [--host HOST] [--port PORT] [--unix PATH]
+"""
+import argparse
+import asyncio
+from collections import defaultdict
+
+from vinted_shipping import rules
+from vinted_shipping.rules.dispatch import RuleDispatcher
+from vinted_shipping.services.discount_service import iter_discounts
+from vinted_shipping.services.parser_service import iter_mapped_lines, parse_line
+from vinted_shipping.services.price_service import load_price_file
+from vinted_shipping.services.print_service import format_transaction
+
+READ_SIZE = 64 * 1024
+# Longest unterminated line a client may send before it is disconnected
+MAX_PENDING = 1 << 20
+
+
+class PricingServer:
+    """
+    Prices transactions received over many connections against one shared state.
+
+    Each chunk read from a client is priced synchronously, so chunks from
+    different connections never interleave inside the rule pipeline and lines
+    from one connection are priced in the order they were sent. Clients may
+    pipeline as many lines as they like; replies are flow-controlled with
+    drain(), so a slow reader stops the server from reading more of its input.
+    A client that sends more than MAX_PENDING bytes without a newline is
+    disconnected.
+
+    With price_file set, the file is checked before each chunk is priced and
+    reloaded once it changes, so prices can be updated without a restart.
+    A file that cannot be read or parsed leaves the current prices in place.
+    """
+
+    def __init__(self, price_file=None):
+        self.price_file = price_file
+        self.monthly_discount_tracker = defaultdict(float)
+        self.l_lp_counter = defaultdict(int)
+        self.dispatcher = RuleDispatcher(rules.RULES)
+
+    def price_lines(self, lines):
+        """
+        Price byte lines and return the reply as bytes.
+
+        Lines are split like the file reader splits them, on \\n with an
+        optional \\r; bytes that are not UTF-8 are replaced, so such a line
+        is answered as Ignored instead of failing the connection.
+        """
+        if self.price_file:
+            try:
+                load_price_file(self.price_file)
+            except (OSError, ValueError):
+                pass
+
+        lines = (line.decode('utf-8', 'replace') for line in iter_mapped_lines(lines))
+        transactions = [transaction for transaction in map(parse_line, lines)
+                        if transaction is not None]
+
+        processed = iter_discounts(transactions, self.dispatcher,
+                                   self.monthly_discount_tracker, self.l_lp_counter)
+
+        return ''.join(f"{format_transaction(transaction)}\n" for transaction in processed).encode('utf-8')
+
+    async def handle_connection(self, reader, writer):
+        pending = b''
+        try:
+            while True:
+                data = await reader.read(READ_SIZE)
+                if not data:
+                    break
+
+                pending += data
+                end = pending.rfind(b'\n') + 1
+                if end:
+                    lines, pending = pending[:end], pending[end:]
+                    writer.write(self.price_lines(lines))
+                    await writer.drain()
+
+                if len(pending) > MAX_PENDING:
+                    return
+
+            if pending:
+                writer.write(self.price_lines(pending))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host='127.0.0.1', port=8765, unix_path=None):
+        if unix_path:
+            return await asyncio.start_unix_server(self.handle_connection, unix_path)
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve Vinted shipping discounts over a socket.")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8765, help="TCP port (default: 8765)")
+    parser.add_argument('--unix', metavar='PATH', help="listen on a Unix socket instead of TCP")
+    parser.add_argument('--prices', metavar='FILE',
+                        help="JSON price table to use instead of the built-in prices, "
+                             "reloaded whenever it changes")
+    return parser.parse_args(argv)
+
+
+async def serve(args):
+    server = await PricingServer(args.prices).start(args.host, args.port, args.unix)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.prices:
+        load_price_file(args.prices)
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
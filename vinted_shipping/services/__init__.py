@@ -1,8 +1,33 @@
-from vinted_shipping.services.discount_service import calculate_discounts
-from vinted_shipping.services.parser_service import parse_input_file
-from vinted_shipping.services.price_service import get_base_price, get_lowest_s_price
-from vinted_shipping.services.print_service import print_transactions
+from vinted_shipping.services.checkpoint_service import iter_incremental
+from vinted_shipping.services.compression_service import detect_compression, open_input
+from vinted_shipping.services.discount_service import calculate_discounts, iter_discounts
+from vinted_shipping.services.engine_service import PricingEngine
+from vinted_shipping.services.index_service import build_index, iter_range
+from vinted_shipping.services.parse_cache_service import load_parsed, parse_cached
+from vinted_shipping.services.parser_service import (
+    parse_input_file, iter_input_file, parse_input_batch
+)
+from vinted_shipping.services.price_service import (
+    get_base_price, get_lowest_s_price, get_price_table, set_price_table, load_price_file
+)
+from vinted_shipping.services.output_service import write_transactions
+from vinted_shipping.services.print_service import print_transactions, format_transaction
+from vinted_shipping.services.result_cache_service import ResultCache
+from vinted_shipping.services.scenario_service import Scenario, evaluate_scenarios
+from vinted_shipping.services.sort_service import iter_sorted_transactions
+from vinted_shipping.services.summary_service import MonthlySummary
+from vinted_shipping.services.stats_service import PipelineHooks, PipelineStats
 
-__all__ = ['calculate_discounts', 'parse_input_file',
+# The process-pool engines (batch_service, parallel_discount_service,
+# parallel_parser_service), the SQLite-backed state_service and the numpy
+# vectorized_discount_service are imported from their own modules, so that
+# importing one service does not load multiprocessing, sqlite3 or numpy.
+__all__ = ['iter_incremental', 'detect_compression', 'open_input',
+           'calculate_discounts', 'iter_discounts',
+           'parse_input_file', 'iter_input_file', 'parse_input_batch',
+           'iter_sorted_transactions', 'build_index', 'iter_range',
+           'load_parsed', 'parse_cached', 'ResultCache',
            'get_base_price', 'get_lowest_s_price',
-           'print_transactions']
\ No newline at end of file
+           'get_price_table', 'set_price_table', 'load_price_file',
+           'print_transactions', 'format_transaction', 'write_transactions',
+           'PipelineHooks', 'PipelineStats', 'MonthlySummary', 'PricingEngine', 'Scenario', 'evaluate_scenarios']
@@ -0,0 +1,133 @@
+import glob
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import as_completed
+
+from vinted_shipping import rules
+from vinted_shipping.models.transaction_batch import TransactionBatch
+from vinted_shipping.services.checkpoint_service import CHECKPOINT_SUFFIX
+from vinted_shipping.services.discount_service import iter_discounts
+from vinted_shipping.services.index_service import INDEX_SUFFIX
+from vinted_shipping.services.output_service import write_transactions
+from vinted_shipping.services.parse_cache_service import PARSE_CACHE_SUFFIX
+from vinted_shipping.services.parser_service import iter_input_file, parse_input_batch
+from vinted_shipping.services.sort_service import iter_sorted_transactions
+from vinted_shipping.services.summary_service import SUMMARY_SUFFIX
+from vinted_shipping.services.worker_pool_service import pricing_pool
+from vinted_shipping.utils.files import atomic_write
+
+OUTPUT_SUFFIX = '.out'
+
+# Files the pipeline writes next to an input, which are never inputs themselves
+SIDECAR_SUFFIXES = (OUTPUT_SUFFIX, PARSE_CACHE_SUFFIX, INDEX_SUFFIX, CHECKPOINT_SUFFIX, SUMMARY_SUFFIX)
+
+BatchResult = namedtuple('BatchResult', 'input_path output_path lines seconds error')
+
+
+def collect_inputs(source):
+    """
+    Expand a batch source into input paths.
+
+    source is a directory (every visible regular file in it except earlier
+    results and other sidecar files), a glob pattern, or a manifest file listing one path per line;
+    relative manifest entries are resolved against the manifest's directory.
+    """
+    if os.path.isdir(source):
+        paths = (os.path.join(source, name) for name in sorted(os.listdir(source))
+                 if not name.startswith('.') and not name.endswith(SIDECAR_SUFFIXES))
+        return [path for path in paths if os.path.isfile(path)]
+
+    if glob.has_magic(source):
+        return sorted(path for path in glob.glob(source) if os.path.isfile(path))
+
+    base = os.path.dirname(source)
+    with open(source, 'r') as manifest:
+        entries = (line.strip() for line in manifest)
+        return [os.path.join(base, entry) for entry in entries
+                if entry and not entry.startswith('#')]
+
+
+def output_path_for(input_path, output_dir=None):
+    """Name the result file after its input, next to it or inside output_dir."""
+    if output_dir is None:
+        return input_path + OUTPUT_SUFFIX
+    return os.path.join(output_dir, os.path.basename(input_path) + OUTPUT_SUFFIX)
+
+
+def process_file(input_path, output_path, output_format='text', engine='streaming', sort=False):
+    """
+    Price one input file into output_path and return (lines, seconds).
+
+    The result is written to a temporary file and renamed into place, so a
+    failing file never leaves a partial result behind.
+    """
+    start = time.perf_counter()
+
+    if engine == 'vectorized':
+        from vinted_shipping.services.vectorized_discount_service import calculate_discounts_vectorized
+
+        if sort:
+            batch = TransactionBatch.from_transactions(
+                iter_sorted_transactions(iter_input_file(input_path)))
+        else:
+            batch = parse_input_batch(input_path)
+        processed_transactions = calculate_discounts_vectorized(batch)
+    else:
+        transactions = iter_input_file(input_path)
+        if sort:
+            transactions = iter_sorted_transactions(transactions)
+        plan = rules.compile_rules() if engine == 'compiled' else None
+        processed_transactions = iter_discounts(transactions, plan)
+
+    lines = 0
+
+    def counted(transactions):
+        nonlocal lines
+        for transaction in transactions:
+            lines += 1
+            yield transaction
+
+    with atomic_write(output_path, 'wb') as sink:
+        write_transactions(counted(processed_transactions), sink, output_format)
+
+    return lines, time.perf_counter() - start
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def process_files(input_paths, output_dir=None, output_format='text', engine='streaming',
+                  workers=None, sort=False):
+    """
+    Process files independently in a bounded process pool, largest first.
+
+    Yields a BatchResult per file as it finishes. A file that fails is
+    reported through its error field and does not stop the others.
+    """
+    outputs = [output_path_for(path, output_dir) for path in input_paths]
+    if len(set(outputs)) != len(outputs):
+        raise ValueError("several inputs share a file name; they would write the same output")
+
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+
+    jobs = sorted(zip(input_paths, outputs), key=lambda job: _file_size(job[0]), reverse=True)
+
+    with pricing_pool(workers) as executor:
+        futures = {executor.submit(process_file, input_path, output_path,
+                                   output_format, engine, sort):
+                   (input_path, output_path) for input_path, output_path in jobs}
+
+        for future in as_completed(futures):
+            input_path, output_path = futures[future]
+            try:
+                lines, seconds = future.result()
+            except Exception as e:
+                yield BatchResult(input_path, output_path, 0, 0.0, e)
+            else:
+                yield BatchResult(input_path, output_path, lines, seconds, None)
@@ -0,0 +1,131 @@
+import json
+import locale
+import os
+import sys
+from collections import defaultdict
+
+from vinted_shipping.services.discount_service import iter_discounts
+from vinted_shipping.services.parser_service import parse_line
+from vinted_shipping.services.summary_service import MonthlySummary
+from vinted_shipping.utils.files import atomic_write, window_hashes
+
+CHECKPOINT_VERSION = 1
+CHECKPOINT_SUFFIX = '.checkpoint'
+
+def load_checkpoint(checkpoint_path):
+    try:
+        with open(checkpoint_path, 'r') as file:
+            checkpoint = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    if checkpoint.get('version') != CHECKPOINT_VERSION:
+        return None
+
+    return checkpoint
+
+
+def save_checkpoint(checkpoint_path, checkpoint):
+    with atomic_write(checkpoint_path) as file:
+        json.dump(checkpoint, file)
+
+
+def _resume_point(file, checkpoint):
+    """Return the checkpoint offset if the file still starts with the checkpointed data, else None."""
+    offset = checkpoint['offset']
+    if os.fstat(file.fileno()).st_size < offset:
+        return None
+
+    if window_hashes(file, offset) != (checkpoint['head_hash'], checkpoint['tail_hash']):
+        return None
+
+    return offset
+
+
+def _iter_lines(file, offset, encoding):
+    """
+    Yield (line, end_offset, complete) for the text lines after offset.
+
+    Lines are split like text mode would split them, including lone carriage
+    returns. complete is False for a final line without a newline, which may
+    still be growing.
+    """
+    file.seek(offset)
+    for raw_line in file:
+        offset += len(raw_line)
+        complete = raw_line.endswith(b'\n')
+
+        text = raw_line.decode(encoding)
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        for line in text.split('\n'):
+            yield line, offset, complete
+
+
+def iter_incremental(file_path, checkpoint_path, resume=True, hooks=None, summary=None):
+    """
+    Process the lines appended since the last checkpoint and update it.
+
+    The checkpoint records the byte offset of the last complete line and the
+    per-month discount state at that point, so resuming gives the same
+    results as a full rerun. A truncated or rewritten input is detected with
+    the size and two window hashes, and is processed from the start. The
+    checkpoint is only written once all transactions have been consumed.
+    A final line without a newline may still be growing, so it is held back
+    until a later run finds it complete.
+
+    A MonthlySummary passed as summary= is kept in the checkpoint too, so
+    after a resume it covers the whole file, not just the new lines.
+    """
+    encoding = locale.getpreferredencoding(False)
+    monthly_discount_tracker = defaultdict(float)
+    l_lp_counter = defaultdict(int)
+
+    with open(file_path, 'rb') as file:
+        start = 0
+        if resume:
+            checkpoint = load_checkpoint(checkpoint_path)
+            if checkpoint is not None:
+                resume_point = _resume_point(file, checkpoint)
+                if resume_point is None:
+                    print(f"Checkpoint '{checkpoint_path}' does not match '{file_path}', "
+                          f"processing the whole file.", file=sys.stderr)
+                elif summary is not None and 'summary' not in checkpoint:
+                    print(f"Checkpoint '{checkpoint_path}' has no summary, processing the whole file.",
+                          file=sys.stderr)
+                else:
+                    start = resume_point
+                    monthly_discount_tracker.update(checkpoint['monthly_discount_tracker'])
+                    l_lp_counter.update(checkpoint['l_lp_counter'])
+                    if summary is not None:
+                        summary.merge(MonthlySummary.from_dict(checkpoint['summary']))
+
+        committed = {'offset': start}
+
+        def transactions():
+            for line, end_offset, complete in _iter_lines(file, start, encoding):
+                if not complete:
+                    break
+                committed['offset'] = end_offset
+
+                transaction = parse_line(line)
+                if transaction is not None:
+                    yield transaction
+
+        parsed = transactions() if hooks is None else hooks.iter_stage('parse', transactions())
+        processed = iter_discounts(parsed, None, monthly_discount_tracker, l_lp_counter, hooks)
+        yield from processed if summary is None else summary.iter_record(processed)
+
+        head_hash, tail_hash = window_hashes(file, committed['offset'])
+
+    checkpoint = {
+        'version': CHECKPOINT_VERSION,
+        'offset': committed['offset'],
+        'head_hash': head_hash,
+        'tail_hash': tail_hash,
+        'monthly_discount_tracker': dict(monthly_discount_tracker),
+        'l_lp_counter': dict(l_lp_counter),
+    }
+    if summary is not None:
+        checkpoint['summary'] = summary.to_dict()
+    save_checkpoint(checkpoint_path, checkpoint)
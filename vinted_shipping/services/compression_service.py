@@ -0,0 +1,125 @@
+import bz2
+import gzip
+import io
+import lzma
+import os
+import queue
+import re
+import threading
+
+# Header of each supported format and the module that opens it. The headers
+# are matched in full, so a text file that merely starts with "BZh" stays text:
+# gzip needs its deflate method byte, and bz2 its block size digit followed by
+# the magic of a first block (or of the end of an empty stream).
+COMPRESSION_FORMATS = (
+    ('gzip', re.compile(rb'\x1f\x8b\x08'), gzip),
+    ('bz2', re.compile(rb'BZh[1-9](?:\x31\x41\x59\x26\x53\x59|\x17\x72\x45\x38\x50\x90)'), bz2),
+    ('xz', re.compile(rb'\xfd7zXZ\x00'), lzma),
+)
+_HEADER_SIZE = 10
+
+READ_AHEAD_CHUNK_SIZE = 1 << 20
+READ_AHEAD_DEPTH = 4
+
+
+def detect_compression(file_path):
+    """Return the compression format of a file from its magic bytes, or None."""
+    try:
+        fd = os.open(file_path, os.O_RDONLY)
+    except (OSError, ValueError):
+        return None
+    try:
+        head = os.read(fd, _HEADER_SIZE)
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
+    for name, header, _ in COMPRESSION_FORMATS:
+        if header.match(head):
+            return name
+    return None
+
+
+class ReadAheadReader(io.RawIOBase):
+    """
+    Raw binary stream fed by a thread that reads ahead from another stream.
+
+    The thread reads chunk_size blocks into a queue of at most depth blocks,
+    so decompression overlaps with whatever consumes this reader while memory
+    stays bounded. Errors raised by the thread are re-raised on read.
+    """
+
+    def __init__(self, stream, chunk_size=READ_AHEAD_CHUNK_SIZE, depth=READ_AHEAD_DEPTH):
+        super().__init__()
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._queue = queue.Queue(maxsize=depth)
+        self._stopped = threading.Event()
+        self._pending = b''
+        self._offset = 0
+        self._finished = False
+        self._thread = threading.Thread(target=self._read_ahead, daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        while not self._stopped.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _read_ahead(self):
+        try:
+            while not self._stopped.is_set():
+                chunk = self._stream.read(self._chunk_size)
+                if not chunk:
+                    break
+                self._put(chunk)
+        except Exception as e:
+            self._put(e)
+        self._put(None)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while self._offset >= len(self._pending):
+            if self._finished:
+                return 0
+            item = self._queue.get()
+            if item is None:
+                self._finished = True
+                return 0
+            if isinstance(item, Exception):
+                self._finished = True
+                raise item
+            self._pending, self._offset = item, 0
+
+        size = min(len(buffer), len(self._pending) - self._offset)
+        buffer[:size] = self._pending[self._offset:self._offset + size]
+        self._offset += size
+        return size
+
+    def close(self):
+        if not self.closed:
+            self._stopped.set()
+            self._thread.join()
+            self._stream.close()
+        super().close()
+
+
+def open_compressed(file_path, compression):
+    """Open a compressed file as a text stream decompressed by a read-ahead thread."""
+    module = next(module for name, _, module in COMPRESSION_FORMATS if name == compression)
+    reader = ReadAheadReader(module.open(file_path, 'rb'), READ_AHEAD_CHUNK_SIZE, READ_AHEAD_DEPTH)
+    return io.TextIOWrapper(io.BufferedReader(reader, READ_AHEAD_CHUNK_SIZE))
+
+
+def open_input(file_path):
+    """Open an input file as text, decompressing gzip, bz2 and xz files on the fly."""
+    compression = detect_compression(file_path)
+    if compression is not None:
+        return open_compressed(file_path, compression)
+    return open(file_path, 'r')
@@ -1,25 +1,106 @@
 from collections import defaultdict
-from vinted_shipping.services.price_service import get_base_price
-from vinted_shipping.rules import RULES
+from vinted_shipping.services.price_service import get_price_table
+from vinted_shipping import rules
+from vinted_shipping.rules.dispatch import RuleDispatcher
+from vinted_shipping.utils.constants import MONTHLY_DISCOUNT_CAP
 
 
-def calculate_discounts(transactions):
+def price_transaction(transaction, price_table, dispatcher, monthly_discount_tracker, l_lp_counter,
+                      hooks=None):
+    """
+    Price one valid transaction and apply the rules that match it.
 
-    monthly_discount_tracker = defaultdict(float)
+    This is the single pricing step of iter_discounts, its observed variant
+    and PricingEngine. Rules are skipped once the month's discounts reach
+    the cap; hooks, if given, see every rule call and cap short-circuit.
+    """
+    transaction.base_price = price_table.price(transaction.carrier, transaction.package_size)
+    transaction.final_price = transaction.base_price
 
-    l_lp_counter = defaultdict(int)
+    year_month = transaction.year_month
+    if monthly_discount_tracker[year_month] >= MONTHLY_DISCOUNT_CAP:
+        if hooks is not None:
+            hooks.on_cap_reached(transaction)
+        return
 
+    for rule in dispatcher.rules_for(transaction):
+        if hooks is None:
+            rule.apply_rule(transaction, monthly_discount_tracker, l_lp_counter)
+        else:
+            before = monthly_discount_tracker[year_month]
+            rule.apply_rule(transaction, monthly_discount_tracker, l_lp_counter)
+            hooks.on_rule(rule, transaction, monthly_discount_tracker[year_month] - before)
+
+
+def iter_discounts(transactions, dispatcher=None, monthly_discount_tracker=None, l_lp_counter=None,
+                   hooks=None, state=None):
+
+    price_table = get_price_table()
+
+    if dispatcher is None:
+        dispatcher = RuleDispatcher(rules.RULES)
+
+    # A DiscountState store provides the mappings the rules work on.
+    if state is not None:
+        monthly_discount_tracker = state.monthly_discount_tracker
+        l_lp_counter = state.l_lp_counter
+
+    # Callers may pass in state restored from an earlier run.
+    if monthly_discount_tracker is None:
+        monthly_discount_tracker = defaultdict(float)
+
+    if l_lp_counter is None:
+        l_lp_counter = defaultdict(int)
+
+    if isinstance(dispatcher, rules.RulePlan) and hooks is None and state is None:
+        yield from _iter_compiled(transactions, dispatcher, monthly_discount_tracker,
+                                  l_lp_counter, price_table)
+        return
+
+    if hooks is not None or state is not None:
+        yield from _iter_observed(transactions, dispatcher, monthly_discount_tracker,
+                                  l_lp_counter, price_table, hooks, state)
+        return
+
+    for transaction in transactions:
+        if transaction.is_valid:
+            price_transaction(transaction, price_table, dispatcher, monthly_discount_tracker, l_lp_counter)
+        yield transaction
+
+
+def _iter_compiled(transactions, plan, monthly_discount_tracker, l_lp_counter, price_table):
+    # A plan folds in the prices it was compiled with, so follow price table swaps.
+    if plan.price_table != price_table:
+        plan = rules.compile_rules(plan.rules, price_table)
+
+    apply_rules = plan.apply
     for transaction in transactions:
         if transaction.is_valid:
+            apply_rules(transaction, monthly_discount_tracker, l_lp_counter)
+        yield transaction
+
+
+def _iter_observed(transactions, dispatcher, monthly_discount_tracker, l_lp_counter,
+                   price_table, hooks, state):
+    # Same loop as iter_discounts, also reporting every month change and
+    # result to the state.
+    for transaction in transactions:
+        if transaction.is_valid:
+            if state is not None:
+                state.open(transaction.year_month)
+
+            price_transaction(transaction, price_table, dispatcher, monthly_discount_tracker,
+                              l_lp_counter, hooks)
+
+            if state is not None:
+                state.record(transaction)
+
+        yield transaction
 
-            transaction.base_price = get_base_price(transaction)
-            transaction.final_price = transaction.base_price
 
-            year_month = transaction.year_month
-            if monthly_discount_tracker[year_month] >= 10.0:
-                continue
+def calculate_discounts(transactions, dispatcher=None, hooks=None, state=None):
 
-            for rule in RULES:
-                rule.apply_rule(transaction, monthly_discount_tracker, l_lp_counter)
+    for _ in iter_discounts(transactions, dispatcher, hooks=hooks, state=state):
+        pass
 
     return transactions
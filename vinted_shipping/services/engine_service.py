@@ -0,0 +1,80 @@
+import threading
+from collections import defaultdict
+
+from vinted_shipping import rules
+from vinted_shipping.rules.dispatch import RuleDispatcher
+from vinted_shipping.services.discount_service import price_transaction
+from vinted_shipping.services.price_service import get_price_table
+
+DEFAULT_STRIPES = 64
+
+
+class PricingEngine:
+    """
+    Thread-safe pricing of transactions submitted from many threads.
+
+    The rules only share state within a calendar month, so each month is
+    guarded by one of a fixed set of striped locks instead of one global
+    lock: threads working on different months proceed in parallel (on
+    free-threaded builds, truly concurrently), while transactions of the
+    same month are priced one at a time in the order they reach its lock.
+    dispatcher may be a RuleDispatcher or a compiled RulePlan.
+    """
+
+    def __init__(self, dispatcher=None, stripes=DEFAULT_STRIPES):
+        if stripes < 1:
+            raise ValueError("stripes must be at least 1")
+        self.dispatcher = dispatcher if dispatcher is not None else RuleDispatcher(rules.RULES)
+        self.monthly_discount_tracker = defaultdict(float)
+        self.l_lp_counter = defaultdict(int)
+        self._locks = tuple(threading.Lock() for _ in range(stripes))
+
+    def _lock_for(self, year_month):
+        return self._locks[hash(year_month) % len(self._locks)]
+
+    def _pricer(self):
+        """Return a function pricing one valid transaction; callers hold its month's lock."""
+        price_table = get_price_table()
+        dispatcher = self.dispatcher
+        monthly_discount_tracker = self.monthly_discount_tracker
+        l_lp_counter = self.l_lp_counter
+
+        if isinstance(dispatcher, rules.RulePlan):
+            if dispatcher.price_table != price_table:
+                dispatcher = self.dispatcher = rules.compile_rules(dispatcher.rules, price_table)
+            apply_rules = dispatcher.apply
+            return lambda transaction: apply_rules(transaction, monthly_discount_tracker, l_lp_counter)
+
+        return lambda transaction: price_transaction(transaction, price_table, dispatcher,
+                                                     monthly_discount_tracker, l_lp_counter)
+
+    def submit(self, transaction):
+        """Price one transaction and return it."""
+        if transaction.is_valid:
+            price = self._pricer()
+            with self._lock_for(transaction.year_month):
+                price(transaction)
+        return transaction
+
+    def submit_many(self, transactions):
+        """
+        Price a batch and return it as a list in its original order.
+
+        The batch is grouped by month and each month's lock is taken once,
+        so a batch costs one lock round trip per month rather than per row.
+        """
+        transactions = list(transactions)
+        months = {}
+        for transaction in transactions:
+            if transaction.is_valid:
+                group = months.get(transaction.year_month)
+                if group is None:
+                    group = months[transaction.year_month] = []
+                group.append(transaction)
+
+        price = self._pricer()
+        for year_month, group in months.items():
+            with self._lock_for(year_month):
+                for transaction in group:
+                    price(transaction)
+        return transactions
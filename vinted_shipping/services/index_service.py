@@ -0,0 +1,178 @@
+import json
+import locale
+import os
+import re
+from collections import defaultdict
+from datetime import date
+
+from vinted_shipping.services.discount_service import iter_discounts
+from vinted_shipping.services.parser_service import parse_line
+from vinted_shipping.utils.dates import parse_date
+from vinted_shipping.utils.files import atomic_write, window_hashes
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = '.index'
+
+_BOUND = re.compile(r'\d{4}-\d{2}(-\d{2})?')
+
+
+def _iter_offset_lines(file, start=0, end=None):
+    """
+    Yield (offset, line) for the text lines of file[start:end].
+
+    Lines are split like text mode would split them; offset is where the
+    line's bytes start, or where its physical line starts after a lone
+    carriage return.
+    """
+    encoding = locale.getpreferredencoding(False)
+    file.seek(start)
+    offset = start
+    for raw_line in file:
+        if end is not None and offset >= end:
+            break
+        text = raw_line.decode(encoding)
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        lines = text.split('\n')
+        if text.endswith('\n'):
+            lines.pop()
+        for line in lines:
+            yield offset, line
+        offset += len(raw_line)
+
+
+def _file_key(file):
+    size = os.fstat(file.fileno()).st_size
+    head_hash, tail_hash = window_hashes(file, size)
+    return {'size': size, 'mtime_ns': os.fstat(file.fileno()).st_mtime_ns,
+            'head_hash': head_hash, 'tail_hash': tail_hash}
+
+
+def build_index(file_path):
+    """
+    Scan a transaction file and return its index.
+
+    The index maps every month and day to the byte offset and 1-based line
+    number of its first transaction, and records whether the valid lines are
+    in date order, which seeking requires.
+    """
+    months, days = {}, {}
+    ordered = True
+    last_ordinal = None
+    with open(file_path, 'rb') as file:
+        for line_number, (offset, line) in enumerate(_iter_offset_lines(file), 1):
+            transaction = parse_line(line)
+            if transaction is None or not transaction.is_valid:
+                continue
+            ordinal = parse_date(transaction.date)[0]
+            if ordinal == last_ordinal:
+                continue
+            if last_ordinal is not None and ordinal < last_ordinal:
+                ordered = False
+            last_ordinal = ordinal
+
+            day = date.fromordinal(ordinal).isoformat()
+            days.setdefault(day, [offset, line_number])
+            months.setdefault(day[:7], [offset, line_number])
+        key = _file_key(file)
+
+    return {'version': INDEX_VERSION, **key, 'ordered': ordered, 'months': months, 'days': days}
+
+
+def save_index(index_path, index):
+    with atomic_write(index_path) as file:
+        json.dump(index, file)
+
+
+def load_index(file_path, index_path=None):
+    """Return the index of file_path, or None if it is missing or the file has changed since."""
+    index_path = index_path or file_path + INDEX_SUFFIX
+    try:
+        with open(index_path, 'r') as file:
+            index = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    if index.get('version') != INDEX_VERSION:
+        return None
+    with open(file_path, 'rb') as file:
+        if _file_key(file) != {name: index.get(name) for name in ('size', 'mtime_ns', 'head_hash', 'tail_hash')}:
+            return None
+    return index
+
+
+def ensure_index(file_path, index_path=None):
+    """Load the index of file_path, building and saving it first if it is missing or stale."""
+    index = load_index(file_path, index_path)
+    if index is None:
+        index = build_index(file_path)
+        save_index(index_path or file_path + INDEX_SUFFIX, index)
+    return index
+
+
+def _first_offset(entries, bound, default):
+    for key, (offset, _) in entries.items():
+        if key >= bound:
+            return offset
+    return default
+
+
+def range_offsets(index, first=None, last=None):
+    """
+    Return (month_start, start, end) byte offsets for the months or days first..last.
+
+    Lines from month_start to start only rebuild the discount state of the
+    first month; lines from start to end are the selected range. Bounds are
+    'YYYY-MM' or 'YYYY-MM-DD' and both are inclusive.
+    """
+    for bound in (first, last):
+        if bound is not None and not _BOUND.fullmatch(bound):
+            raise ValueError(f"invalid date bound {bound!r}, expected YYYY-MM or YYYY-MM-DD")
+    if not index['ordered']:
+        raise ValueError("date ranges need an input in date order")
+
+    size = index['size']
+    month_start = start = 0
+    if first is not None:
+        month_start = _first_offset(index['months'], first[:7], size)
+        start = _first_offset(index['days'], first if len(first) == 10 else first + '-01', size)
+
+    end = size
+    if last is not None:
+        # '~' sorts after every digit, so 'YYYY-MM~' follows all days of the month.
+        end = _first_offset(index['days'], last + ('~' if len(last) == 10 else '-~'), size)
+
+    return month_start, start, max(start, end)
+
+
+def _iter_range_transactions(file, start, end):
+    for _, line in _iter_offset_lines(file, start, end):
+        transaction = parse_line(line)
+        if transaction is not None:
+            yield transaction
+
+
+def iter_range(file_path, first=None, last=None, index_path=None, hooks=None):
+    """
+    Process only the transactions dated first..last of a date-ordered file.
+
+    The sidecar index (built if missing or stale) gives the offset of the
+    first month in range; the file is read from there and reading stops at
+    the first day after last. Since discount state is per month, the lines
+    of the first month before first only rebuild that state, and the output
+    matches the same lines of a full run. Ignored lines are kept with the
+    transactions they follow.
+    """
+    month_start, start, end = range_offsets(ensure_index(file_path, index_path), first, last)
+    monthly_discount_tracker = defaultdict(float)
+    l_lp_counter = defaultdict(int)
+
+    with open(file_path, 'rb') as file:
+        for _ in iter_discounts(_iter_range_transactions(file, month_start, start), None,
+                                monthly_discount_tracker, l_lp_counter):
+            pass
+
+        transactions = _iter_range_transactions(file, start, end)
+        if hooks is not None:
+            transactions = hooks.iter_stage('parse', transactions)
+        yield from iter_discounts(transactions, None, monthly_discount_tracker, l_lp_counter, hooks)
@@ -0,0 +1,111 @@
+import csv
+import io
+import json
+import struct
+
+from vinted_shipping.models.transaction_batch import SIZE_CODES, CARRIER_CODES
+from vinted_shipping.services.print_service import format_transaction
+from vinted_shipping.utils.dates import parse_date
+from vinted_shipping.utils.files import binary_sink, text_sink
+
+FORMATS = ('text', 'csv', 'jsonl', 'binary')
+
+DEFAULT_BUFFER_SIZE = 1 << 16
+
+CSV_HEADER = ('date', 'package_size', 'carrier', 'price', 'discount', 'ignored_line')
+
+# Fixed-width binary record: day ordinal, size code, carrier code, final price
+# and discount in cents. Ignored lines are written with codes of 255 and zeros.
+BINARY_RECORD = struct.Struct('<iBBii')
+BINARY_INVALID_CODE = 255
+
+
+def _format_csv_row(transaction):
+    if transaction.is_valid:
+        return (transaction.date, transaction.package_size, transaction.carrier,
+                f"{transaction.final_price:.2f}", f"{transaction.discount:.2f}", '')
+    return ('', '', '', '', '', transaction.raw_line)
+
+
+def _format_json_line(transaction):
+    if transaction.is_valid:
+        # Valid rows only hold digits, dashes and known codes, so nothing needs escaping.
+        return (f'{{"date": "{transaction.date}", '
+                f'"package_size": "{transaction.package_size}", '
+                f'"carrier": "{transaction.carrier}", '
+                f'"price": {round(transaction.final_price, 2)!r}, '
+                f'"discount": {round(transaction.discount, 2)!r}}}')
+    return json.dumps({'ignored': transaction.raw_line})
+
+
+def _pack_binary_record(transaction):
+    if transaction.is_valid:
+        return BINARY_RECORD.pack(parse_date(transaction.date)[0],
+                                  SIZE_CODES[transaction.package_size],
+                                  CARRIER_CODES[transaction.carrier],
+                                  round(transaction.final_price * 100),
+                                  round(transaction.discount * 100))
+    return BINARY_RECORD.pack(0, BINARY_INVALID_CODE, BINARY_INVALID_CODE, 0, 0)
+
+
+def _write_lines(transactions, write, format_line, buffer_size):
+    buffer = []
+    buffered = 0
+    for transaction in transactions:
+        line = format_line(transaction)
+        buffer.append(line)
+        buffered += len(line) + 1
+        if buffered >= buffer_size:
+            buffer.append('')
+            write('\n'.join(buffer))
+            buffer.clear()
+            buffered = 0
+
+    if buffer:
+        buffer.append('')
+        write('\n'.join(buffer))
+
+
+def _write_csv(transactions, write, buffer_size):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(CSV_HEADER)
+    for transaction in transactions:
+        writer.writerow(_format_csv_row(transaction))
+        if buffer.tell() >= buffer_size:
+            write(buffer.getvalue())
+            buffer.seek(0)
+            buffer.truncate()
+
+    write(buffer.getvalue())
+
+
+def _write_binary(transactions, write, buffer_size):
+    buffer = bytearray()
+    for transaction in transactions:
+        buffer += _pack_binary_record(transaction)
+        if len(buffer) >= buffer_size:
+            write(buffer)
+            buffer = bytearray()
+
+    if buffer:
+        write(buffer)
+
+
+def write_transactions(transactions, sink, output_format='text', buffer_size=DEFAULT_BUFFER_SIZE):
+    """
+    Write processed transactions to a sink in blocks of about buffer_size.
+
+    The sink may be a text stream, a binary stream or a socket. The 'text'
+    format produces the same output as print_transactions.
+    """
+    if output_format == 'text':
+        _write_lines(transactions, text_sink(sink), format_transaction, buffer_size)
+    elif output_format == 'jsonl':
+        _write_lines(transactions, text_sink(sink), _format_json_line, buffer_size)
+    elif output_format == 'csv':
+        _write_csv(transactions, text_sink(sink), buffer_size)
+    elif output_format == 'binary':
+        _write_binary(transactions, binary_sink(sink), buffer_size)
+    else:
+        raise ValueError(f"unknown output format {output_format!r}")
@@ -0,0 +1,50 @@
+from collections import defaultdict
+
+from vinted_shipping.models.transaction import Transaction
+from vinted_shipping.services.discount_service import calculate_discounts
+from vinted_shipping.services.worker_pool_service import pricing_pool
+
+
+def _discount_shard(shard):
+    """
+    Run the rule pipeline over the transactions of a single month.
+
+    The shard only carries the fields the rules need, which keeps pickling
+    cheap; prices are sent back as (base_price, discount, final_price).
+    """
+    transactions = [Transaction(date, package_size, carrier, '', year_month)
+                    for date, package_size, carrier, year_month in shard]
+
+    return [(t.base_price, t.discount, t.final_price)
+            for t in calculate_discounts(transactions)]
+
+
+def calculate_discounts_parallel(transactions, workers=None):
+    """
+    Calculate discounts with one process-pool task per calendar month.
+
+    All discount state is keyed by year_month, so months can be processed
+    independently; results are written back in the original input order.
+    """
+    if workers is not None and workers <= 1:
+        return calculate_discounts(transactions)
+
+    shards = defaultdict(list)
+    for index, transaction in enumerate(transactions):
+        if transaction.is_valid:
+            shards[transaction.year_month].append(index)
+
+    with pricing_pool(workers) as executor:
+        payloads = [
+            [(transactions[i].date, transactions[i].package_size,
+              transactions[i].carrier, transactions[i].year_month) for i in indices]
+            for indices in shards.values()
+        ]
+        for indices, prices in zip(shards.values(), executor.map(_discount_shard, payloads)):
+            for index, (base_price, discount, final_price) in zip(indices, prices):
+                transaction = transactions[index]
+                transaction.base_price = base_price
+                transaction.discount = discount
+                transaction.final_price = final_price
+
+    return transactions
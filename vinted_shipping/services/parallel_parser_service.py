@@ -0,0 +1,125 @@
+import mmap
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+
+from vinted_shipping.models.transaction_batch import TransactionBatch
+from vinted_shipping.services.parser_service import (
+    _is_mappable, _needs_text_mode, append_mapped_lines, iter_input_file, iter_mapped_lines,
+    parse_input_batch
+)
+
+# Files smaller than this per worker are not worth the process start-up.
+MIN_CHUNK_SIZE = 1 << 20
+
+
+def split_ranges(buffer, parts):
+    """Split buffer into at most parts byte ranges that each end just after a newline."""
+    size = len(buffer)
+    ranges = []
+    start = 0
+    for part in range(1, parts + 1):
+        end = size if part == parts else max(start, size * part // parts)
+        if end < size:
+            newline = buffer.find(b'\n', end)
+            end = size if newline == -1 else newline + 1
+        if end > start:
+            ranges.append((start, end))
+            start = end
+        if start >= size:
+            break
+    return ranges
+
+
+def _parse_range(file_path, start, end):
+    """
+    Parse one byte range into shared memory.
+
+    Returns None when the range needs the text-mode reader, otherwise the
+    shared memory name, the row count and the raw lines of the range. The
+    block holds the ordinals, size codes and carrier codes back to back.
+    """
+    with open(file_path, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            if _needs_text_mode(buffer, start, end):
+                return None
+            batch = append_mapped_lines(TransactionBatch(), iter_mapped_lines(buffer, start, end))
+
+    rows = len(batch)
+    # The block stays registered with the resource tracker the parent shares
+    # with its workers: the parent unlinks it, and the tracker only steps in
+    # if the parent dies first.
+    block = shared_memory.SharedMemory(create=True, size=max(1, 6 * rows))
+    try:
+        block.buf[:4 * rows] = batch.ordinals.tobytes()
+        block.buf[4 * rows:5 * rows] = batch.size_codes.tobytes()
+        block.buf[5 * rows:6 * rows] = batch.carrier_codes.tobytes()
+    finally:
+        block.close()
+    return block.name, rows, batch.raw_lines
+
+
+def _collect(batch, name, rows, raw_lines):
+    ordinals, size_codes, carrier_codes = array('i'), array('b'), array('b')
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        ordinals.frombytes(block.buf[:4 * rows])
+        size_codes.frombytes(block.buf[4 * rows:5 * rows])
+        carrier_codes.frombytes(block.buf[5 * rows:6 * rows])
+    finally:
+        block.close()
+    batch.extend_rows(ordinals, size_codes, carrier_codes, raw_lines)
+
+
+def _unlink(name):
+    block = shared_memory.SharedMemory(name=name)
+    block.close()
+    block.unlink()
+
+
+def parse_input_parallel(file_path, workers=None):
+    """
+    Parse a file into a TransactionBatch with one process per byte range.
+
+    The file is split at newlines, each worker parses its range with the
+    memory-mapped bytes parser and hands the columns back through shared
+    memory, and the ranges are appended in file order. Files the bytes
+    parser cannot reproduce exactly, stdin and small files are parsed like
+    parse_input_batch.
+    """
+    workers = workers or os.cpu_count() or 1
+    if not _is_mappable(file_path):
+        return TransactionBatch.from_transactions(iter_input_file(file_path))
+
+    with open(file_path, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            parts = min(workers, max(1, len(buffer) // MIN_CHUNK_SIZE))
+            ranges = split_ranges(buffer, parts)
+
+    if len(ranges) <= 1:
+        return parse_input_batch(file_path)
+
+    # Started before the pool, so the workers register their blocks with it too
+    resource_tracker.ensure_running()
+    with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+        futures = [executor.submit(_parse_range, file_path, start, end) for start, end in ranges]
+
+    # Every worker has finished, so the blocks of the successful ones are all
+    # released below even when another worker failed.
+    names = [future.result()[0] for future in futures
+             if future.exception() is None and future.result() is not None]
+    try:
+        results = [future.result() for future in futures]
+        text_mode = any(result is None for result in results)
+        if not text_mode:
+            batch = TransactionBatch()
+            for result in results:
+                _collect(batch, *result)
+    finally:
+        for name in names:
+            _unlink(name)
+
+    if text_mode:
+        return TransactionBatch.from_transactions(iter_input_file(file_path))
+    return batch
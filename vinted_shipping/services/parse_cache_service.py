@@ -0,0 +1,150 @@
+import mmap
+import os
+import struct
+from array import array
+
+from vinted_shipping.models.transaction_batch import TransactionBatch
+from vinted_shipping.services.parser_service import parse_input_batch
+from vinted_shipping.utils.files import atomic_write, content_key
+
+PARSE_CACHE_SUFFIX = '.parsed'
+PARSE_CACHE_MAGIC = b'VSPC'
+PARSE_CACHE_VERSION = 2
+
+# magic, version, reserved, rows, source size, source mtime_ns, source sha256,
+# raw line count, raw blob size
+HEADER = struct.Struct('<4sHHQQq32sQQ')
+
+_ALIGNMENT = 8
+
+
+def _align(offset):
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def _layout(rows, raw_count):
+    """
+    Offsets of the sections that follow the header, each 8-byte aligned:
+    day ordinals (int32), size codes (int8), carrier codes (int8), raw line
+    row numbers (int64), raw line offsets (int64) and the UTF-8 blob of raw
+    lines. Ignored rows are the ones whose size code is INVALID_CODE.
+    """
+    sections = {}
+    offset = HEADER.size
+    for name, size in (('ordinals', 4 * rows), ('size_codes', rows), ('carrier_codes', rows),
+                       ('raw_rows', 8 * raw_count),
+                       ('raw_offsets', 8 * (raw_count + 1)), ('raw_blob', 0)):
+        offset = _align(offset)
+        sections[name] = offset
+        offset += size
+    return sections
+
+
+def write_parsed(batch, cache_path, source_key):
+    """Write a TransactionBatch to a columnar cache file, atomically."""
+    rows = len(batch)
+    raw_rows = array('q', sorted(batch.raw_lines))
+    raw_offsets = array('q', [0])
+    blob = bytearray()
+    for row in raw_rows:
+        blob += batch.raw_lines[row].encode('utf-8')
+        raw_offsets.append(len(blob))
+
+    source_size, source_mtime_ns, source_hash = source_key
+    sections = _layout(rows, len(raw_rows))
+    parts = (
+        ('ordinals', array('i', batch.ordinals).tobytes()),
+        ('size_codes', array('b', batch.size_codes).tobytes()),
+        ('carrier_codes', array('b', batch.carrier_codes).tobytes()),
+        ('raw_rows', raw_rows.tobytes()),
+        ('raw_offsets', raw_offsets.tobytes()),
+        ('raw_blob', bytes(blob)),
+    )
+
+    with atomic_write(cache_path, 'wb') as file:
+        file.write(HEADER.pack(PARSE_CACHE_MAGIC, PARSE_CACHE_VERSION, 0, rows, source_size,
+                               source_mtime_ns, source_hash, len(raw_rows), len(blob)))
+        for name, data in parts:
+            file.write(bytes(sections[name] - file.tell()))
+            file.write(data)
+
+
+def read_header(cache_path):
+    """Return the header fields of a cache file, or None if it is missing or not a cache."""
+    try:
+        with open(cache_path, 'rb') as file:
+            header = file.read(HEADER.size)
+    except OSError:
+        return None
+
+    if len(header) != HEADER.size:
+        return None
+
+    fields = HEADER.unpack(header)
+    if fields[0] != PARSE_CACHE_MAGIC or fields[1] != PARSE_CACHE_VERSION:
+        return None
+    return fields
+
+
+def load_parsed(cache_path):
+    """
+    Memory-map a cache file as a TransactionBatch.
+
+    The ordinal and code columns are read-only views of the mapping, so no
+    per-row Python work is done; only the raw lines of ignored and irregular
+    rows are decoded. Price columns are fresh arrays for the discount engine.
+    The batch is therefore read-only apart from its prices: it cannot be
+    appended to, and assigning into its date or code columns raises TypeError.
+    """
+    with open(cache_path, 'rb') as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, _, rows, _, _, _, raw_count, blob_size = HEADER.unpack_from(buffer)
+    if magic != PARSE_CACHE_MAGIC or version != PARSE_CACHE_VERSION:
+        buffer.close()
+        raise ValueError(f"'{cache_path}' is not a parse cache file")
+
+    sections = _layout(rows, raw_count)
+    view = memoryview(buffer)
+
+    batch = TransactionBatch()
+    batch.ordinals = view[sections['ordinals']:sections['ordinals'] + 4 * rows].cast('i')
+    batch.size_codes = view[sections['size_codes']:sections['size_codes'] + rows].cast('b')
+    batch.carrier_codes = view[sections['carrier_codes']:sections['carrier_codes'] + rows].cast('b')
+
+    raw_rows = view[sections['raw_rows']:sections['raw_rows'] + 8 * raw_count].cast('q')
+    raw_offsets = view[sections['raw_offsets']:sections['raw_offsets'] + 8 * (raw_count + 1)].cast('q')
+    blob = buffer[sections['raw_blob']:sections['raw_blob'] + blob_size]
+    batch.raw_lines = {row: blob[raw_offsets[i]:raw_offsets[i + 1]].decode('utf-8')
+                       for i, row in enumerate(raw_rows)}
+
+    zeros = bytes(8 * rows)
+    batch.base_prices = array('d', zeros)
+    batch.discounts = array('d', zeros)
+    batch.final_prices = array('d', zeros)
+    return batch
+
+
+def parse_cached(source_path, cache_path=None):
+    """
+    Return the TransactionBatch of source_path, parsing it only when needed.
+
+    The cache is reused while the source's size, mtime and SHA-256 all match
+    the ones it was built from; otherwise the source is parsed again and the
+    cache rewritten.
+    """
+    if cache_path is None:
+        cache_path = source_path + PARSE_CACHE_SUFFIX
+
+    header = read_header(cache_path)
+    source_stat = os.stat(source_path)
+    if (header is not None and header[4] == source_stat.st_size
+            and header[5] == source_stat.st_mtime_ns):
+        source_key = content_key(source_path)
+        if source_key == (header[4], header[5], header[6]):
+            return load_parsed(cache_path)
+    else:
+        source_key = content_key(source_path)
+
+    write_parsed(parse_input_batch(source_path), cache_path, source_key)
+    return load_parsed(cache_path)
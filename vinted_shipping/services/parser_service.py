@@ -1,30 +1,205 @@
-from datetime import datetime
+import mmap
+from array import array
+import os
+import stat
+import sys
+
 from vinted_shipping.models.transaction import Transaction
+from vinted_shipping.models.transaction_batch import (
+    TransactionBatch, INVALID_CODE, SIZE_CODES, CARRIER_CODES
+)
+from vinted_shipping.services.compression_service import detect_compression, open_input
+from vinted_shipping.utils.dates import parse_date
+
+STDIN = '-'
+
+# ASCII separators that str.split() treats as whitespace but bytes.split() does not
+_TEXT_ONLY_SEPARATORS = bytes(range(0x1c, 0x20))
+
+_SCAN_CHUNK_SIZE = 1 << 20
+
+_SIZE_BYTE_CODES = {size.encode(): code for size, code in SIZE_CODES.items()}
+_CARRIER_BYTE_CODES = {carrier.encode(): code for carrier, code in CARRIER_CODES.items()}
+
+_DATE_CACHE_SIZE = 4096
+
+
+def parse_line(line):
+    line = line.strip()
+    if not line:
+        return None
+
+    parts = line.split()
+
+    if len(parts) == 3:
+        date, package_size, carrier = parts
+        parsed = parse_date(date)
+        if parsed is not None:
+            return Transaction(date, package_size, carrier, line, parsed[1])
+
+    transaction = Transaction('', '', '', line)
+    transaction.is_valid = False
+    return transaction
+
+
+def _iter_text_file(file):
+    for line in file:
+        transaction = parse_line(line)
+        if transaction is not None:
+            yield transaction
+
+
+def _is_mappable(file_path):
+    try:
+        file_stat = os.stat(file_path)
+    except (OSError, ValueError):
+        return False
+
+    return (stat.S_ISREG(file_stat.st_mode) and file_stat.st_size > 0
+            and detect_compression(file_path) is None)
+
+
+def _needs_text_mode(buffer, start=0, end=None):
+    """
+    Tell whether a bytes scan could split or strip lines differently from text mode.
+
+    That is the case for non-ASCII content (decoding, unicode whitespace), for
+    the \\x1c-\\x1f separators and for lone carriage returns, which universal
+    newlines treat as line breaks. Only buffer[start:end] is scanned.
+    """
+    if end is None:
+        end = len(buffer)
+    for chunk_start in range(start, end, _SCAN_CHUNK_SIZE):
+        chunk_end = min(chunk_start + _SCAN_CHUNK_SIZE, end)
+        chunk = buffer[chunk_start:chunk_end]
+        if not chunk.isascii():
+            return True
+        if len(chunk.translate(None, _TEXT_ONLY_SEPARATORS)) != len(chunk):
+            return True
+
+        carriage_returns = chunk.count(b'\r')
+        if carriage_returns:
+            line_breaks = chunk.count(b'\r\n')
+            if chunk.endswith(b'\r') and buffer[chunk_end:chunk_end + 1] == b'\n':
+                line_breaks += 1
+            if carriage_returns != line_breaks:
+                return True
+
+    return False
+
+
+def _map_file(file):
+    """Memory-map a file that the bytes scanner can handle, or return None."""
+    buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    if _needs_text_mode(buffer):
+        buffer.close()
+        return None
+
+    return buffer
+
+
+def iter_mapped_lines(buffer, start=0, end=None):
+    """Yield the lines of buffer[start:end] as bytes, without \\n or \\r\\n terminators."""
+    if end is None:
+        end = len(buffer)
+
+    find = buffer.find
+    while start < end:
+        newline = find(b'\n', start, end)
+        if newline == -1:
+            newline = end
+        line = buffer[start:newline]
+        yield line[:-1] if line.endswith(b'\r') else line
+        start = newline + 1
+
+
+def iter_input_file(file_path):
+    """
+    Lazily parse a transaction file, or standard input when file_path is '-'.
+
+    gzip, bz2 and xz files are recognised by their magic bytes and
+    decompressed on the fly by a read-ahead thread.
+    """
+    if file_path == STDIN:
+        yield from _iter_text_file(sys.stdin)
+        return
+
+    with open_input(file_path) as file:
+        yield from _iter_text_file(file)
+
 
 def parse_input_file(file_path):
-    transactions = []
+    return list(iter_input_file(file_path))
 
-    with open(file_path, 'r') as file:
-        for line in file:
-            line = line.strip()
-            if not line:
+
+def append_mapped_lines(batch, lines):
+    """
+    Parse byte lines straight into a TransactionBatch.
+
+    Valid, regularly formatted lines only become integer codes; a str is
+    materialized only for lines the batch has to echo back verbatim.
+    """
+    ordinals = array('i')
+    size_codes = array('b')
+    carrier_codes = array('b')
+    raw_lines = {}
+    date_cache = {}
+
+    add_ordinal = ordinals.append
+    add_size = size_codes.append
+    add_carrier = carrier_codes.append
+    size_byte_codes = _SIZE_BYTE_CODES
+    carrier_byte_codes = _CARRIER_BYTE_CODES
+
+    for line in lines:
+        parts = line.split()
+        if not parts:
+            continue
+
+        if len(parts) == 3:
+            date, package_size, carrier = parts
+
+            parsed = date_cache.get(date)
+            if parsed is None:
+                if len(date_cache) >= _DATE_CACHE_SIZE:
+                    date_cache.clear()
+                parsed = date_cache[date] = parse_date(date.decode('ascii')) or ()
+
+            size_code = size_byte_codes.get(package_size)
+            carrier_code = carrier_byte_codes.get(carrier)
+
+            if parsed and size_code is not None and carrier_code is not None:
+                # Lines with tabs, extra spaces or short dates cannot be rebuilt from the columns.
+                if (len(date) != 10 or line[10] != 32 or line[11 + len(package_size)] != 32
+                        or len(line) != len(package_size) + len(carrier) + 12):
+                    raw_lines[len(ordinals)] = line.strip().decode('ascii')
+                add_ordinal(parsed[0])
+                add_size(size_code)
+                add_carrier(carrier_code)
                 continue
 
-            parts = line.split()
-            transaction = Transaction('', '', '', line)
+        raw_lines[len(ordinals)] = line.strip().decode('ascii')
+        add_ordinal(0)
+        add_size(INVALID_CODE)
+        add_carrier(INVALID_CODE)
+
+    batch.extend_rows(ordinals, size_codes, carrier_codes, raw_lines)
+    return batch
+
 
-            if len(parts) == 3:
-                try:
-                    datetime.strptime(parts[0], '%Y-%m-%d')
-                    date = parts[0]
-                    package_size = parts[1]
-                    carrier = parts[2]
-                    transaction = Transaction(date, package_size, carrier, line)
-                except ValueError:
-                    transaction.is_valid = False
-            else:
-                transaction.is_valid = False
+def parse_input_batch(file_path):
+    """
+    Parse a whole file into a TransactionBatch.
 
-            transactions.append(transaction)
+    Regular files are memory-mapped and parsed from the bytes without decoding
+    the file; stdin, pipes, compressed files and files the bytes scanner cannot
+    reproduce exactly (see _needs_text_mode) go through the text-mode reader.
+    """
+    if file_path != STDIN and _is_mappable(file_path):
+        with open(file_path, 'rb') as file:
+            buffer = _map_file(file)
+            if buffer is not None:
+                with buffer:
+                    return append_mapped_lines(TransactionBatch(), iter_mapped_lines(buffer))
 
-    return transactions
+    return TransactionBatch.from_transactions(iter_input_file(file_path))
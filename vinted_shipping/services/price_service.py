@@ -1,12 +1,46 @@
+import os
+
+from vinted_shipping.models.price_table import PriceTable
 from vinted_shipping.utils.constants import SHIPPING_PRICES
 
+_price_table = PriceTable(SHIPPING_PRICES)
+_price_file_state = None
+
+
+def get_price_table():
+    return _price_table
+
+
+def set_price_table(price_table):
+    """Swap in a new table. Readers see either the old or the new table, never a mix."""
+    global _price_table
+    _price_table = price_table
+
+
+def load_price_file(file_path):
+    """
+    Load a JSON price file and make it the current table.
+
+    The file is only re-read when its size or modification time changed
+    since the last load. The new table is fully built before it is swapped in.
+    """
+    global _price_file_state
+
+    stat = os.stat(file_path)
+    state = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    if state != _price_file_state:
+        set_price_table(PriceTable.from_file(file_path))
+        _price_file_state = state
+
+    return _price_table
+
 
 def get_base_price(transaction):
     if not transaction.is_valid:
         return 0.0
 
-    return SHIPPING_PRICES[transaction.carrier][transaction.package_size]
+    return _price_table.price(transaction.carrier, transaction.package_size)
 
 
 def get_lowest_s_price():
-    return min(SHIPPING_PRICES[carrier]['S'] for carrier in SHIPPING_PRICES)
\ No newline at end of file
+    return _price_table.lowest_price('S')
@@ -0,0 +1,179 @@
+import codecs
+import hashlib
+import inspect
+import json
+import os
+import sys
+from functools import lru_cache
+
+import vinted_shipping
+from vinted_shipping import rules
+from vinted_shipping.services.output_service import write_transactions
+from vinted_shipping.services.price_service import get_price_table
+from vinted_shipping.utils import constants
+from vinted_shipping.utils.files import atomic_write, binary_sink, content_key, text_sink
+
+RESULT_CACHE_VERSION = 1
+RESULT_SUFFIX = '.out'
+DEFAULT_CACHE_SIZE = 256 << 20
+
+_COPY_CHUNK_SIZE = 1 << 20
+
+
+def default_cache_dir():
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'vinted_shipping')
+
+
+@lru_cache(maxsize=1)
+def package_fingerprint():
+    """Hash the source of every module of the vinted_shipping package."""
+    root = os.path.dirname(os.path.abspath(vinted_shipping.__file__))
+    digest = hashlib.sha256()
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories.sort()
+        for name in sorted(files):
+            if name.endswith('.py'):
+                path = os.path.join(directory, name)
+                digest.update(f"{os.path.relpath(path, root)}\0".encode('utf-8'))
+                with open(path, 'rb') as file:
+                    digest.update(file.read())
+    return digest.hexdigest()
+
+
+def rules_fingerprint(registered_rules=None):
+    """Hash the class names and module sources of the registered rules."""
+    digest = hashlib.sha256()
+    for rule in rules.RULES if registered_rules is None else registered_rules:
+        rule_class = type(rule)
+        digest.update(f"{rule_class.__module__}.{rule_class.__qualname__}\0".encode('utf-8'))
+        try:
+            source = inspect.getsource(sys.modules[rule_class.__module__])
+        except (OSError, TypeError, KeyError):
+            source = repr(vars(rule))
+        digest.update(source.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class _EntryTooLarge(Exception):
+    """Discards an entry that outgrew the cache once its output is complete."""
+
+
+class _TeeSink:
+    """
+    Binary sink that copies every block into a cache entry and on to the real sink.
+
+    Once the entry would grow past max_bytes, it is truncated and copying
+    stops; overflowed tells the cache not to keep it.
+    """
+
+    def __init__(self, sink, entry, output_format, max_bytes):
+        self._entry = entry
+        self._room = max_bytes
+        self.overflowed = False
+        if output_format == 'binary':
+            self._forward = binary_sink(sink)
+        else:
+            write = text_sink(sink)
+            self._forward = lambda data: write(data.decode('utf-8'))
+
+    def write(self, data):
+        if not self.overflowed:
+            self._room -= len(data)
+            if self._room < 0:
+                self.overflowed = True
+                self._entry.truncate(0)
+            else:
+                self._entry.write(data)
+        self._forward(data)
+
+
+class ResultCache:
+    """
+    On-disk cache of complete outputs, keyed by content.
+
+    An entry's key hashes the input file's bytes, the effective prices and
+    monthly cap, the source of the whole package and of the registered
+    rules, and the output options, so any change to them is a miss rather
+    than a stale hit. Outputs larger than max_bytes are not stored.
+    Entries are written to a temporary file and renamed into place, so
+    concurrent processes only ever see complete entries. Hits refresh an
+    entry's mtime, and the least recently used entries are evicted once the
+    directory grows past max_bytes.
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_CACHE_SIZE):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, input_path, output_format='text', sort=False, date_range=(None, None)):
+        prices = json.dumps(get_price_table().as_dict(), sort_keys=True)
+        parts = (RESULT_CACHE_VERSION, vinted_shipping.__version__, content_key(input_path)[2].hex(),
+                 prices, repr(constants.MONTHLY_DISCOUNT_CAP), package_fingerprint(), rules_fingerprint(),
+                 output_format, bool(sort), date_range)
+        return hashlib.sha256('\0'.join(map(str, parts)).encode('utf-8')).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.directory, key + RESULT_SUFFIX)
+
+    def replay(self, key, sink, output_format='text'):
+        """Copy a cached output to sink and return True, or return False on a miss."""
+        path = self.path_for(key)
+        try:
+            entry = open(path, 'rb')
+        except FileNotFoundError:
+            return False
+
+        with entry:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+
+            if output_format == 'binary':
+                write = binary_sink(sink)
+                for chunk in iter(lambda: entry.read(_COPY_CHUNK_SIZE), b''):
+                    write(chunk)
+            else:
+                write = text_sink(sink)
+                decoder = codecs.getincrementaldecoder('utf-8')()
+                for chunk in iter(lambda: entry.read(_COPY_CHUNK_SIZE), b''):
+                    write(decoder.decode(chunk))
+                write(decoder.decode(b'', final=True))
+        return True
+
+    def write(self, key, transactions, sink, output_format='text'):
+        """Write transactions to sink like write_transactions and store the output under key."""
+        try:
+            with atomic_write(self.path_for(key), 'wb') as entry:
+                tee = _TeeSink(sink, entry, output_format, self.max_bytes)
+                write_transactions(transactions, tee, output_format)
+                if tee.overflowed:
+                    raise _EntryTooLarge
+        except _EntryTooLarge:
+            return
+        self.evict()
+
+    def evict(self):
+        """Delete the least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        with os.scandir(self.directory) as scan:
+            for item in scan:
+                if not item.name.endswith(RESULT_SUFFIX):
+                    continue
+                try:
+                    item_stat = item.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((item_stat.st_mtime_ns, item_stat.st_size, item.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
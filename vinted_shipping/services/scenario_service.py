@@ -0,0 +1,108 @@
+from collections import Counter, defaultdict
+
+from vinted_shipping.models.price_table import PriceTable
+from vinted_shipping.models.transaction_batch import (
+    TransactionBatch, INVALID_CODE, SIZE_CODES, CARRIER_CODES, _year_month
+)
+from vinted_shipping.services.price_service import get_price_table
+from vinted_shipping.utils.constants import MONTHLY_DISCOUNT_CAP, PACKAGE_SIZES, CARRIERS
+
+SCENARIO_RULES = ('LowestSRule', 'ThirdLFreeRule')
+
+_L_LP = CARRIER_CODES['LP'] * len(PACKAGE_SIZES) + SIZE_CODES['L']
+
+
+class Scenario:
+    """
+    One what-if variant: a price table, a monthly cap and the enabled rules.
+
+    price_table may be a PriceTable or a SHIPPING_PRICES-shaped dict and
+    defaults to the current table; rules are names from SCENARIO_RULES (or
+    rule instances) and default to all of them.
+    """
+
+    __slots__ = ('name', 'price_table', 'cap', 'rules')
+
+    def __init__(self, name, price_table=None, cap=MONTHLY_DISCOUNT_CAP, rules=SCENARIO_RULES):
+        if price_table is None:
+            price_table = get_price_table()
+        elif not isinstance(price_table, PriceTable):
+            price_table = PriceTable(price_table)
+
+        rule_names = frozenset(rule if isinstance(rule, str) else type(rule).__name__
+                               for rule in rules)
+        unknown = rule_names.difference(SCENARIO_RULES)
+        if unknown:
+            raise ValueError(f"scenarios only support the built-in rules, not {', '.join(sorted(unknown))}")
+
+        self.name = name
+        self.price_table = price_table
+        self.cap = cap
+        self.rules = rule_names
+
+    def __repr__(self):
+        return f"Scenario({self.name!r}, cap={self.cap}, rules={sorted(self.rules)})"
+
+
+def bucket_months(transactions):
+    """
+    Count the valid transactions of each month per price key.
+
+    Returns {year_month: [count, ...]} with one count per key in
+    PriceTable.flat_prices order. This is the only pass over the rows.
+    """
+    width = len(PACKAGE_SIZES)
+    months = defaultdict(lambda: [0] * (len(CARRIERS) * width))
+
+    if isinstance(transactions, TransactionBatch):
+        days = Counter(zip(transactions.ordinals, transactions.carrier_codes, transactions.size_codes))
+        for (ordinal, carrier_code, size_code), count in days.items():
+            if size_code != INVALID_CODE:
+                months[_year_month(ordinal)][carrier_code * width + size_code] += count
+    else:
+        keys = Counter((t.year_month, t.carrier, t.package_size) for t in transactions if t.is_valid)
+        for (year_month, carrier, size), count in keys.items():
+            months[year_month][CARRIER_CODES[carrier] * width + SIZE_CODES[size]] += count
+
+    return dict(sorted(months.items()))
+
+
+def _month_totals(counts, scenario):
+    price_table = scenario.price_table
+    base_price = sum(count * price for count, price in zip(counts, price_table.flat_prices))
+
+    candidates = 0.0
+    if 'LowestSRule' in scenario.rules:
+        lowest_s_price = price_table.lowest_price('S')
+        for carrier in CARRIERS:
+            discount = price_table.price(carrier, 'S') - lowest_s_price
+            if discount > 0:
+                candidates += counts[CARRIER_CODES[carrier] * len(PACKAGE_SIZES) + SIZE_CODES['S']] * discount
+    if 'ThirdLFreeRule' in scenario.rules and counts[_L_LP] >= 3:
+        candidates += price_table.price('LP', 'L')
+
+    # Every rule grants min(candidate, remaining budget) until the budget is
+    # spent, so a month's discount is its candidates clipped to the cap.
+    discount = max(0.0, min(scenario.cap, candidates))
+    return {
+        'transactions': sum(counts),
+        'base_price': base_price,
+        'discount': discount,
+        'final_price': base_price - discount,
+    }
+
+
+def evaluate_scenarios(transactions, scenarios):
+    """
+    Price one dataset under many scenarios.
+
+    The rows are bucketed once by month and price key; each scenario is then
+    resolved per month from those counts, without touching the rows again.
+    Returns {scenario name: {year_month: totals}} where totals holds the
+    number of transactions and the sums of base price, discount and final
+    price. Totals match the rule pipeline up to float rounding.
+    """
+    months = bucket_months(transactions)
+    return {scenario.name: {year_month: _month_totals(counts, scenario)
+                            for year_month, counts in months.items()}
+            for scenario in scenarios}
@@ -0,0 +1,81 @@
+import heapq
+import os
+import tempfile
+from itertools import islice
+
+from vinted_shipping.services.parser_service import parse_line
+from vinted_shipping.utils.dates import parse_date
+
+# Lines held in memory per sorted run.
+DEFAULT_RUN_SIZE = 250_000
+
+# Runs merged at once; more runs are first merged into intermediate runs.
+MAX_FAN_IN = 64
+
+
+def _sort_keys(transactions):
+    """
+    Yield (ordinal, sequence, transaction) for each transaction.
+
+    Ignored lines take the date of the closest valid line before them (or sort
+    first), so they stay right behind the transaction they followed in the input.
+    """
+    ordinal = 0
+    for sequence, transaction in enumerate(transactions):
+        if transaction.is_valid:
+            ordinal = parse_date(transaction.date)[0]
+        yield ordinal, sequence, transaction
+
+
+def _write_run(directory, records):
+    fd, path = tempfile.mkstemp(dir=directory, suffix='.run')
+    with os.fdopen(fd, 'w', encoding='utf-8', newline='\n') as file:
+        file.writelines(f"{ordinal}\t{sequence}\t{raw_line}\n" for ordinal, sequence, raw_line in records)
+    return path
+
+
+def _read_run(path):
+    with open(path, 'r', encoding='utf-8', newline='\n') as file:
+        for line in file:
+            ordinal, sequence, raw_line = line[:-1].split('\t', 2)
+            yield int(ordinal), int(sequence), raw_line
+
+
+def _merge_runs(paths):
+    return heapq.merge(*(_read_run(path) for path in paths))
+
+
+def iter_sorted_transactions(transactions, run_size=DEFAULT_RUN_SIZE):
+    """
+    Yield transactions ordered by date, keeping input order for equal dates.
+
+    Up to run_size lines are sorted in memory at a time. Inputs that do not
+    fit in one run are spilled to sorted temporary files and merged back with
+    a k-way heap merge, so memory stays bounded by run_size lines.
+    """
+    keyed = _sort_keys(transactions)
+    run = list(islice(keyed, run_size))
+    run.sort()
+
+    # Everything fitted in memory: no need to touch the disk.
+    if len(run) < run_size:
+        for _, _, transaction in run:
+            yield transaction
+        return
+
+    with tempfile.TemporaryDirectory(prefix='vinted-sort-') as directory:
+        runs = []
+        while run:
+            runs.append(_write_run(directory, ((ordinal, sequence, transaction.raw_line)
+                                               for ordinal, sequence, transaction in run)))
+            run = list(islice(keyed, run_size))
+            run.sort()
+
+        while len(runs) > MAX_FAN_IN:
+            merged = _write_run(directory, _merge_runs(runs[:MAX_FAN_IN]))
+            for path in runs[:MAX_FAN_IN]:
+                os.remove(path)
+            runs = runs[MAX_FAN_IN:] + [merged]
+
+        for _, _, raw_line in _merge_runs(runs):
+            yield parse_line(raw_line)
@@ -0,0 +1,206 @@
+import sqlite3
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from collections.abc import MutableMapping
+
+
+class ClosedMonthError(ValueError):
+    """Raised when a transaction arrives for a month that was already finalized."""
+
+
+def _month_index(year_month):
+    year, month = year_month.split('-')
+    return int(year) * 12 + int(month) - 1
+
+
+class DiscountState(ABC):
+    """
+    Per-month discount state with finalization of closed months.
+
+    The rules keep receiving plain mappings: monthly_discount_tracker and
+    l_lp_counter are provided by the store. Once input reaches a month, the
+    months more than keep_months - 1 calendar months before it are finalized:
+    their state is dropped and, if on_month_closed is set, it is called with
+    the month and its summary (transactions, base_price, discount,
+    final_price, l_lp_count). Resident state therefore stays bounded by the
+    number of open months. Subclasses implement the storage and set the two
+    mappings in __init__.
+    """
+
+    def __init__(self, keep_months=1, on_month_closed=None):
+        if keep_months < 1:
+            raise ValueError("keep_months must be at least 1")
+        self.keep_months = keep_months
+        self.on_month_closed = on_month_closed
+        self._current = None
+        self._oldest_open = None
+
+    # Storage interface
+
+    @abstractmethod
+    def _add_totals(self, year_month, base_price, discount, final_price):
+        pass
+
+    @abstractmethod
+    def _pop_month(self, year_month):
+        """Remove a month's state and return its summary."""
+
+    @abstractmethod
+    def open_months(self):
+        pass
+
+    def flush(self):
+        """Persist pending changes; a no-op for in-memory stores."""
+
+    # Month lifecycle
+
+    def open(self, year_month):
+        """Make year_month current, finalizing the months input has moved past."""
+        if year_month == self._current:
+            return
+        index = _month_index(year_month)
+        if self._oldest_open is not None and index < self._oldest_open:
+            raise ClosedMonthError(f"month {year_month} was already finalized")
+
+        oldest_open = index - self.keep_months + 1
+        if self._oldest_open is None or oldest_open > self._oldest_open:
+            self._oldest_open = oldest_open
+            for month in sorted(self.open_months(), key=_month_index):
+                if _month_index(month) >= oldest_open:
+                    break
+                self.close_month(month)
+        self._current = year_month
+
+    def record(self, transaction):
+        self._add_totals(transaction.year_month, transaction.base_price,
+                         transaction.discount, transaction.final_price)
+
+    def close_month(self, year_month):
+        summary = self._pop_month(year_month)
+        if self.on_month_closed is not None:
+            self.on_month_closed(year_month, summary)
+        return summary
+
+    def close_all(self):
+        """Finalize every open month, e.g. at the end of a finite input."""
+        for month in sorted(self.open_months(), key=_month_index):
+            self.close_month(month)
+        self.flush()
+
+
+class InMemoryDiscountState(DiscountState):
+    """DiscountState kept in dicts holding only the open months."""
+
+    def __init__(self, keep_months=1, on_month_closed=None):
+        super().__init__(keep_months, on_month_closed)
+        self.monthly_discount_tracker = defaultdict(float)
+        self.l_lp_counter = defaultdict(int)
+        self._totals = {}
+
+    def _add_totals(self, year_month, base_price, discount, final_price):
+        totals = self._totals.get(year_month)
+        if totals is None:
+            totals = self._totals[year_month] = [0, 0.0, 0.0, 0.0]
+        totals[0] += 1
+        totals[1] += base_price
+        totals[2] += discount
+        totals[3] += final_price
+
+    def _pop_month(self, year_month):
+        count, base_price, discount, final_price = self._totals.pop(year_month, (0, 0.0, 0.0, 0.0))
+        self.monthly_discount_tracker.pop(year_month, None)
+        return {
+            'transactions': count,
+            'base_price': base_price,
+            'discount': discount,
+            'final_price': final_price,
+            'l_lp_count': self.l_lp_counter.pop(year_month, 0),
+        }
+
+    def open_months(self):
+        return set(self._totals) | set(self.monthly_discount_tracker) | set(self.l_lp_counter)
+
+
+class _SqliteColumn(MutableMapping):
+    """Mapping view of one column of the months table; missing months read as 0."""
+
+    def __init__(self, connection, column, default):
+        self._connection = connection
+        self._column = column
+        self._default = default
+
+    def __getitem__(self, year_month):
+        row = self._connection.execute(
+            f"SELECT {self._column} FROM months WHERE year_month = ?", (year_month,)).fetchone()
+        return self._default if row is None else row[0]
+
+    def __setitem__(self, year_month, value):
+        self._connection.execute(
+            f"INSERT INTO months (year_month, {self._column}) VALUES (?, ?) "
+            f"ON CONFLICT (year_month) DO UPDATE SET {self._column} = excluded.{self._column}",
+            (year_month, value))
+
+    def __delitem__(self, year_month):
+        self._connection.execute(
+            f"UPDATE months SET {self._column} = ? WHERE year_month = ?", (self._default, year_month))
+
+    def __iter__(self):
+        rows = self._connection.execute(
+            f"SELECT year_month FROM months WHERE {self._column} != ?", (self._default,))
+        return (year_month for year_month, in rows.fetchall())
+
+    def __len__(self):
+        return self._connection.execute(
+            f"SELECT COUNT(*) FROM months WHERE {self._column} != ?", (self._default,)).fetchone()[0]
+
+
+class SqliteDiscountState(DiscountState):
+    """
+    DiscountState whose open months live in a SQLite database.
+
+    Open months survive restarts, so a long-running process keeps almost
+    nothing resident. Changes are committed when a month closes and on flush().
+    """
+
+    def __init__(self, path, keep_months=1, on_month_closed=None):
+        super().__init__(keep_months, on_month_closed)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS months ("
+            "year_month TEXT PRIMARY KEY, discount REAL NOT NULL DEFAULT 0, "
+            "l_lp_count INTEGER NOT NULL DEFAULT 0, transactions INTEGER NOT NULL DEFAULT 0, "
+            "base_price REAL NOT NULL DEFAULT 0, final_price REAL NOT NULL DEFAULT 0, "
+            "recorded_discount REAL NOT NULL DEFAULT 0)")
+        self.monthly_discount_tracker = _SqliteColumn(self.connection, 'discount', 0.0)
+        self.l_lp_counter = _SqliteColumn(self.connection, 'l_lp_count', 0)
+
+        open_months = self.open_months()
+        if open_months:
+            self._oldest_open = min(map(_month_index, open_months))
+
+    def _add_totals(self, year_month, base_price, discount, final_price):
+        self.connection.execute(
+            "INSERT INTO months (year_month, transactions, base_price, recorded_discount, final_price) "
+            "VALUES (?, 1, ?, ?, ?) ON CONFLICT (year_month) DO UPDATE SET "
+            "transactions = transactions + 1, base_price = base_price + excluded.base_price, "
+            "recorded_discount = recorded_discount + excluded.recorded_discount, "
+            "final_price = final_price + excluded.final_price",
+            (year_month, base_price, discount, final_price))
+
+    def _pop_month(self, year_month):
+        row = self.connection.execute(
+            "SELECT transactions, base_price, recorded_discount, final_price, l_lp_count "
+            "FROM months WHERE year_month = ?", (year_month,)).fetchone() or (0, 0.0, 0.0, 0.0, 0)
+        self.connection.execute("DELETE FROM months WHERE year_month = ?", (year_month,))
+        self.connection.commit()
+        return dict(zip(('transactions', 'base_price', 'discount', 'final_price', 'l_lp_count'), row))
+
+    def open_months(self):
+        return {year_month for year_month, in self.connection.execute("SELECT year_month FROM months")}
+
+    def flush(self):
+        self.connection.commit()
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
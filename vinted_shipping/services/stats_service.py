@@ -0,0 +1,129 @@
+import contextlib
+import json
+import time
+from collections import Counter
+
+
+class PipelineHooks:
+    """
+    Callbacks the pipeline calls while instrumentation is enabled.
+
+    Subclass it and pass an instance as hooks= to iter_discounts or
+    iter_incremental. When no hooks are given, the pipeline runs its
+    uninstrumented code path and none of these methods are called.
+    """
+
+    def stage(self, name):
+        """Context manager around a stage that runs in one go (e.g. a list engine)."""
+        return contextlib.nullcontext()
+
+    def iter_stage(self, name, iterable):
+        """Wrap the iterator of a streaming stage; returns it unchanged by default."""
+        return iterable
+
+    def on_rule(self, rule, transaction, granted):
+        """Called after each apply_rule call with the discount it added to the month."""
+
+    def on_cap_reached(self, transaction):
+        """Called when a transaction skips the rules because its month hit the cap."""
+
+
+class PipelineStats(PipelineHooks):
+    """
+    Collects wall and CPU time per stage, rule calls and discounts per rule
+    class, monthly cap short-circuits and the number of lines processed.
+
+    Stage times are exclusive: a streaming stage that pulls from an upstream
+    stage is not charged for the time spent inside the upstream stage.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.lines = 0
+        self.rule_calls = Counter()
+        self.rule_discounts = Counter()
+        self.rule_amounts = Counter()
+        self.cap_short_circuits = 0
+        self._nested = []
+
+    def _charge(self, name, wall, cpu):
+        inner_wall, inner_cpu = self._nested.pop()
+        totals = self.stages.setdefault(name, [0.0, 0.0])
+        totals[0] += wall - inner_wall
+        totals[1] += cpu - inner_cpu
+        if self._nested:
+            self._nested[-1][0] += wall
+            self._nested[-1][1] += cpu
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        self._nested.append([0.0, 0.0])
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self._charge(name, time.perf_counter() - wall, time.process_time() - cpu)
+
+    def iter_stage(self, name, iterable):
+        iterator = iter(iterable)
+        count_lines = name == 'parse'
+        while True:
+            self._nested.append([0.0, 0.0])
+            wall, cpu = time.perf_counter(), time.process_time()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self._charge(name, time.perf_counter() - wall, time.process_time() - cpu)
+                return
+            self._charge(name, time.perf_counter() - wall, time.process_time() - cpu)
+
+            if count_lines:
+                self.lines += 1
+            yield item
+
+    def on_rule(self, rule, transaction, granted):
+        name = type(rule).__name__
+        self.rule_calls[name] += 1
+        if granted > 0:
+            self.rule_discounts[name] += 1
+            self.rule_amounts[name] += granted
+
+    def on_cap_reached(self, transaction):
+        self.cap_short_circuits += 1
+
+    def report(self):
+        wall_time = sum(wall for wall, _ in self.stages.values())
+        return {
+            'lines': self.lines,
+            'wall_time': wall_time,
+            'lines_per_second': self.lines / wall_time if wall_time else 0.0,
+            'stages': {name: {'wall_time': wall, 'cpu_time': cpu}
+                       for name, (wall, cpu) in self.stages.items()},
+            'rules': {name: {'calls': calls,
+                             'discounts': self.rule_discounts[name],
+                             'amount': round(self.rule_amounts[name], 2)}
+                      for name, calls in self.rule_calls.items()},
+            'cap_short_circuits': self.cap_short_circuits,
+        }
+
+    def format_report(self, output_format='table'):
+        report = self.report()
+        if output_format == 'json':
+            return json.dumps(report, indent=2)
+
+        lines = [f"{'stage':<12} {'wall s':>10} {'cpu s':>10}"]
+        for name, times in report['stages'].items():
+            lines.append(f"{name:<12} {times['wall_time']:>10.4f} {times['cpu_time']:>10.4f}")
+        lines.append(f"{'total':<12} {report['wall_time']:>10.4f}")
+        lines.append('')
+
+        if report['rules']:
+            lines.append(f"{'rule':<16} {'calls':>10} {'discounts':>10} {'amount':>10}")
+            for name, rule in report['rules'].items():
+                lines.append(f"{name:<16} {rule['calls']:>10} {rule['discounts']:>10} "
+                             f"{rule['amount']:>10.2f}")
+            lines.append('')
+
+        lines.append(f"monthly cap short-circuits: {report['cap_short_circuits']}")
+        lines.append(f"lines: {report['lines']} ({report['lines_per_second']:,.0f} lines/s)")
+        return '\n'.join(lines)
@@ -0,0 +1,142 @@
+import json
+
+from vinted_shipping.utils import constants
+from vinted_shipping.utils.constants import CARRIERS, PACKAGE_SIZES
+from vinted_shipping.utils.files import atomic_write
+
+SUMMARY_VERSION = 1
+# Conventional name of an input's summary: INPUT_FILE.summary
+SUMMARY_SUFFIX = '.summary'
+
+# Per-month totals, in this order after one shipment count per (carrier, size).
+# Money is kept in cents so merged totals stay exact.
+_TOTALS = ('base_price_cents', 'discount_cents', 'final_price_cents', 'third_l_free')
+_KEYS = tuple((carrier, size) for carrier in CARRIERS for size in PACKAGE_SIZES)
+_KEY_INDEX = {key: i for i, key in enumerate(_KEYS)}
+_L_LP = _KEY_INDEX[('LP', 'L')]
+
+
+def _cents(amount):
+    return round(amount * 100)
+
+
+class MonthlySummary:
+    """
+    Per-month aggregates of priced transactions.
+
+    For each month it keeps the shipments per carrier and size, the base
+    price, discount and final price totals and the number of L LP shipments
+    that received a discount (the third-L-free rule), plus the number of
+    ignored lines. Every figure is a count or a sum in cents, so summaries
+    of disjoint inputs, such as the months of a parallel run or the lines of
+    successive incremental runs, merge by addition.
+    """
+
+    def __init__(self, cap=None):
+        self.cap = constants.MONTHLY_DISCOUNT_CAP if cap is None else cap
+        self.months = {}
+        self.ignored = 0
+
+    def record(self, transaction):
+        if not transaction.is_valid:
+            self.ignored += 1
+            return
+
+        totals = self.months.get(transaction.year_month)
+        if totals is None:
+            totals = self.months[transaction.year_month] = [0] * (len(_KEYS) + len(_TOTALS))
+        key = _KEY_INDEX[(transaction.carrier, transaction.package_size)]
+        totals[key] += 1
+
+        width = len(_KEYS)
+        totals[width] += _cents(transaction.base_price)
+        totals[width + 1] += _cents(transaction.discount)
+        totals[width + 2] += _cents(transaction.final_price)
+        if key == _L_LP and transaction.discount > 0:
+            totals[width + 3] += 1
+
+    def iter_record(self, transactions):
+        """Record priced transactions as they stream past."""
+        for transaction in transactions:
+            self.record(transaction)
+            yield transaction
+
+    def merge(self, other):
+        for year_month, other_totals in other.months.items():
+            totals = self.months.get(year_month)
+            if totals is None:
+                self.months[year_month] = list(other_totals)
+            else:
+                for i, value in enumerate(other_totals):
+                    totals[i] += value
+        self.ignored += other.ignored
+        return self
+
+    def to_dict(self):
+        width = len(_KEYS)
+        months = {}
+        for year_month in sorted(self.months):
+            totals = self.months[year_month]
+            shipments = {}
+            for (carrier, size), count in zip(_KEYS, totals):
+                shipments.setdefault(carrier, {})[size] = count
+            months[year_month] = {'shipments': shipments,
+                                  **dict(zip(_TOTALS, totals[width:]))}
+        return {'version': SUMMARY_VERSION, 'cap': self.cap, 'ignored': self.ignored, 'months': months}
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('version') != SUMMARY_VERSION:
+            raise ValueError("unsupported summary version")
+        summary = cls(data['cap'])
+        summary.ignored = data['ignored']
+        for year_month, month in data['months'].items():
+            summary.months[year_month] = ([month['shipments'][carrier][size] for carrier, size in _KEYS]
+                                          + [month[name] for name in _TOTALS])
+        return summary
+
+    def save(self, summary_path):
+        with atomic_write(summary_path) as file:
+            json.dump(self.to_dict(), file)
+
+    @classmethod
+    def load(cls, summary_path):
+        with open(summary_path, 'r') as file:
+            return cls.from_dict(json.load(file))
+
+    def report(self, first=None, last=None):
+        """Return {year_month: figures} for the months first..last (inclusive, 'YYYY-MM')."""
+        width = len(_KEYS)
+        report = {}
+        for year_month in sorted(self.months):
+            if (first is not None and year_month < first) or (last is not None and year_month > last):
+                continue
+            totals = self.months[year_month]
+            discount = totals[width + 1] / 100
+            report[year_month] = {
+                'shipments': sum(totals[:width]),
+                'by_carrier_size': {f"{carrier} {size}": count
+                                    for (carrier, size), count in zip(_KEYS, totals)},
+                'base_price': totals[width] / 100,
+                'discount': discount,
+                'final_price': totals[width + 2] / 100,
+                'cap_used': discount / self.cap if self.cap else 0.0,
+                'cap_remaining': max(0.0, round(self.cap - discount, 2)),
+                'third_l_free': totals[width + 3],
+            }
+        return report
+
+    def format_report(self, first=None, last=None, output_format='table'):
+        report = self.report(first, last)
+        if output_format == 'json':
+            return json.dumps(report, indent=2)
+
+        keys = [f"{carrier} {size}" for carrier, size in _KEYS]
+        lines = [f"{'month':<8} {'shipments':>9} " + ' '.join(f"{key:>5}" for key in keys)
+                 + f" {'discount':>9} {'cap used':>8} {'3rd L':>5}"]
+        for year_month, month in report.items():
+            lines.append(f"{year_month:<8} {month['shipments']:>9} "
+                         + ' '.join(f"{month['by_carrier_size'][key]:>5}" for key in keys)
+                         + f" {month['discount']:>9.2f} {month['cap_used']:>8.0%} {month['third_l_free']:>5}")
+        lines.append(f"ignored lines: {self.ignored}")
+        return '\n'.join(lines)
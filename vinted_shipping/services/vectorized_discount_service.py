@@ -0,0 +1,138 @@
+from datetime import date
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is an optional dependency
+    np = None
+
+from vinted_shipping.models.transaction_batch import INVALID_CODE, SIZE_CODES, CARRIER_CODES
+from vinted_shipping import rules
+from vinted_shipping.services.price_service import get_price_table
+from vinted_shipping.utils.constants import MONTHLY_DISCOUNT_CAP, PACKAGE_SIZES
+
+# Running totals further than this below the cap cannot be clipped by it,
+# so those rows take their candidate discount unchanged.
+CAP_MARGIN = 1e-9
+
+
+def _month_keys(ordinals):
+    """
+    Map day ordinals to month numbers counted from the earliest month.
+
+    Uses a per-day lookup table rather than sorting, and returns the
+    smallest integer type that fits so the stable sort can use radix sort.
+    """
+    first_day = int(ordinals.min())
+    days = map(date.fromordinal, range(first_day, int(ordinals.max()) + 1))
+    day_months = np.array([day.year * 12 + day.month for day in days])
+    day_months -= day_months[0]
+
+    dtype = np.int16 if day_months[-1] <= np.iinfo(np.int16).max else np.int64
+    return day_months.astype(dtype)[ordinals - first_day]
+
+
+def _discount_month(rows, base, s_candidate, is_l_lp, applied, called):
+    """
+    Resolve the discounts of one month, given its rows in input order.
+
+    Rows whose running discount total stays clearly below the cap are handled
+    with cumulative sums. From the first row that may touch the cap onwards,
+    the rules are replayed one row at a time so the float arithmetic matches
+    the reference engine exactly.
+    """
+    l_lp = is_l_lp[rows]
+    l_lp_rank = np.cumsum(l_lp)
+    third_l_lp = l_lp & (l_lp_rank == 3)
+
+    candidate = np.where(third_l_lp, base[rows], s_candidate[rows])
+    eligible = third_l_lp | (s_candidate[rows] > 0)
+    totals = np.cumsum(candidate)
+
+    stop = int(np.searchsorted(totals, MONTHLY_DISCOUNT_CAP - CAP_MARGIN, side='left'))
+    applied[rows[:stop]] = candidate[:stop]
+    called[rows[:stop]] = eligible[:stop]
+
+    if stop == len(rows):
+        return
+
+    tracker = float(totals[stop - 1]) if stop else 0.0
+    counter = int(l_lp_rank[stop - 1]) if stop else 0
+
+    for row in rows[stop:].tolist():
+        if tracker >= MONTHLY_DISCOUNT_CAP:
+            break
+
+        if is_l_lp[row]:
+            counter += 1
+            if counter != 3:
+                continue
+            discount_amount = float(base[row])
+        elif s_candidate[row] > 0:
+            discount_amount = float(s_candidate[row])
+        else:
+            continue
+
+        remaining_budget = max(0, MONTHLY_DISCOUNT_CAP - tracker)
+        applicable_discount = min(discount_amount, remaining_budget)
+
+        applied[row] = applicable_discount
+        called[row] = True
+        tracker += applicable_discount
+
+
+def calculate_discounts_vectorized(batch):
+    """
+    Calculate discounts for a TransactionBatch with whole-column operations.
+
+    Produces the same prices as calculate_discounts for the LowestSRule and
+    ThirdLFreeRule pipeline, writing them into the batch's price columns.
+    Requires numpy.
+    """
+    if np is None:
+        raise ImportError("the vectorized discount engine requires numpy")
+
+    if [type(rule) for rule in rules.RULES] != [rules.LowestSRule, rules.ThirdLFreeRule]:
+        raise ValueError("the vectorized discount engine only supports the built-in rules")
+
+    if len(batch) == 0:
+        return batch
+
+    size_codes = np.frombuffer(batch.size_codes, dtype=np.int8)
+    carrier_codes = np.frombuffer(batch.carrier_codes, dtype=np.int8)
+    ordinals = np.frombuffer(batch.ordinals, dtype=np.intc)
+    base_prices = np.frombuffer(batch.base_prices, dtype=np.float64)
+    discounts = np.frombuffer(batch.discounts, dtype=np.float64)
+    final_prices = np.frombuffer(batch.final_prices, dtype=np.float64)
+
+    valid_rows = np.flatnonzero(size_codes != INVALID_CODE)
+    if valid_rows.size == 0:
+        return batch
+
+    sizes = size_codes[valid_rows]
+    carriers = carrier_codes[valid_rows]
+
+    price_table = get_price_table()
+    flat_prices = np.array(price_table.flat_prices)
+    base = flat_prices[carriers.astype(np.intp) * len(PACKAGE_SIZES) + sizes]
+    base_prices[valid_rows] = base
+    final_prices[valid_rows] = base
+
+    lowest_s_price = price_table.lowest_price('S')
+    is_s = sizes == SIZE_CODES['S']
+    is_l_lp = (sizes == SIZE_CODES['L']) & (carriers == CARRIER_CODES['LP'])
+    s_candidate = np.where(is_s & (base > lowest_s_price), base - lowest_s_price, 0.0)
+
+    months = _month_keys(ordinals[valid_rows])
+    order = np.argsort(months, kind='stable')
+    boundaries = np.flatnonzero(np.diff(months[order])) + 1
+
+    applied = np.zeros(valid_rows.size)
+    called = np.zeros(valid_rows.size, dtype=bool)
+    for rows in np.split(order, boundaries):
+        _discount_month(rows, base, s_candidate, is_l_lp, applied, called)
+
+    discounted = np.minimum(applied[called], base[called])
+    discounts[valid_rows[called]] = discounted
+    final_prices[valid_rows[called]] = base[called] - discounted
+
+    return batch
@@ -0,0 +1,15 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from vinted_shipping.services.price_service import get_price_table, set_price_table
+
+
+def pricing_pool(workers=None):
+    """
+    Return a process pool whose workers price with the caller's current table.
+
+    Workers may not inherit the parent's globals (spawn and forkserver start
+    methods), so each one installs the table that was current when the pool
+    was created.
+    """
+    return ProcessPoolExecutor(max_workers=workers, initializer=set_price_table,
+                               initargs=(get_price_table(),))
@@ -0,0 +1,43 @@
+"""
+Answer per-month questions from summary files, without reading transactions.
+
+Reads the files written by `main.py --summary FILE`, merges them (e.g. the
+summaries of several inputs or of separate runs over disjoint data) and
+prints shipments per carrier and size, the discount granted, how much of
+the monthly cap it used and the third-L-free discounts of each month.
+
+Usage: python -m vinted_shipping.summary SUMMARY_FILE [...] [--from YYYY-MM] [--to YYYY-MM]
+"""
+import argparse
+import sys
+
+from vinted_shipping.services.summary_service import MonthlySummary
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Report per-month shipping discount aggregates.")
+    parser.add_argument('summary_files', nargs='+', metavar='SUMMARY_FILE',
+                        help="summary written by main.py --summary")
+    parser.add_argument('--from', dest='date_from', metavar='YYYY-MM', help="first month to report")
+    parser.add_argument('--to', dest='date_to', metavar='YYYY-MM', help="last month to report")
+    parser.add_argument('--format', choices=('table', 'json'), default='table',
+                        help="report format (default: table)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    try:
+        summary = MonthlySummary.load(args.summary_files[0])
+        for summary_file in args.summary_files[1:]:
+            summary.merge(MonthlySummary.load(summary_file))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(summary.format_report(args.date_from, args.date_to, args.format))
+
+
+if __name__ == "__main__":
+    main()
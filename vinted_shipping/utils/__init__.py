@@ -1,3 +1,5 @@
-from vinted_shipping.utils.constants import SHIPPING_PRICES, MONTHLY_DISCOUNT_CAP
+from vinted_shipping.utils.constants import (
+    SHIPPING_PRICES, MONTHLY_DISCOUNT_CAP, PACKAGE_SIZES, CARRIERS
+)
 
-__all__ = ['SHIPPING_PRICES', 'MONTHLY_DISCOUNT_CAP']
\ No newline at end of file
+__all__ = ['SHIPPING_PRICES', 'MONTHLY_DISCOUNT_CAP', 'PACKAGE_SIZES', 'CARRIERS']
@@ -17,4 +17,8 @@ SHIPPING_PRICES = {
 }
 
 # Maximum monthly discount cap in euros
-MONTHLY_DISCOUNT_CAP = 10.0
\ No newline at end of file
+MONTHLY_DISCOUNT_CAP = 10.0
+
+# Valid package sizes and carriers, in the order used for compact integer codes
+PACKAGE_SIZES = ('S', 'M', 'L')
+CARRIERS = ('LP', 'MR')
@@ -0,0 +1,36 @@
+"""
+Date helpers shared by the parser and the models.
+"""
+from datetime import datetime
+from functools import lru_cache
+
+DATE_FORMAT = '%Y-%m-%d'
+
+
+@lru_cache(maxsize=4096)
+def parse_date(date_string):
+    """
+    Validate a '%Y-%m-%d' date string in a single pass.
+
+    Returns a (day ordinal, year_month) tuple, or None when strptime would
+    reject the string. Canonical 'YYYY-MM-DD' strings are sliced at fixed
+    offsets; anything else (e.g. '2015-2-1') goes through strptime so the
+    accepted set stays exactly the same. Results are memoized per date.
+    """
+    if (len(date_string) == 10 and date_string[4] == '-' and date_string[7] == '-'
+            and date_string.isascii()):
+        year, month, day = date_string[:4], date_string[5:7], date_string[8:]
+        if year.isdigit() and month.isdigit() and day.isdigit():
+            try:
+                date_obj = datetime(int(year), int(month), int(day))
+            except ValueError:
+                return None
+            return date_obj.toordinal(), f"{date_obj.year}-{date_obj.month:02d}"
+
+    try:
+        date_obj = datetime.strptime(date_string, DATE_FORMAT)
+    except ValueError:
+        return None
+
+    return date_obj.toordinal(), f"{date_obj.year}-{date_obj.month:02d}"
+
@@ -0,0 +1,89 @@
+"""
+File helpers shared by the services that read, fingerprint and write
+inputs, results and sidecar files.
+"""
+import hashlib
+import io
+import os
+import tempfile
+from contextlib import contextmanager
+
+# Size of the windows at the start of a file and just before an offset whose
+# hashes tell whether the file still starts with the same data.
+HASH_WINDOW = 64 * 1024
+
+_HASH_CHUNK_SIZE = 1 << 20
+
+
+@contextmanager
+def atomic_write(path, mode='w'):
+    """
+    Yield a temporary file opened with mode next to path, then rename it over path.
+
+    The file is flushed and fsynced before the rename, so readers, concurrent
+    writers and a crash only ever see the previous file or the complete new
+    one. If the block raises, the temporary file is removed and path is left
+    untouched.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}-")
+    try:
+        with os.fdopen(fd, mode) as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def window_hashes(file, offset):
+    """Return the SHA-256 hex digests of the first and last HASH_WINDOW bytes before offset."""
+    file.seek(0)
+    head = hashlib.sha256(file.read(min(offset, HASH_WINDOW))).hexdigest()
+
+    tail_start = max(0, offset - HASH_WINDOW)
+    file.seek(tail_start)
+    tail = hashlib.sha256(file.read(offset - tail_start)).hexdigest()
+
+    return head, tail
+
+
+def content_key(path):
+    """Return (size, mtime_ns, sha256 digest) of a file."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        file_stat = os.fstat(file.fileno())
+        for chunk in iter(lambda: file.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return file_stat.st_size, file_stat.st_mtime_ns, digest.digest()
+
+
+class _SocketSink:
+    def __init__(self, sock):
+        self.sock = sock
+
+    def write(self, data):
+        self.sock.sendall(data)
+
+
+def binary_sink(sink):
+    """Return a callable that writes bytes to a binary, text or socket sink."""
+    if hasattr(sink, 'sendall') and not hasattr(sink, 'write'):
+        return _SocketSink(sink).write
+    if isinstance(sink, io.TextIOBase):
+        if not hasattr(sink, 'buffer'):
+            raise ValueError("binary output needs a binary sink")
+        sink.flush()
+        return sink.buffer.write
+    return sink.write
+
+
+def text_sink(sink):
+    """Return a callable that writes str to a binary, text or socket sink."""
+    if isinstance(sink, io.TextIOBase):
+        return sink.write
+
+    write = binary_sink(sink)
+    return lambda text: write(text.encode('utf-8'))